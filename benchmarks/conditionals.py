@@ -0,0 +1,115 @@
+# Copyright 2018 the GPflow authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Compares the run time of `gpflow.conditionals.base_conditional` with its
+previous implementation, which tiled the kernel matrices once per output,
+for growing numbers of outputs K, inducing points M and inputs N.
+
+    python benchmarks/conditionals.py --num-func 1 10 100 --num-inducing 50 200 --num-data 500
+
+The outputs of full_cov=True need K N² memory, the defaults fit into 4 GB.
+"""
+
+import argparse
+import itertools
+import timeit
+
+import numpy as np
+import tensorflow as tf
+
+import gpflow
+from gpflow import settings
+
+
+def tiled_base_conditional(Kmn, Kmm, Knn, f, *, full_cov=False, q_sqrt=None, white=False):
+    """
+    Copy of `base_conditional` before the kernel matrices were shared
+    across the outputs.
+    """
+    num_func = tf.shape(f)[1]
+    Lm = tf.cholesky(Kmm)
+    A = tf.matrix_triangular_solve(Lm, Kmn, lower=True)
+    if full_cov:
+        fvar = Knn - tf.matmul(A, A, transpose_a=True)
+        shape = tf.stack([num_func, 1, 1])
+    else:
+        fvar = Knn - tf.reduce_sum(tf.square(A), 0)
+        shape = tf.stack([num_func, 1])
+    fvar = tf.tile(tf.expand_dims(fvar, 0), shape)
+    if not white:
+        A = tf.matrix_triangular_solve(tf.transpose(Lm), A, lower=False)
+    fmean = tf.matmul(A, f, transpose_a=True)
+    if q_sqrt is not None:
+        if q_sqrt.get_shape().ndims == 2:
+            LTA = A * tf.expand_dims(tf.transpose(q_sqrt), 2)
+        else:
+            L = tf.matrix_band_part(q_sqrt, -1, 0)
+            A_tiled = tf.tile(tf.expand_dims(A, 0), tf.stack([num_func, 1, 1]))
+            LTA = tf.matmul(L, A_tiled, transpose_a=True)
+        if full_cov:
+            fvar = fvar + tf.matmul(LTA, LTA, transpose_a=True)
+        else:
+            fvar = fvar + tf.reduce_sum(tf.square(LTA), 1)
+    return fmean, tf.transpose(fvar)
+
+
+def run_time(session, outputs, repeats):
+    session.run(outputs)
+    return min(timeit.repeat(lambda: session.run(outputs), number=1, repeat=repeats))
+
+
+def benchmark_base(conditional, num_inducing, num_data, num_func, q_diag, full_cov, repeats):
+    rng = np.random.RandomState(0)
+    X = rng.randn(num_data, 1)
+    Z = rng.randn(num_inducing, 1)
+    with tf.Graph().as_default(), tf.Session() as session:
+        kern = gpflow.kernels.RBF(1)
+        kern.compile(session=session)
+        with gpflow.params_as_tensors_for(kern):
+            Kmm = kern.K(Z) + settings.numerics.jitter_level * tf.eye(num_inducing, dtype=settings.float_type)
+            Kmn = kern.K(Z, X)
+            Knn = kern.K(X) if full_cov else kern.Kdiag(X)
+        f = tf.constant(rng.randn(num_inducing, num_func))
+        if q_diag:
+            q_sqrt = tf.constant(rng.rand(num_inducing, num_func))
+        else:
+            q_sqrt = tf.constant(np.tril(rng.randn(num_func, num_inducing, num_inducing)))
+        outputs = conditional(Kmn, Kmm, Knn, f, full_cov=full_cov, q_sqrt=q_sqrt)
+        return run_time(session, outputs, repeats)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--num-inducing', type=int, nargs='+', default=[50, 200])
+    parser.add_argument('--num-data', type=int, nargs='+', default=[100, 500])
+    parser.add_argument('--num-func', type=int, nargs='+', default=[1, 10, 100])
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args()
+    sizes = list(itertools.product(args.num_inducing, args.num_data, args.num_func))
+
+    print('{:>6} {:>6} {:>6} {:>6} {:>6} {:>12} {:>12}'.format(
+        'q_diag', 'full', 'M', 'N', 'K', 'tiled [s]', 'shared [s]'))
+    for q_diag, full_cov in itertools.product([True, False], [False, True]):
+        for num_inducing, num_data, num_func in sizes:
+            times = [benchmark_base(conditional, num_inducing, num_data, num_func,
+                                    q_diag, full_cov, args.repeats)
+                     for conditional in [tiled_base_conditional,
+                                         gpflow.conditionals.base_conditional]]
+            print('{:>6} {:>6} {:>6} {:>6} {:>6} {:>12.4f} {:>12.4f}'.format(
+                str(q_diag), str(full_cov), num_inducing, num_data, num_func, *times))
+
+
+if __name__ == '__main__':
+    main()
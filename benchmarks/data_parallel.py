@@ -0,0 +1,127 @@
+# Copyright 2018 the GPflow authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Compares the training of a minibatched SVGP with `gpflow.train.AdamOptimizer`
+in a single session and with `gpflow.train.DataParallelOptimizer` for
+growing numbers of worker processes K. Every step uses `minibatch-size` data
+points in total, i.e. each worker draws minibatches of minibatch-size / K
+points from its shard, so all runs make the same number of Adam updates with
+gradient estimates of the same variance.
+
+    python benchmarks/data_parallel.py --num-workers 1 2 4 --maxiter 500
+
+The time per step excludes the start-up of the workers and the building of
+the graphs, which is reported separately. The bound is evaluated on all data
+after training.
+"""
+
+import argparse
+import functools
+import timeit
+
+import numpy as np
+import tensorflow as tf
+
+import gpflow
+
+
+def make_svgp(X, Y, num_data, num_inducing, minibatch_size):
+    Z = X[np.random.RandomState(1).permutation(len(X))[:num_inducing]]
+    kern = gpflow.kernels.RBF(X.shape[1], ARD=True)
+    return gpflow.models.SVGP(X, Y, kern, gpflow.likelihoods.Gaussian(), Z=Z,
+                              num_data=num_data, minibatch_size=minibatch_size)
+
+
+def make_data(num_data, input_dim):
+    rng = np.random.RandomState(0)
+    X = rng.rand(num_data, input_dim)
+    Y = np.sin(10 * X).sum(1, keepdims=True) + 0.1 * rng.randn(num_data, 1)
+    return X, Y
+
+
+def full_bound(X, Y, num_inducing, model):
+    """
+    Evaluates the bound of the model's parameters on all data.
+    """
+    with tf.Graph().as_default(), tf.Session().as_default():
+        m = make_svgp(X, Y, len(X), num_inducing, None)
+        for parameter, value in zip(m.trainable_parameters, model):
+            parameter.assign(value)
+        return m.compute_log_likelihood()
+
+
+def train_adam(X, Y, num_inducing, minibatch_size, maxiter, learning_rate):
+    with tf.Graph().as_default(), tf.Session().as_default():
+        start = timeit.default_timer()
+        m = make_svgp(X, Y, len(X), num_inducing, minibatch_size)
+        session = m.enquire_session()
+        optimize = gpflow.train.AdamOptimizer(learning_rate).make_optimize_tensor(m)
+        session.run(optimize)
+        startup = timeit.default_timer() - start
+        start = timeit.default_timer()
+        for _ in range(maxiter):
+            session.run(optimize)
+        step = (timeit.default_timer() - start) / maxiter
+        m.anchor(session)
+        return startup, step, [p.read_value() for p in m.trainable_parameters]
+
+
+def train_data_parallel(X, Y, num_inducing, minibatch_size, maxiter, learning_rate,
+                        num_workers, staleness):
+    factory = functools.partial(make_svgp, num_inducing=num_inducing,
+                                minibatch_size=minibatch_size // num_workers)
+    times = []
+    for num_steps in [1, maxiter + 1]:
+        with tf.Graph().as_default(), tf.Session().as_default():
+            m = make_svgp(X, Y, len(X), num_inducing, None)
+            opt = gpflow.train.DataParallelOptimizer(factory, X, Y, num_workers=num_workers,
+                                                     learning_rate=learning_rate,
+                                                     staleness=staleness)
+            start = timeit.default_timer()
+            opt.minimize(m, maxiter=num_steps)
+            times.append(timeit.default_timer() - start)
+            values = [p.read_value() for p in m.trainable_parameters]
+    return times[0], (times[1] - times[0]) / maxiter, values
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--num-data', type=int, default=20000)
+    parser.add_argument('--input-dim', type=int, default=2)
+    parser.add_argument('--num-inducing', type=int, default=200)
+    parser.add_argument('--minibatch-size', type=int, default=1024)
+    parser.add_argument('--num-workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--staleness', type=int, default=0)
+    parser.add_argument('--maxiter', type=int, default=500)
+    parser.add_argument('--learning-rate', type=float, default=0.01)
+    args = parser.parse_args()
+    X, Y = make_data(args.num_data, args.input_dim)
+
+    print('{:>16} {:>12} {:>12} {:>12}'.format('optimizer', 'start-up [s]', 'step [s]', 'bound'))
+    startup, step, values = train_adam(X, Y, args.num_inducing, args.minibatch_size,
+                                       args.maxiter, args.learning_rate)
+    bound = full_bound(X, Y, args.num_inducing, values)
+    print('{:>16} {:>12.2f} {:>12.4f} {:>12.1f}'.format('Adam', startup, step, bound))
+    for num_workers in args.num_workers:
+        startup, step, values = train_data_parallel(
+            X, Y, args.num_inducing, args.minibatch_size, args.maxiter, args.learning_rate,
+            num_workers, args.staleness)
+        bound = full_bound(X, Y, args.num_inducing, values)
+        name = 'K={}'.format(num_workers)
+        print('{:>16} {:>12.2f} {:>12.4f} {:>12.1f}'.format(name, startup, step, bound))
+
+
+if __name__ == '__main__':
+    main()
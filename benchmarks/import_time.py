@@ -0,0 +1,63 @@
+# Copyright 2018 the GPflow authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Measures the time of `import gpflow` in fresh interpreters, in total and on
+top of an already imported TensorFlow, and lists the optional dependencies
+which the import loads.
+
+    python benchmarks/import_time.py --repeats 5
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+
+SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import tensorflow
+tensorflow_time = time.perf_counter() - start
+import gpflow
+total_time = time.perf_counter() - start
+print(json.dumps({'tensorflow': tensorflow_time, 'total': total_time,
+                  'modules': sorted(sys.modules)}))
+"""
+
+OPTIONAL_MODULES = ['pandas', 'h5py', 'multipledispatch', 'pytest', 'scipy.optimize',
+                    'gpflow.expectations', 'gpflow.test_util', 'gpflow.training.monitor']
+
+
+def measure():
+    output = subprocess.check_output([sys.executable, '-c', SCRIPT])
+    return json.loads(output.decode().strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args()
+
+    results = [measure() for _ in range(args.repeats)]
+    total = min(r['total'] for r in results)
+    gpflow_time = min(r['total'] - r['tensorflow'] for r in results)
+    print('{:>24} {:>10.3f}'.format('import gpflow [s]', total))
+    print('{:>24} {:>10.3f}'.format('without tensorflow [s]', gpflow_time))
+    loaded = [name for name in OPTIONAL_MODULES if name in results[0]['modules']]
+    print('{:>24} {}'.format('optional modules loaded', ', '.join(loaded) or '-'))
+
+
+if __name__ == '__main__':
+    main()
@@ -31,13 +31,20 @@ from . import kernels
 from . import priors
 from . import core
 from . import models
-from . import test_util
 from . import training as train
 from . import features
-from . import expectations
 from . import probability_distributions
+from . import krylov
+
+# Subsystems with heavy dependencies, which most programs do not need, are
+# imported at their first use. These are expectations (multipledispatch) and
+# test utilities (pytest), while pandas and h5py are imported by the functions
+# which need them, e.g. `as_pandas_table`, `HMC.sample` and `Saver`.
+expectations = misc.LazyModule('gpflow.expectations')
+test_util = misc.LazyModule('gpflow.test_util')
 
 from .decors import autoflow
+from .decors import autoflow_callable
 from .decors import defer_build
 from .decors import name_scope
 from .decors import params_as_tensors
@@ -50,6 +57,7 @@ from .params import Parameter as Param
 from .params import ParamList
 from .params import DataHolder
 from .params import Minibatch
+from .params import IndexedMinibatch
 from .params import Parameterized
 from .saver import Saver
 from .saver import SaverContext
@@ -18,12 +18,11 @@ import tensorflow as tf
 from . import settings, mean_functions
 from .decors import name_scope
 from .features import InducingPoints
-from .expectations import expectation
 from .probability_distributions import Gaussian
 
 
 @name_scope()
-def conditional(Xnew, X, kern, f, *, full_cov=False, q_sqrt=None, white=False):
+def conditional(Xnew, X, kern, f, *, full_cov=False, q_sqrt=None, q_factor=None, white=False):
     """
     Given f, representing the GP at the points X, produce the mean and
     (co-)variance of the GP at the points Xnew.
@@ -52,6 +51,9 @@ def conditional(Xnew, X, kern, f, *, full_cov=False, q_sqrt=None, white=False):
         for K functions.
     :param q_sqrt: matrix of standard-deviations or Cholesky matrices,
         size M x K or K x M x M.
+    :param q_factor: None or low-rank factors U, size K x M x r. The
+        covariance of f is then diag(q_sqrt²) + U Uᵀ, which requires q_sqrt
+        to be M x K.
     :param white: boolean of whether to use the whitened representation as
         described above.
 
@@ -64,22 +66,32 @@ def conditional(Xnew, X, kern, f, *, full_cov=False, q_sqrt=None, white=False):
         Knn = kern.K(Xnew)
     else:
         Knn = kern.Kdiag(Xnew)
-    return base_conditional(Kmn, Kmm, Knn, f, full_cov=full_cov, q_sqrt=q_sqrt, white=white)
+    return base_conditional(Kmn, Kmm, Knn, f, full_cov=full_cov, q_sqrt=q_sqrt, q_factor=q_factor,
+                            white=white)
 
 
 @name_scope()
-def feature_conditional(Xnew, feat, kern, f, *, full_cov=False, q_sqrt=None, white=False):
+def feature_conditional(Xnew, feat, kern, f, *, full_cov=False, q_sqrt=None, q_factor=None,
+                        white=False):
     Kmm = feat.Kuu(kern, jitter=settings.numerics.jitter_level)
     Kmn = feat.Kuf(kern, Xnew)
     if full_cov:
         Knn = kern.K(Xnew)
     else:
         Knn = kern.Kdiag(Xnew)
-    return base_conditional(Kmn, Kmm, Knn, f, full_cov=full_cov, q_sqrt=q_sqrt, white=white)
+    return base_conditional(Kmn, Kmm, Knn, f, full_cov=full_cov, q_sqrt=q_sqrt, q_factor=q_factor,
+                            white=white)
 
 
 @name_scope()
-def base_conditional(Kmn, Kmm, Knn, f, *, full_cov=False, q_sqrt=None, white=False):
+def base_conditional(Kmn, Kmm, Knn, f, *, full_cov=False, q_sqrt=None, q_factor=None, white=False):
+    """
+    Computes the conditional of K independent GPs which share the kernel
+    matrices Kmm, Kmn and Knn. The shared terms are computed once and
+    combined with the K outputs by broadcasting and batched matrix products,
+    so no K copies of M x N matrices are made. With low-rank factors
+    `q_factor` of rank r, the marginal variances cost O(KMrN).
+    """
     # compute kernel stuff
     num_func = tf.shape(f)[1]  # K
     Lm = tf.cholesky(Kmm)
@@ -87,14 +99,11 @@ def base_conditional(Kmn, Kmm, Knn, f, *, full_cov=False, q_sqrt=None, white=Fal
     # Compute the projection matrix A
     A = tf.matrix_triangular_solve(Lm, Kmn, lower=True)
 
-    # compute the covariance due to the conditioning
+    # compute the covariance due to the conditioning, shared by all outputs
     if full_cov:
-        fvar = Knn - tf.matmul(A, A, transpose_a=True)
-        shape = tf.stack([num_func, 1, 1])
+        fvar = Knn - tf.matmul(A, A, transpose_a=True)  # N x N
     else:
-        fvar = Knn - tf.reduce_sum(tf.square(A), 0)
-        shape = tf.stack([num_func, 1])
-    fvar = tf.tile(tf.expand_dims(fvar, 0), shape)  # K x N x N or K x N
+        fvar = Knn - tf.reduce_sum(tf.square(A), 0)  # N
 
     # another backsubstitution in the unwhitened case
     if not white:
@@ -103,16 +112,33 @@ def base_conditional(Kmn, Kmm, Knn, f, *, full_cov=False, q_sqrt=None, white=Fal
     # construct the conditional mean
     fmean = tf.matmul(A, f, transpose_a=True)
 
-    if q_sqrt is not None:
-        if q_sqrt.get_shape().ndims == 2:
-            LTA = A * tf.expand_dims(tf.transpose(q_sqrt), 2)  # K x M x N
-        elif q_sqrt.get_shape().ndims == 3:
-            L = tf.matrix_band_part(q_sqrt, -1, 0)  # K x M x M
-            A_tiled = tf.tile(tf.expand_dims(A, 0), tf.stack([num_func, 1, 1]))
-            LTA = tf.matmul(L, A_tiled, transpose_a=True)  # K x M x N
-        else:  # pragma: no cover
-            raise ValueError("Bad dimension for q_sqrt: %s" %
-                             str(q_sqrt.get_shape().ndims))
+    if q_sqrt is None:
+        shape = tf.stack([1, 1, num_func]) if full_cov else tf.stack([1, num_func])
+        return fmean, tf.tile(tf.expand_dims(fvar, -1), shape)  # N x N x K or N x K
+
+    if q_sqrt.get_shape().ndims == 2:
+        if full_cov:
+            # A^T diag(q_k^2) A one output at a time, the outputs share A
+            def output_cov(q_square):
+                return tf.matmul(A * tf.expand_dims(q_square, 1), A, transpose_a=True)  # N x N
+            fvar = fvar + tf.map_fn(output_cov, tf.transpose(tf.square(q_sqrt)))  # K x N x N
+            LTAs = []
+        else:
+            # sum_m A_mn^2 q_mk^2 as a single K x N matrix product
+            fvar = fvar + tf.matmul(tf.square(q_sqrt), tf.square(A), transpose_a=True)
+            LTAs = []
+    elif q_sqrt.get_shape().ndims == 3 and q_factor is None:
+        L = tf.matrix_band_part(q_sqrt, -1, 0)  # K x M x M
+        LTAs = [tf.tensordot(L, A, [[1], [0]])]  # K x M x N, L_k^T A for all k at once
+    elif q_sqrt.get_shape().ndims == 3:
+        raise ValueError("q_factor requires a diagonal q_sqrt of size M x K, "
+                         "got a full q_sqrt of size K x M x M.")
+    else:  # pragma: no cover
+        raise ValueError("Bad dimension for q_sqrt: %s" %
+                         str(q_sqrt.get_shape().ndims))
+    if q_factor is not None:
+        LTAs.append(tf.tensordot(q_factor, A, [[1], [0]]))  # K x r x N
+    for LTA in LTAs:
         if full_cov:
             fvar = fvar + tf.matmul(LTA, LTA, transpose_a=True)  # K x N x N
         else:
@@ -159,6 +185,7 @@ def uncertain_conditional(Xnew_mu, Xnew_var, feat, kern, q_mu, q_sqrt, *,
         # This is not implemented as this feature is only used for plotting purposes.
         raise NotImplementedError
 
+    from .expectations import expectation
     pXnew = Gaussian(Xnew_mu, Xnew_var)
 
     num_data = tf.shape(Xnew_mu)[0]  # number of new inputs (N)
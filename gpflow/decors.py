@@ -146,8 +146,7 @@ def params_as_tensors_for(*objs, convert=True):
 
 def autoflow(*af_args, **af_kwargs):
     def autoflow_wrapper_decorator(method):
-        @functools.wraps(method)
-        def autoflow_wrapper(obj, *args, **kwargs):
+        def autoflow_store(obj, session=None):
             if not isinstance(obj, Node):
                 raise GPflowError(
                     'AutoFlow works only with node-like objects.')
@@ -155,7 +154,6 @@ def autoflow(*af_args, **af_kwargs):
                 raise GPflowError('Not built with "{graph}".'.format(graph=obj.graph))
             name = method.__name__
             store = AutoFlow.get_autoflow(obj, name)
-            session = kwargs.pop('session', None)
             session = obj.enquire_session(session=session)
 
             scope_name = _name_scope_name(obj, name)
@@ -163,11 +161,61 @@ def autoflow(*af_args, **af_kwargs):
                 if not store:
                     _setup_storage(store, *af_args, **af_kwargs)
                     _build_method(method, obj, store)
+            return session, store
+
+        @functools.wraps(method)
+        def autoflow_wrapper(obj, *args, **kwargs):
+            session, store = autoflow_store(obj, kwargs.pop('session', None))
+            with session.graph.as_default(), tf.name_scope(_name_scope_name(obj, method.__name__)):
                 return _session_run(session, obj, store, *args, **kwargs)
+        autoflow_wrapper.autoflow_store = autoflow_store
         return autoflow_wrapper
     return autoflow_wrapper_decorator
 
 
+def autoflow_callable(method, session=None):
+    """
+    Turns an autoflow method bound to a GPflow object into a function of the
+    method's arguments, which is a `session.make_callable` handle. The
+    tensors of the method are built, the object is initialized and its feeds
+    are resolved once here, therefore every call of the returned function
+    is a single call into the TensorFlow runtime, without the feed
+    dictionary, initialization checks and fetch parsing of autoflow calls.
+
+    ```
+    predict_f = gpflow.autoflow_callable(m.predict_f)
+    mean, var = predict_f(Xnew)
+    ```
+
+    Parameters assigned through the GPflow interface later are seen by the
+    handle, as their variables are updated in the session. The handle must
+    be recreated if the object is recompiled or its feeds change, e.g. a
+    data holder fed by a placeholder.
+
+    :param method: Autoflow method bound to a node-like object, e.g.
+        `m.predict_f`.
+    :param session: TensorFlow session or None.
+    :return: Function of the method's arguments returning the method's results.
+    :raises: GPflowError exception if `method` is not a bound autoflow method.
+    """
+    obj = getattr(method, '__self__', None)
+    autoflow_store = getattr(getattr(method, '__func__', None), 'autoflow_store', None)
+    if obj is None or autoflow_store is None:
+        raise GPflowError('Autoflow method bound to an object expected.')
+    session, store = autoflow_store(obj, session)
+    with session.graph.as_default():
+        obj.initialize(session=session)
+        feeds = obj.feeds or {}
+        handle = session.make_callable(store['result'],
+                                       feed_list=store['arguments'] + list(feeds.keys()))
+    feed_values = list(feeds.values())
+
+    @functools.wraps(method)
+    def autoflow_callable_wrapper(*args):
+        return handle(*args, *feed_values)
+    return autoflow_callable_wrapper
+
+
 def _params_as_tensors_enter(obj, convert=True):
     name = TensorConverter.__tensor_mode__
     attr_value = getattr(obj, name, None)
@@ -143,7 +143,7 @@ class Multiscale(InducingPoints):
 
 
 @singledispatch
-def conditional(feat, kern, Xnew, f, *, full_cov=False, q_sqrt=None, white=False):
+def conditional(feat, kern, Xnew, f, *, full_cov=False, q_sqrt=None, q_factor=None, white=False):
     """
     Note the changed function signature compared to conditionals.conditional()
     to allow for single dispatch on the first argument.
@@ -153,7 +153,8 @@ def conditional(feat, kern, Xnew, f, *, full_cov=False, q_sqrt=None, white=False
 
 @conditional.register(InducingPoints)
 @conditional.register(Multiscale)
-def default_feature_conditional(feat, kern, Xnew, f, *, full_cov=False, q_sqrt=None, white=False):
+def default_feature_conditional(feat, kern, Xnew, f, *, full_cov=False, q_sqrt=None, q_factor=None,
+                                white=False):
     """
     Uses the same code path as conditionals.conditional(), except Kuu/Kuf
     matrices are constructed using the feature.
@@ -163,7 +164,7 @@ def default_feature_conditional(feat, kern, Xnew, f, *, full_cov=False, q_sqrt=N
     ...             gpflow.features.default_feature_conditional)
     """
     return conditionals.feature_conditional(Xnew, feat, kern, f, full_cov=full_cov, q_sqrt=q_sqrt,
-                                            white=white)
+                                            q_factor=q_factor, white=white)
 
 
 def inducingpoint_wrapper(feat, Z):
@@ -183,3 +184,27 @@ def inducingpoint_wrapper(feat, Z):
     else:
         assert isinstance(feat, InducingFeature)  # pragma: no cover
     return feat
+
+
+def select_inducing_points(kern, X, num_inducing, session=None):
+    """
+    Selects `num_inducing` rows of X as inducing points by the greedy
+    pivoted Cholesky factorisation of K(X, X), i.e. each point is the one
+    with the largest variance conditioned on the points selected before.
+    This costs O(N M²) and usually gives a much better initial Z than a
+    random subset.
+
+    :param kern: Kernel.
+    :param X: Inputs, N x D.
+    :param num_inducing: Number of inducing points M, at most N.
+    :param session: TensorFlow session or None.
+    :return: Tuple of the inducing points Z (M x D) and the low-rank factor
+        L (N x M) with K(X, X) ≈ L Lᵀ, which can be reused as a
+        preconditioner, see `krylov.low_rank_preconditioner`.
+    """
+    X = np.asarray(X, dtype=settings.float_type)
+    if not 0 < num_inducing <= X.shape[0]:
+        raise ValueError('Number of inducing points must be between 1 and {}, '
+                         'got {}.'.format(X.shape[0], num_inducing))
+    pivots, L = kern.compute_pivoted_cholesky(X, num_inducing, session=session)
+    return X[pivots], L
@@ -22,6 +22,7 @@ import numpy as np
 
 from . import transforms
 from . import settings
+from . import krylov
 
 from .params import Parameter, Parameterized, ParamList
 from .decors import params_as_tensors, autoflow
@@ -99,6 +100,10 @@ class Kernel(Parameterized):
     def compute_Kdiag(self, X):
         return self.Kdiag(X)
 
+    @autoflow((settings.float_type, [None, None]), (tf.int32, []))
+    def compute_pivoted_cholesky(self, X, rank):
+        return krylov.pivoted_cholesky(self, X, rank)
+
     def on_separate_dims(self, other_kernel):
         """
         Checks if the dimensions, over which the kernels are specified, overlap.
@@ -300,12 +305,62 @@ class Stationary(Kernel):
     def Kdiag(self, X, presliced=False):
         return tf.fill(tf.stack([tf.shape(X)[0]]), tf.squeeze(self.variance))
 
+    def spectral_frequencies(self, num_features, random_state=None):
+        """
+        Draws frequencies from the normalised spectral density of the kernel
+        with unit lengthscales, i.e. by Bochner's theorem
+        k(x, x') = σ² E[cos(ωᵀ(x - x')/ℓ)]. Parameters of the spectral
+        density, e.g. α of the rational quadratic kernel, are taken at their
+        current values.
+
+        :param num_features: Number of frequencies F.
+        :param random_state: None or numpy RandomState.
+        :return: input_dim x F numpy array.
+        """
+        raise NotImplementedError('Spectral density of "{}" kernel is not available.'
+                                  .format(self.__class__.__name__))
+
+    @params_as_tensors
+    def random_features(self, X, frequencies, phases, presliced=False):
+        """
+        Random Fourier features φ(X) = sqrt(2σ²/F) cos(X/ℓ ω + b), such that
+        E[φ(x)ᵀφ(x')] = k(x, x') for frequencies ω drawn with
+        `spectral_frequencies` and phases b drawn uniformly from [0, 2π).
+        The features are differentiable with respect to σ² and ℓ.
+
+        :param X: Inputs, N x D.
+        :param frequencies: Frequencies ω, input_dim x F.
+        :param phases: Phases b, F.
+        :return: N x F tensor.
+        """
+        if not presliced:
+            X, _ = self._slice(X, None)
+        num_features = tf.cast(tf.shape(frequencies)[1], settings.float_type)
+        projection = tf.matmul(X / self.lengthscales, frequencies) + phases
+        return tf.sqrt(2. * self.variance / num_features) * tf.cos(projection)
+
+    def _gaussian_frequencies(self, num_features, random_state):
+        random_state = random_state or np.random
+        return random_state.randn(self.input_dim, num_features).astype(settings.float_type)
+
+    def _student_t_frequencies(self, num_features, nu, random_state):
+        """
+        Frequencies of the Matérn kernel with smoothness `nu`, which follow
+        the multivariate Student's t distribution with 2ν degrees of freedom.
+        """
+        random_state = random_state or np.random
+        gamma = random_state.gamma(nu, size=num_features)
+        return self._gaussian_frequencies(num_features, random_state) * np.sqrt(nu / gamma)
+
 
 class RBF(Stationary):
     """
     The radial basis function (RBF) or squared exponential kernel
     """
 
+    def spectral_frequencies(self, num_features, random_state=None):
+        return self._gaussian_frequencies(num_features, random_state)
+
     @params_as_tensors
     def K(self, X, X2=None, presliced=False):
         if not presliced:
@@ -334,6 +389,16 @@ class RationalQuadratic(Stationary):
         self.alpha = Parameter(alpha, transform=transforms.positive,
                                dtype=settings.float_type)
 
+    def spectral_frequencies(self, num_features, random_state=None):
+        """
+        The kernel is a scale mixture of RBF kernels, ω ~ N(0, τI) with the
+        precision τ ~ Gamma(α, α).
+        """
+        random_state = random_state or np.random
+        alpha = self.alpha.read_value()
+        tau = random_state.gamma(alpha, size=num_features) / alpha
+        return self._gaussian_frequencies(num_features, random_state) * np.sqrt(tau)
+
     @params_as_tensors
     def K(self, X, X2=None, presliced=False):
         if not presliced:
@@ -417,6 +482,9 @@ class Exponential(Stationary):
     The Exponential kernel
     """
 
+    def spectral_frequencies(self, num_features, random_state=None):
+        return 0.5 * self._student_t_frequencies(num_features, 0.5, random_state)
+
     @params_as_tensors
     def K(self, X, X2=None, presliced=False):
         if not presliced:
@@ -430,6 +498,9 @@ class Matern12(Stationary):
     The Matern 1/2 kernel
     """
 
+    def spectral_frequencies(self, num_features, random_state=None):
+        return self._student_t_frequencies(num_features, 0.5, random_state)
+
     @params_as_tensors
     def K(self, X, X2=None, presliced=False):
         if not presliced:
@@ -443,6 +514,9 @@ class Matern32(Stationary):
     The Matern 3/2 kernel
     """
 
+    def spectral_frequencies(self, num_features, random_state=None):
+        return self._student_t_frequencies(num_features, 1.5, random_state)
+
     @params_as_tensors
     def K(self, X, X2=None, presliced=False):
         if not presliced:
@@ -457,6 +531,9 @@ class Matern52(Stationary):
     The Matern 5/2 kernel
     """
 
+    def spectral_frequencies(self, num_features, random_state=None):
+        return self._student_t_frequencies(num_features, 2.5, random_state)
+
     @params_as_tensors
     def K(self, X, X2=None, presliced=False):
         if not presliced:
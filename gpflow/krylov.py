@@ -0,0 +1,224 @@
+# Copyright 2018 the GPflow authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Krylov subspace methods for symmetric positive definite matrices which are
+only available through matrix-vector products. The matrix is passed as an
+`operator`, a function which maps an N x C tensor V to A V. The module also
+provides the pivoted Cholesky factorisation of kernel matrices, which gives
+low-rank preconditioners for these methods.
+"""
+
+import tensorflow as tf
+
+from . import settings
+
+
+def conjugate_gradient(operator, rhs, max_iter, tolerance=1e-6, preconditioner=None):
+    """
+    Solves A X = B with the (preconditioned) conjugate gradient method,
+    all columns of B are solved simultaneously. Iterations stop when the
+    residual norm of every column is below `tolerance` times the norm of
+    the right hand side or after `max_iter` iterations.
+
+    The solution is not differentiable, use it inside `tf.stop_gradient`
+    and express the gradients through A directly.
+
+    :param operator: Function computing A V.
+    :param rhs: Right hand side B, N x C.
+    :param max_iter: Maximum number of iterations.
+    :param tolerance: Relative residual tolerance.
+    :param preconditioner: None or function computing P⁻¹ V for a
+        preconditioner P ≈ A.
+    :return: N x C tensor.
+    """
+    precondition = preconditioner or (lambda V: V)
+    operator, precondition = _keep_shape(operator), _keep_shape(precondition)
+    rhs_norm = tf.sqrt(tf.reduce_sum(tf.square(rhs), 0))
+    Z = precondition(rhs)
+    init = [tf.constant(0, dtype=tf.int32), tf.zeros_like(rhs), rhs, Z, tf.reduce_sum(rhs * Z, 0)]
+
+    def cond(i, X, R, P, rz):
+        residual = tf.sqrt(tf.reduce_sum(tf.square(R), 0))
+        return tf.logical_and(i < max_iter, tf.reduce_any(residual > tolerance * rhs_norm))
+
+    def body(i, X, R, P, rz):
+        AP = operator(P)
+        alpha = _safe_divide(rz, tf.reduce_sum(P * AP, 0))
+        X = X + alpha * P
+        R = R - alpha * AP
+        Z = precondition(R)
+        rz_new = tf.reduce_sum(R * Z, 0)
+        P = Z + _safe_divide(rz_new, rz) * P
+        return i + 1, X, R, P, rz_new
+
+    _, X, _, _, _ = tf.while_loop(cond, body, init, back_prop=False)
+    return X
+
+
+def lanczos(operator, start, num_iter):
+    """
+    Runs `num_iter` steps of the Lanczos process with full
+    reorthogonalisation, A Q ≈ Q T with orthonormal Q and tridiagonal T.
+    When the Krylov subspace becomes invariant, the process continues from
+    a random direction orthogonal to Q and T becomes block diagonal. The
+    number of iterations must be smaller than the size of A.
+
+    :param operator: Function computing A V.
+    :param start: Start vector, N x 1.
+    :param num_iter: Number of iterations k, integer.
+    :return: Tuple of Q (N x k) and T (k x k).
+    """
+    num_data = tf.shape(start)[0]
+    operator = _keep_shape(operator)
+    q = start / tf.sqrt(tf.reduce_sum(tf.square(start)))
+    Q = tf.zeros(tf.stack([num_iter, num_data]), dtype=settings.float_type)
+    zeros = tf.zeros([num_iter], dtype=settings.float_type)
+    init = [tf.constant(0, dtype=tf.int32), q, Q, zeros, zeros]
+
+    def body(j, q, Q, alphas, betas):
+        mask = tf.one_hot(j, num_iter, dtype=settings.float_type)
+        Q = Q + tf.expand_dims(mask, 1) * tf.transpose(q)
+        v = operator(q)
+        alpha = tf.reduce_sum(q * v)
+        scale = tf.sqrt(tf.reduce_sum(tf.square(v)))
+        v = _orthogonalise(v, Q)
+        beta = tf.sqrt(tf.reduce_sum(tf.square(v)))
+        # the Krylov subspace is invariant, continue with a new direction
+        breakdown = beta <= settings.numerics.jitter_level * scale
+        restart = _orthogonalise(tf.random_normal(tf.shape(v), dtype=settings.float_type), Q)
+        v = tf.where(breakdown, restart, v)
+        beta = tf.where(breakdown, tf.zeros_like(beta), beta)
+        q = v / tf.sqrt(tf.reduce_sum(tf.square(v)))
+        return j + 1, q, Q, alphas + mask * alpha, betas + mask * beta
+
+    _, _, Q, alphas, betas = tf.while_loop(
+        lambda j, *_: j < num_iter, body, init, back_prop=False)
+    off_diagonal = tf.matrix_diag(betas[:-1])
+    T = (tf.matrix_diag(alphas) + tf.pad(off_diagonal, [[0, 1], [1, 0]])
+         + tf.pad(off_diagonal, [[1, 0], [0, 1]]))
+    return tf.transpose(Q), T
+
+
+def pivoted_cholesky(kern, X, rank):
+    """
+    Computes the greedy pivoted Cholesky factorisation K(X, X) ≈ L Lᵀ of
+    the given rank. Each step picks the point with the largest conditional
+    variance given the previous pivots, so the pivots are a good set of
+    inducing points, and only evaluates the kernel column of that point.
+    The cost is O(N rank²) time and O(N rank) memory.
+
+    :param kern: Kernel.
+    :param X: Inputs, N x D.
+    :param rank: Number of pivots M, at most N.
+    :return: Tuple of the pivot indices (M,) and L (N x M). The rows of L at
+        the pivots form a lower triangular matrix.
+    """
+    num_data = tf.shape(X)[0]
+    L = tf.zeros(tf.stack([rank, num_data]), dtype=settings.float_type)
+    pivots = tf.zeros(tf.reshape(rank, [1]), dtype=tf.int32)
+    init = [tf.constant(0, dtype=tf.int32), kern.Kdiag(X), L, pivots]
+
+    def body(j, variance, L, pivots):
+        pivot = tf.cast(tf.argmax(variance, 0), tf.int32)
+        column = kern.K(X, X[pivot:pivot + 1])[:, 0]
+        column -= tf.matmul(L, L[:, pivot:pivot + 1], transpose_a=True)[:, 0]
+        column /= tf.sqrt(tf.maximum(variance[pivot], settings.numerics.jitter_level))
+        mask = tf.one_hot(j, rank, dtype=settings.float_type)
+        L = L + tf.expand_dims(mask, 1) * tf.expand_dims(column, 0)
+        pivots = pivots + tf.one_hot(j, rank, dtype=tf.int32) * pivot
+        new_variance = variance - tf.square(column)
+        new_variance.set_shape(variance.get_shape())
+        L.set_shape(init[2].get_shape())
+        return j + 1, new_variance, L, pivots
+
+    _, _, L, pivots = tf.while_loop(lambda j, *_: j < rank, body, init, back_prop=False)
+    return pivots, tf.transpose(L)
+
+
+def low_rank_preconditioner(L, variance):
+    """
+    Returns the function computing P⁻¹V for P = L Lᵀ + σ²I by the Woodbury
+    identity, P⁻¹V = (V - L (σ²I + LᵀL)⁻¹ LᵀV) / σ², in O(NM) per column.
+
+    :param L: Low-rank factor, N x M, e.g. from `pivoted_cholesky`.
+    :param variance: Scalar σ².
+    """
+    rank = tf.shape(L)[1]
+    C = tf.matmul(L, L, transpose_a=True) + variance * tf.eye(rank, dtype=settings.float_type)
+    LC = tf.cholesky(C)
+
+    def preconditioner(V):
+        LtV = tf.matmul(L, V, transpose_a=True)
+        return (V - tf.matmul(L, tf.cholesky_solve(LC, LtV))) / variance
+    return preconditioner
+
+
+def _keep_shape(operator):
+    """
+    Wraps `operator` so that A V has the static shape of V, which the loop
+    variables of `tf.while_loop` need when A V is computed in a loop.
+    """
+    def wrapped(V):
+        AV = operator(V)
+        AV.set_shape(V.get_shape())
+        return AV
+    return wrapped
+
+
+def _orthogonalise(v, Q):
+    """
+    Removes the components of v in the row space of Q, twice for stability.
+    """
+    for _ in range(2):
+        v = v - tf.matmul(Q, tf.matmul(Q, v), transpose_a=True)
+    return v
+
+
+def _safe_divide(numerator, denominator):
+    """
+    Elementwise division which returns zero where the denominator is zero,
+    i.e. for columns which have already converged.
+    """
+    zero = tf.equal(denominator, 0.)
+    safe = tf.where(zero, tf.ones_like(denominator), denominator)
+    return tf.where(zero, tf.zeros_like(numerator), numerator / safe)
+
+
+def stochastic_logdet(operator, probes, num_iter):
+    """
+    Estimates log |A| by stochastic Lanczos quadrature,
+
+        log |A| = tr(log A) ≈ 1/S Σ_s z_sᵀ log(A) z_s,
+
+    where each quadratic form is approximated by ||z_s||² e₁ᵀ log(T_s) e₁
+    for the tridiagonal matrix T_s of `num_iter` Lanczos steps started at
+    z_s. The estimate is unbiased in the probes for E[zzᵀ] = I, e.g.
+    Rademacher vectors, up to the quadrature error.
+
+    :param operator: Function computing A V.
+    :param probes: Probe vectors z_s, N x S.
+    :param num_iter: Number of Lanczos iterations per probe.
+    :return: Scalar estimate of log |A|.
+    """
+    def quadrature(probe):
+        probe = tf.expand_dims(probe, 1)
+        _, T = lanczos(operator, probe, num_iter)
+        eigvals, eigvecs = tf.self_adjoint_eig(T)
+        eigvals = tf.maximum(eigvals, settings.numerics.jitter_level)
+        weights = tf.square(eigvecs[0, :])
+        return tf.reduce_sum(tf.square(probe)) * tf.reduce_sum(weights * tf.log(eigvals))
+
+    estimates = tf.map_fn(quadrature, tf.transpose(probes), back_prop=False)
+    return tf.reduce_mean(estimates)
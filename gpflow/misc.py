@@ -13,9 +13,11 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import importlib
+import types
+
 import tensorflow as tf
 import numpy as np
-import pandas as pd
 from collections import OrderedDict
 
 from . import settings
@@ -27,6 +29,7 @@ __GLOBAL_VARIABLES = tf.GraphKeys.GLOBAL_VARIABLES
 
 
 def pretty_pandas_table(row_names, column_names, column_values):
+    import pandas as pd
     return pd.DataFrame(
         OrderedDict(zip(column_names, column_values)),
         index=row_names)
@@ -162,6 +165,50 @@ def vec_to_tri(vectors, N):
     return tf.map_fn(vec_to_tri_vector, vectors)
 
 
+def chunked_gradients(objective, num_chunks, xs):
+    """
+    Computes the gradients Σᵢ ∂objective(i)/∂x of a sum over chunks for all
+    tensors x in `xs`. The gradient of each chunk is taken inside a loop
+    without back propagation, so that only the intermediate values of a
+    single chunk are held in memory, not those of all chunks.
+
+    :param objective: Function of the chunk index, an int32 scalar tensor,
+        which returns a scalar tensor.
+    :param num_chunks: Number of chunks, int32 scalar.
+    :param xs: List of tensors, defined outside of `objective`.
+    :return: List of gradients of the same shapes as `xs`.
+    """
+    if not xs:
+        return []
+
+    def body(i, *grads):
+        # tf.gradients with respect to xs would also visit other loops which
+        # depend on xs, e.g. solves held constant by tf.stop_gradient, and
+        # fails inside a loop. The tensors of xs entering this loop do not.
+        inner_xs = [tf.identity(x).op.inputs[0] for x in xs]
+        chunk_grads = tf.gradients(objective(i), inner_xs)
+        return [i + 1] + [grad if chunk_grad is None else grad + tf.convert_to_tensor(chunk_grad)
+                          for grad, chunk_grad in zip(grads, chunk_grads)]
+
+    init = [tf.constant(0, dtype=tf.int32)] + [tf.zeros_like(x) for x in xs]
+    results = tf.while_loop(lambda i, *_: i < num_chunks, body, init,
+                            back_prop=False, swap_memory=True)
+    return results[1:]
+
+
+def attach_gradients(xs, grads):
+    """
+    Returns a scalar tensor of value zero whose gradients with respect to the
+    tensors `xs` are `grads`. Adding it to an objective computed without
+    gradients, e.g. with `chunked_gradients`, supplies these gradients to
+    the optimisers.
+    """
+    if not xs:
+        return tf.constant(0, dtype=settings.float_type)
+    surrogate = tf.add_n([tf.reduce_sum(tf.stop_gradient(grad) * x) for x, grad in zip(xs, grads)])
+    return surrogate - tf.stop_gradient(surrogate)
+
+
 def initialize_variables(variables=None, session=None, force=False, **run_kwargs):
     session = tf.get_default_session() if session is None else session
     if variables is None:
@@ -253,3 +300,18 @@ def _get_tensor_safe(name, index, graph):
 
 def version():
     return __version__
+
+
+class LazyModule(types.ModuleType):
+    """
+    Placeholder for the module `name`, which imports the module at the first
+    access to one of its attributes. Importing the module replaces the
+    placeholder in its parent package, e.g. `gpflow.expectations` is the
+    module itself after `from gpflow.expectations import expectation`.
+    """
+
+    def __getattr__(self, name):
+        return getattr(importlib.import_module(self.__name__), name)
+
+    def __dir__(self):
+        return dir(importlib.import_module(self.__name__))
@@ -16,7 +16,16 @@
 
 from .model import Model
 from .model import GPModel
+from .posterior import Posterior
+from .serving import PredictionServer
+from .export import Predictor
+from .numpy_predictor import NumpyPredictor
+from .pathwise import FunctionSamples
 from .gpr import GPR
+from .rfgpr import RandomFeatureGPR
+from .kronecker import GPRKronecker
+from .kiss import KISSGPR
+from .iterative import IterativeGPR
 from .gpmc import GPMC
 from .gplvm import GPLVM
 from .gplvm import BayesianGPLVM
@@ -25,6 +34,7 @@ from .sgpmc import SGPMC
 from .sgpr import SGPRUpperMixin
 from .sgpr import SGPR
 from .sgpr import GPRFITC
+from .sgpr import StreamingSGPR
 from .svgp import SVGP
 from .vgp import VGP
 from .vgp import VGP_opper_archambeau
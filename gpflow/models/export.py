@@ -0,0 +1,241 @@
+# Copyright 2018 the GPflow authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import tensorflow as tf
+
+from .. import kernels
+from .. import likelihoods
+from .. import mean_functions
+from ..core.errors import GPflowError
+from .numpy_predictor import NumpyPredictor
+
+
+_INPUT_NAMES = {
+    'predict_f': ['Xnew'],
+    'predict_f_full_cov': ['Xnew'],
+    'predict_y': ['Xnew'],
+    'predict_density': ['Xnew', 'Ynew'],
+}
+
+_OUTPUT_NAMES = {
+    'predict_f': ['mean', 'var'],
+    'predict_f_full_cov': ['mean', 'cov'],
+    'predict_y': ['mean', 'var'],
+    'predict_density': ['log_density'],
+}
+
+
+def export_predictor(model, path, methods=('predict_f', 'predict_y'), session=None):
+    """
+    Writes the prediction methods of the model as a SavedModel with a frozen
+    graph to the directory `path`, which must not exist. The methods are
+    built from the cached posterior terms of the model, see `Posterior`,
+    and all variables are replaced by constants. Parameters enter the graph
+    as constants of their constrained values, so neither transforms nor
+    priors are exported, and the training data appear only as far as the
+    cached predictor needs them.
+
+    Each method is a signature of the SavedModel with the method's name,
+    the inputs `Xnew` (and `Ynew`) and the outputs `mean` and `var`, `cov`
+    or `log_density`. It can be loaded by `Predictor` or any SavedModel
+    consumer, e.g. TensorFlow Serving.
+
+    :param model: GPModel with posterior caching support.
+    :param path: Export directory.
+    :param methods: Names of the methods, out of 'predict_f',
+        'predict_f_full_cov', 'predict_y' and 'predict_density'.
+    :param session: TensorFlow session or None.
+    :raises: ValueError exception if a method is not supported.
+    """
+    unknown = [name for name in methods if name not in _INPUT_NAMES]
+    if unknown or not methods:
+        raise ValueError('Unsupported prediction methods {}, choose from {}.'
+                         .format(unknown, sorted(_INPUT_NAMES)))
+    posterior = model.posterior()
+    session = posterior._prepare(model.enquire_session(session))
+
+    signatures = {}
+    for name in methods:
+        arguments, result = posterior._get_method(name, session)
+        results = list(result) if isinstance(result, (tuple, list)) else [result]
+        signatures[name] = (arguments, results)
+    tensors = [t for arguments, results in signatures.values() for t in arguments + results]
+    output_nodes = sorted({t.op.name for t in tensors})
+
+    frozen = tf.graph_util.convert_variables_to_constants(
+        session, session.graph.as_graph_def(), output_nodes)
+    frozen_nodes = {node.name for node in frozen.node}
+    parameters = [p for p in model.parameters if p.constrained_tensor is not None
+                  and p.constrained_tensor.op.name in frozen_nodes]
+    values = session.run([p.constrained_tensor for p in parameters])
+
+    with tf.Graph().as_default() as graph:
+        # the constrained values replace the transforms of the frozen parameters
+        with tf.name_scope('parameters'):
+            constants = {p.constrained_tensor.name: tf.constant(value)
+                         for p, value in zip(parameters, values)}
+        tf.import_graph_def(frozen, input_map=constants, name='')
+        pruned = tf.graph_util.extract_sub_graph(graph.as_graph_def(), output_nodes)
+
+    with tf.Graph().as_default() as graph, tf.Session(graph=graph) as export_session:
+        tf.import_graph_def(pruned, name='')
+        signature_map = {}
+        for name, (arguments, results) in signatures.items():
+            inputs = {key: tf.saved_model.utils.build_tensor_info(graph.get_tensor_by_name(t.name))
+                      for key, t in zip(_INPUT_NAMES[name], arguments)}
+            outputs = {key: tf.saved_model.utils.build_tensor_info(graph.get_tensor_by_name(t.name))
+                       for key, t in zip(_OUTPUT_NAMES[name], results)}
+            signature_map[name] = tf.saved_model.signature_def_utils.build_signature_def(
+                inputs=inputs, outputs=outputs, method_name=name)
+        builder = tf.saved_model.builder.SavedModelBuilder(path)
+        builder.add_meta_graph_and_variables(
+            export_session, [tf.saved_model.tag_constants.SERVING],
+            signature_def_map=signature_map)
+        builder.save()
+
+
+def numpy_predictor(model, session=None):
+    """
+    Converts the cached posterior terms of the model, its kernel, mean
+    function and Gaussian likelihood into a `NumpyPredictor`. Models provide
+    the conversion of their posterior terms by `_numpy_predict_terms`, which
+    GPR, SGPR and SVGP with inducing points implement.
+
+    :param model: GPModel with NumPy prediction support.
+    :param session: TensorFlow session or None.
+    :raises: ValueError exception if the kernel or the mean function is not
+        supported by `NumpyPredictor`.
+    """
+    session = model.enquire_session(session)
+    kernel = _kernel_spec(model.kern, session)
+    mean_function = _mean_function_spec(model.mean_function, session)
+    cache = model.posterior().read_cache(session)
+    Z, mean_proj, var_proj, sqrt_proj = model._numpy_predict_terms(cache, session)
+    likelihood_variance = None
+    if type(model.likelihood) is likelihoods.Gaussian:
+        likelihood_variance = float(model.likelihood.variance.read_value(session))
+    return NumpyPredictor(kernel, mean_function, Z, mean_proj, var_proj, sqrt_proj=sqrt_proj,
+                          likelihood_variance=likelihood_variance)
+
+
+def _kernel_spec(kern, session):
+    name = type(kern).__name__
+    if type(kern) in (kernels.Sum, kernels.Product):
+        return {'type': name, 'kernels': [_kernel_spec(k, session) for k in kern.kernels]}
+    if name not in NumpyPredictor.KERNELS or type(kern) is not getattr(kernels, name):
+        raise ValueError('Kernel "{}" is not supported by NumpyPredictor.'.format(name))
+    if isinstance(kern.active_dims, slice):
+        start, step = kern.active_dims.start or 0, kern.active_dims.step or 1
+        active_dims = list(range(start, start + step * kern.input_dim, step))
+    else:
+        active_dims = [int(d) for d in kern.active_dims]
+    spec = {'type': name, 'active_dims': active_dims,
+            'variance': kern.variance.read_value(session).tolist()}
+    if isinstance(kern, kernels.Stationary):
+        spec['lengthscales'] = kern.lengthscales.read_value(session).tolist()
+    return spec
+
+
+def _mean_function_spec(mean_function, session):
+    name = type(mean_function).__name__
+    if name not in NumpyPredictor.MEAN_FUNCTIONS or \
+            type(mean_function) is not getattr(mean_functions, name):
+        raise ValueError('Mean function "{}" is not supported by NumpyPredictor.'.format(name))
+    spec = {'type': name}
+    if type(mean_function) is mean_functions.Zero:
+        spec['output_dim'] = mean_function.output_dim
+    elif type(mean_function) is mean_functions.Constant:
+        spec['c'] = mean_function.c.read_value(session).tolist()
+    elif type(mean_function) is mean_functions.Linear:
+        spec['A'] = mean_function.A.read_value(session).tolist()
+        spec['b'] = mean_function.b.read_value(session).tolist()
+    return spec
+
+
+class Predictor:
+    """
+    Predictor loads the prediction methods written by `export_predictor`
+    into a new graph and session. It needs neither the model nor its
+    parameters, and every method call is a single call into the TensorFlow
+    runtime.
+
+    ```
+    m.export_predictor('/tmp/gp', methods=['predict_f'])
+    predictor = gpflow.models.Predictor('/tmp/gp')
+    mean, var = predictor.predict_f(Xnew)
+    ```
+
+    :param path: Export directory.
+    :param config: None or `tf.ConfigProto` of the session.
+    """
+
+    def __init__(self, path, config=None):
+        self._graph = tf.Graph()
+        self._session = tf.Session(graph=self._graph, config=config)
+        meta_graph = tf.saved_model.loader.load(
+            self._session, [tf.saved_model.tag_constants.SERVING], path)
+        self._methods = {}
+        for name, signature in meta_graph.signature_def.items():
+            if name not in _INPUT_NAMES:
+                continue
+            inputs = [self._graph.get_tensor_by_name(signature.inputs[key].name)
+                      for key in _INPUT_NAMES[name]]
+            outputs = [self._graph.get_tensor_by_name(signature.outputs[key].name)
+                       for key in _OUTPUT_NAMES[name]]
+            fetches = outputs if len(outputs) > 1 else outputs[0]
+            self._methods[name] = self._session.make_callable(fetches, feed_list=inputs)
+
+    @property
+    def methods(self):
+        return sorted(self._methods)
+
+    @property
+    def session(self):
+        return self._session
+
+    def close(self):
+        self._session.close()
+
+    def predict_f(self, Xnew):
+        """
+        Compute the mean and variance of the latent function(s) at the points
+        Xnew.
+        """
+        return self._run('predict_f', Xnew)
+
+    def predict_f_full_cov(self, Xnew):
+        """
+        Compute the mean and covariance matrix of the latent function(s) at the
+        points Xnew.
+        """
+        return self._run('predict_f_full_cov', Xnew)
+
+    def predict_y(self, Xnew):
+        """
+        Compute the mean and variance of held-out data at the points Xnew.
+        """
+        return self._run('predict_y', Xnew)
+
+    def predict_density(self, Xnew, Ynew):
+        """
+        Compute the (log) density of the data Ynew at the points Xnew.
+        """
+        return self._run('predict_density', Xnew, Ynew)
+
+    def _run(self, name, *args):
+        method = self._methods.get(name)
+        if method is None:
+            raise GPflowError('Method "{}" was not exported, available methods are {}.'
+                              .format(name, self.methods))
+        return method(*args)
@@ -24,7 +24,6 @@ from .. import features
 from ..params import Parameter
 from ..decors import params_as_tensors
 from ..mean_functions import Zero
-from ..expectations import expectation
 from ..probability_distributions import DiagonalGaussian
 
 from .model import GPModel
@@ -125,6 +124,7 @@ class BayesianGPLVM(GPModel):
         Construct a tensorflow function to compute the bound on the marginal
         likelihood.
         """
+        from ..expectations import expectation
         pX = DiagonalGaussian(self.X_mean, self.X_var)
 
         num_inducing = len(self.feature)
@@ -173,13 +173,22 @@ class BayesianGPLVM(GPModel):
         there are notes in the SGPR notebook.
         :param Xnew: Point to predict at.
         """
+        return self._build_cached_predict(Xnew, self._build_predict_cache(), full_cov=full_cov)
+
+    @params_as_tensors
+    def _build_predict_cache(self):
+        """
+        Computes the terms of the predictive distribution which require the
+        psi statistics over the whole training set: the Cholesky factors
+        L of Kuu and LB of B, and c.
+        """
+        from ..expectations import expectation
         pX = DiagonalGaussian(self.X_mean, self.X_var)
 
         num_inducing = len(self.feature)
         psi1 = expectation(pX, (self.kern, self.feature))
         psi2 = tf.reduce_sum(expectation(pX, (self.kern, self.feature), (self.kern, self.feature)), axis=0)
         Kuu = self.feature.Kuu(self.kern, jitter=settings.numerics.jitter_level)
-        Kus = self.feature.Kuf(self.kern, Xnew)
         sigma2 = self.likelihood.variance
         sigma = tf.sqrt(sigma2)
         L = tf.cholesky(Kuu)
@@ -190,18 +199,28 @@ class BayesianGPLVM(GPModel):
         B = AAT + tf.eye(num_inducing, dtype=settings.float_type)
         LB = tf.cholesky(B)
         c = tf.matrix_triangular_solve(LB, tf.matmul(A, self.Y), lower=True) / sigma
+        return L, LB, c
+
+    @params_as_tensors
+    def _build_cached_predict(self, Xnew, cache, full_cov=False):
+        """
+        Computes the predictive mean and variance at Xnew from the terms
+        returned by `_build_predict_cache` in O(N*M²), independently of N.
+        """
+        L, LB, c = cache
+        Kus = self.feature.Kuf(self.kern, Xnew)
         tmp1 = tf.matrix_triangular_solve(L, Kus, lower=True)
         tmp2 = tf.matrix_triangular_solve(LB, tmp1, lower=True)
         mean = tf.matmul(tmp2, c, transpose_a=True)
         if full_cov:
             var = self.kern.K(Xnew) + tf.matmul(tmp2, tmp2, transpose_a=True) \
                   - tf.matmul(tmp1, tmp1, transpose_a=True)
-            shape = tf.stack([1, 1, tf.shape(self.Y)[1]])
+            shape = tf.stack([1, 1, tf.shape(c)[1]])
             var = tf.tile(tf.expand_dims(var, 2), shape)
         else:
             var = self.kern.Kdiag(Xnew) + tf.reduce_sum(tf.square(tmp2), 0) \
                   - tf.reduce_sum(tf.square(tmp1), 0)
-            shape = tf.stack([1, tf.shape(self.Y)[1]])
+            shape = tf.stack([1, tf.shape(c)[1]])
             var = tf.tile(tf.expand_dims(var, 1), shape)
         return mean + self.mean_function(Xnew), var
 
@@ -12,6 +12,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import numpy as np
 import tensorflow as tf
 
 from .. import likelihoods
@@ -21,8 +22,10 @@ from ..params import DataHolder
 from ..decors import params_as_tensors
 from ..decors import name_scope
 from ..logdensities import multivariate_normal
+from ..core.compilable import Build
 
 from .model import GPModel
+from .pathwise import samples_to_columns, columns_to_samples
 
 
 class GPR(GPModel):
@@ -49,6 +52,37 @@ class GPR(GPModel):
         Y = DataHolder(Y)
         GPModel.__init__(self, X, Y, kern, likelihood, mean_function, **kwargs)
 
+    def append_data(self, Xnew, Ynew, session=None):
+        """
+        Appends the observations Xnew, Ynew to the training data.
+
+        If the model is built, the cached Cholesky factor L of K + σ²I and
+        V = L⁻¹(Y - m(X)) held by the `posterior` are extended with a block
+        update instead of being recomputed, which costs O(N²k) for k new
+        points rather than O((N + k)³). Predictions made by the `posterior`
+        afterwards reuse the extended factors.
+
+        :param Xnew: New inputs, size k x D.
+        :param Ynew: New observations, size k x R.
+        :param session: TensorFlow session or None.
+        """
+        Xnew = np.atleast_2d(np.asarray(Xnew, dtype=settings.float_type))
+        Ynew = np.atleast_2d(np.asarray(Ynew, dtype=settings.float_type))
+        if Xnew.shape[0] != Ynew.shape[0]:
+            raise ValueError('Number of new inputs and observations must match, '
+                             'got {} and {}.'.format(Xnew.shape[0], Ynew.shape[0]))
+        if self.is_built_coherence() is Build.NO:
+            self.X = np.concatenate([self.X.read_value(), Xnew], axis=0)
+            self.Y = np.concatenate([self.Y.read_value(), Ynew], axis=0)
+            return
+        posterior = self.posterior()
+        session = posterior.extend([Xnew, Ynew], session=session)
+        X = np.concatenate([self.X.read_value(session), Xnew], axis=0)
+        Y = np.concatenate([self.Y.read_value(session), Ynew], axis=0)
+        self.X.assign(X, session=session)
+        self.Y.assign(Y, session=session)
+        posterior.mark_updated(session)
+
     @name_scope('likelihood')
     @params_as_tensors
     def _build_likelihood(self):
@@ -78,17 +112,85 @@ class GPR(GPModel):
         where F* are points on the GP at Xnew, Y are noisy observations at X.
 
         """
-        Kx = self.kern.K(self.X, Xnew)
+        return self._build_cached_predict(Xnew, self._build_predict_cache(), full_cov=full_cov)
+
+    @name_scope('predict_cache')
+    @params_as_tensors
+    def _build_predict_cache(self):
+        """
+        Computes the terms of the posterior which depend on the training data
+        only: the Cholesky factor L of K + σ²I and V = L⁻¹(Y - m(X)).
+        """
         K = self.kern.K(self.X) + tf.eye(tf.shape(self.X)[0], dtype=settings.float_type) * self.likelihood.variance
         L = tf.cholesky(K)
-        A = tf.matrix_triangular_solve(L, Kx, lower=True)
         V = tf.matrix_triangular_solve(L, self.Y - self.mean_function(self.X))
+        return L, V
+
+    @name_scope('predict')
+    @params_as_tensors
+    def _build_cached_predict(self, Xnew, cache, full_cov=False):
+        """
+        Computes p(F* | Y) from the terms returned by `_build_predict_cache`.
+        Given L and V, this costs O(N²N*) for the triangular solve instead of
+        the O(N³) Cholesky decomposition.
+        """
+        L, V = cache
+        Kx = self.kern.K(self.X, Xnew)
+        A = tf.matrix_triangular_solve(L, Kx, lower=True)
         fmean = tf.matmul(A, V, transpose_a=True) + self.mean_function(Xnew)
         if full_cov:
             fvar = self.kern.K(Xnew) - tf.matmul(A, A, transpose_a=True)
-            shape = tf.stack([1, 1, tf.shape(self.Y)[1]])
+            shape = tf.stack([1, 1, tf.shape(V)[1]])
             fvar = tf.tile(tf.expand_dims(fvar, 2), shape)
         else:
             fvar = self.kern.Kdiag(Xnew) - tf.reduce_sum(tf.square(A), 0)
-            fvar = tf.tile(tf.reshape(fvar, (-1, 1)), [1, tf.shape(self.Y)[1]])
+            fvar = tf.tile(tf.reshape(fvar, (-1, 1)), [1, tf.shape(V)[1]])
         return fmean, fvar
+
+    @name_scope('cache_extension')
+    @params_as_tensors
+    def _build_cache_extension(self, cache, Xnew, Ynew):
+        """
+        Extends L and V for the new observations using the block form
+
+            L' = [[L, 0], [A^T, L22]],  V' = [V; V22],
+
+        where A = L⁻¹K(X, Xnew), L22 is the Cholesky factor of
+        K(Xnew, Xnew) + σ²I - AᵀA and V22 = L22⁻¹(Ynew - m(Xnew) - AᵀV).
+        """
+        L, V = cache
+        num_new = tf.shape(Xnew)[0]
+        Kx = self.kern.K(self.X, Xnew)
+        A = tf.matrix_triangular_solve(L, Kx, lower=True)
+        K22 = self.kern.K(Xnew) + tf.eye(num_new, dtype=settings.float_type) * self.likelihood.variance
+        L22 = tf.cholesky(K22 - tf.matmul(A, A, transpose_a=True))
+        err = Ynew - self.mean_function(Xnew) - tf.matmul(A, V, transpose_a=True)
+        V22 = tf.matrix_triangular_solve(L22, err, lower=True)
+        zeros = tf.zeros(tf.stack([tf.shape(L)[0], num_new]), dtype=settings.float_type)
+        L_ext = tf.concat([tf.concat([L, zeros], 1),
+                           tf.concat([tf.transpose(A), L22], 1)], 0)
+        V_ext = tf.concat([V, V22], 0)
+        return L_ext, V_ext
+
+    @params_as_tensors
+    def _build_pathwise_update(self, prior, num_samples):
+        """
+        Computes v = (K + σ²I)⁻¹(Y - m(X) - f_prior(X) - ε) with ε ~ N(0, σ²I),
+        which turns the prior samples into exact posterior samples.
+        """
+        L, _ = self._build_predict_cache()
+        f = prior(self.X)
+        noise = tf.random_normal(tf.shape(f), dtype=settings.float_type) * tf.sqrt(self.likelihood.variance)
+        err = tf.expand_dims(self.Y - self.mean_function(self.X), 0) - f - noise
+        v = tf.cholesky_solve(L, samples_to_columns(err))
+        return columns_to_samples(v, num_samples)
+
+    @params_as_tensors
+    def _build_pathwise_basis(self, Xnew):
+        return self.kern.K(self.X, Xnew)
+
+    def _numpy_predict_terms(self, cache, session):
+        import scipy.linalg
+        L, V = cache
+        L_inv = scipy.linalg.solve_triangular(L, np.eye(len(L), dtype=L.dtype), lower=True)
+        return self.X.read_value(session), L_inv.T.dot(V), L_inv.T, None
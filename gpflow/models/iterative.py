@@ -0,0 +1,284 @@
+# Copyright 2018 the GPflow authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+import tensorflow as tf
+
+from .. import krylov
+from .. import misc
+from .. import likelihoods
+from .. import settings
+
+from ..params import DataHolder
+from ..decors import params_as_tensors
+from ..decors import name_scope
+
+from .model import GPModel
+
+
+class IterativeGPR(GPModel):
+    """
+    Exact GP regression with iterative linear algebra. Instead of the
+    Cholesky factor of K + σ²I, the model only uses products of this matrix
+    with vectors:
+
+      - solves use conjugate gradients with a diagonal or pivoted Cholesky
+        preconditioner,
+      - the log determinant is estimated by stochastic Lanczos quadrature,
+      - its gradient uses the Hutchinson estimate
+        tr((K + σ²I)⁻¹ dK) ≈ 1/S Σ_s ((K + σ²I)⁻¹z_s)ᵀ dK z_s.
+
+    The S Rademacher probe vectors z_s are drawn in the graph for the
+    current number of data points with a seed fixed at construction, so the
+    objective is deterministic and can be optimised with ScipyOptimizer,
+    also after X and Y are assigned data of a different size.
+    With `chunk_size`, kernel matrix products and their gradients are
+    computed over blocks of rows, which keeps the memory of the solves and
+    of training at O(N chunk_size) rather than O(N²).
+
+    Predictive variances use a Lanczos decomposition of K + σ²I cached by
+    the `posterior`, as in LOVE, and are approximate for `num_lanczos`
+    smaller than N.
+
+    The key references are
+
+    ::
+
+      @inproceedings{gardner2018gpytorch,
+        title={GPyTorch: Blackbox matrix-matrix Gaussian process inference
+               with GPU acceleration},
+        author={Gardner, Jacob and Pleiss, Geoff and Weinberger, Kilian and
+                Bindel, David and Wilson, Andrew Gordon},
+        booktitle={Advances in Neural Information Processing Systems},
+        pages={7576--7586},
+        year={2018}
+      }
+
+      @article{ubaru2017fast,
+        title={Fast estimation of tr(f(A)) via stochastic Lanczos quadrature},
+        author={Ubaru, Shashanka and Chen, Jie and Saad, Yousef},
+        journal={SIAM Journal on Matrix Analysis and Applications},
+        volume={38},
+        number={4},
+        pages={1075--1099},
+        year={2017}
+      }
+    """
+
+    def __init__(self, X, Y, kern, mean_function=None, chunk_size=None, num_probes=10,
+                 num_lanczos=30, cg_max_iter=1000, cg_tolerance=1e-6, preconditioner_rank=0,
+                 random_state=None, **kwargs):
+        """
+        X is a data matrix, size N x D
+        Y is a data matrix, size N x R
+        kern, mean_function are appropriate GPflow objects
+        chunk_size is None or the number of kernel matrix rows computed at once
+        num_probes is the number of probe vectors S of the trace estimates
+        num_lanczos is the number of Lanczos iterations
+        cg_max_iter, cg_tolerance control the conjugate gradient solver
+        preconditioner_rank is the rank of the pivoted Cholesky preconditioner,
+          the diagonal of K + σ²I is used for zero
+        random_state is None or numpy RandomState for drawing the probes
+        """
+        random_state = random_state or np.random
+        likelihood = likelihoods.Gaussian()
+        X = DataHolder(X)
+        Y = DataHolder(Y)
+        GPModel.__init__(self, X, Y, kern, likelihood, mean_function, **kwargs)
+        self.num_probes = num_probes
+        self.probe_seed = random_state.randint(0, 2 ** 31 - 1, size=2)
+        self.chunk_size = chunk_size
+        self.num_lanczos = num_lanczos
+        self.cg_max_iter = cg_max_iter
+        self.cg_tolerance = cg_tolerance
+        self.preconditioner_rank = preconditioner_rank
+
+    @params_as_tensors
+    def _build_probes(self):
+        """
+        Draws the N x S Rademacher probe vectors. The stateless random op
+        returns the same values in every run for the same N.
+        """
+        # tensorflow.contrib is slow to import, so it is imported at first use
+        from tensorflow.contrib.stateless import stateless_random_uniform
+        shape = tf.stack([tf.shape(self.X)[0], self.num_probes])
+        seed = tf.constant(self.probe_seed, dtype=tf.int64)
+        uniform = stateless_random_uniform(shape, seed=seed, dtype=settings.float_type)
+        return 2. * tf.floor(2. * uniform) - 1.
+
+    @params_as_tensors
+    def _build_num_lanczos(self):
+        """
+        Returns the number of Lanczos iterations for the current data, the
+        Lanczos process breaks down after N iterations.
+        """
+        return tf.maximum(tf.minimum(self.num_lanczos, tf.shape(self.X)[0] - 1), 1)
+
+    @params_as_tensors
+    def _build_operator(self):
+        """
+        Returns the function computing (K + σ²I) V, over blocks of
+        `chunk_size` rows when it is set. The product has no gradient with
+        respect to the kernel parameters, see `_build_kernel_gradient`.
+        """
+        def operator(V):
+            return self._build_kernel_mvm(V) + self.likelihood.variance * V
+        return operator
+
+    @params_as_tensors
+    def _build_kernel_mvm(self, V):
+        if self.chunk_size is None:
+            return tf.stop_gradient(tf.matmul(self.kern.K(self.X), V))
+
+        num_data = tf.shape(self.X)[0]
+        chunk_size = self.chunk_size
+
+        def body(i, products):
+            X = self.X[i * chunk_size:(i + 1) * chunk_size]
+            return i + 1, products.write(i, tf.matmul(self.kern.K(X, self.X), V))
+
+        num_chunks = (num_data + chunk_size - 1) // chunk_size
+        products = tf.TensorArray(settings.float_type, size=num_chunks, infer_shape=False)
+        _, products = tf.while_loop(
+            lambda i, _: i < num_chunks, body, [tf.constant(0, dtype=tf.int32), products],
+            back_prop=False, swap_memory=True)
+        return tf.stop_gradient(products.concat())
+
+    @params_as_tensors
+    def _build_kernel_gradient(self, U, V):
+        """
+        Returns a tensor of value zero with the gradient of Σ U ∘ (K V) with
+        respect to the kernel parameters. With `chunk_size`, the gradient is
+        accumulated over blocks of rows of K, which needs O(N chunk_size)
+        memory instead of O(N²).
+        """
+        if self.chunk_size is None:
+            form = tf.reduce_sum(U * tf.matmul(self.kern.K(self.X), V))
+            return form - tf.stop_gradient(form)
+
+        num_data = tf.shape(self.X)[0]
+        chunk_size = self.chunk_size
+
+        def objective(i):
+            X = self.X[i * chunk_size:(i + 1) * chunk_size]
+            U_chunk = U[i * chunk_size:(i + 1) * chunk_size]
+            return tf.reduce_sum(U_chunk * tf.matmul(self.kern.K(X, self.X), V))
+
+        num_chunks = (num_data + chunk_size - 1) // chunk_size
+        xs = [param.constrained_tensor for param in self.kern.parameters]
+        return misc.attach_gradients(xs, misc.chunked_gradients(objective, num_chunks, xs))
+
+    @params_as_tensors
+    def _build_preconditioner(self):
+        """
+        Returns the function computing P⁻¹V for the preconditioner
+        P = L Lᵀ + σ²I, where L is the pivoted Cholesky factor of K of rank
+        `preconditioner_rank`, or P = diag(K) + σ²I if the rank is zero.
+        """
+        if self.preconditioner_rank > 0:
+            _, L = krylov.pivoted_cholesky(self.kern, self.X, self.preconditioner_rank)
+            return krylov.low_rank_preconditioner(L, self.likelihood.variance)
+        diagonal = tf.expand_dims(self.kern.Kdiag(self.X) + self.likelihood.variance, 1)
+        return lambda V: V / diagonal
+
+    @params_as_tensors
+    def _build_solve(self, rhs):
+        return krylov.conjugate_gradient(self._build_operator(), rhs, self.cg_max_iter,
+                                         self.cg_tolerance, self._build_preconditioner())
+
+    @name_scope('likelihood')
+    @params_as_tensors
+    def _build_likelihood(self):
+        """
+        Construct a tensorflow function to compute the log marginal likelihood.
+        With α = (K + σ²I)⁻¹err and w_s = (K + σ²I)⁻¹z_s from a single batch
+        of conjugate gradient solves held constant, the terms
+
+            2 errᵀα - αᵀ(K + σ²I)α,    1/S Σ_s w_sᵀ(K + σ²I)z_s
+
+        have the values of the quadratic form and of the Hutchinson estimate
+        and their exact gradients. The latter replaces the stochastic Lanczos
+        estimate of the log determinant in the gradient. The gradients with
+        respect to the kernel parameters are added by
+        `_build_kernel_gradient`.
+        """
+        num_data = tf.cast(tf.shape(self.Y)[0], settings.float_type)
+        output_dim = tf.shape(self.Y)[1]
+        probes = self._build_probes()
+        num_probes = tf.cast(tf.shape(probes)[1], settings.float_type)
+        err = self.Y - self.mean_function(self.X)
+        rhs = tf.concat([err, probes], 1)
+        solutions = tf.stop_gradient(self._build_solve(rhs))
+        alpha = solutions[:, :output_dim]
+        weights = solutions[:, output_dim:] / num_probes
+
+        V = tf.concat([alpha, probes], 1)
+        products = self._build_operator()(V)
+        quad = 2. * tf.reduce_sum(err * alpha) - tf.reduce_sum(alpha * products[:, :output_dim])
+        trace = tf.reduce_sum(weights * products[:, output_dim:])
+        logdet = krylov.stochastic_logdet(self._build_operator(), probes,
+                                           self._build_num_lanczos())
+        logdet = tf.stop_gradient(logdet - trace) + trace
+
+        output_dim = tf.cast(output_dim, settings.float_type)
+        U = tf.concat([-alpha, output_dim * weights], 1)
+        kernel_gradient = self._build_kernel_gradient(U, V)
+        const = num_data * output_dim * np.log(2 * np.pi)
+        return -0.5 * (const + output_dim * logdet + quad + kernel_gradient)
+
+    @name_scope('predict')
+    @params_as_tensors
+    def _build_predict(self, Xnew, full_cov=False):
+        """
+        Xnew is a data matrix, point at which we want to predict
+
+        This method computes p(F* | Y) where F* are points on the GP at Xnew.
+        """
+        return self._build_cached_predict(Xnew, self._build_predict_cache(), full_cov=full_cov)
+
+    @name_scope('predict_cache')
+    @params_as_tensors
+    def _build_predict_cache(self):
+        """
+        Computes α = (K + σ²I)⁻¹(Y - m(X)) and R = Q L⁻ᵀ, where Q T Qᵀ is the
+        Lanczos decomposition of K + σ²I and T = L Lᵀ, so that
+        (K + σ²I)⁻¹ ≈ R Rᵀ.
+        """
+        err = self.Y - self.mean_function(self.X)
+        alpha = self._build_solve(err)
+        start = tf.ones(tf.stack([tf.shape(err)[0], 1]), dtype=settings.float_type)
+        Q, T = krylov.lanczos(self._build_operator(), start, self._build_num_lanczos())
+        LT = tf.cholesky(T)
+        R = tf.transpose(tf.matrix_triangular_solve(LT, tf.transpose(Q), lower=True))
+        return alpha, R
+
+    @name_scope('predict')
+    @params_as_tensors
+    def _build_cached_predict(self, Xnew, cache, full_cov=False):
+        """
+        Computes p(F* | Y) from the terms returned by `_build_predict_cache`
+        in O(N(R + k)) per point for k Lanczos iterations.
+        """
+        alpha, R = cache
+        Kx = self.kern.K(Xnew, self.X)
+        fmean = tf.matmul(Kx, alpha) + self.mean_function(Xnew)
+        B = tf.matmul(Kx, R)
+        if full_cov:
+            fvar = self.kern.K(Xnew) - tf.matmul(B, B, transpose_b=True)
+            shape = tf.stack([1, 1, tf.shape(alpha)[1]])
+            fvar = tf.tile(tf.expand_dims(fvar, 2), shape)
+        else:
+            fvar = self.kern.Kdiag(Xnew) - tf.reduce_sum(tf.square(B), 1)
+            fvar = tf.tile(tf.reshape(fvar, (-1, 1)), [1, tf.shape(alpha)[1]])
+        return fmean, fvar
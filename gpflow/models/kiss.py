@@ -0,0 +1,341 @@
+# Copyright 2018 the GPflow authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+import tensorflow as tf
+
+from .. import kernels
+from .. import krylov
+from .. import likelihoods
+from .. import settings
+
+from ..params import DataHolder
+from ..decors import params_as_tensors
+from ..decors import name_scope
+
+from .model import GPModel
+
+
+# grid size from which Toeplitz products use the single precision FFT
+TOEPLITZ_FFT_SIZE = 1024
+
+
+class KISSGPR(GPModel):
+    """
+    Structured kernel interpolation (KISS-GP) regression for low-dimensional
+    inputs. The Gram matrix is approximated by K ≈ W K_UU Wᵀ, where U is a
+    regular grid, W holds sparse cubic interpolation weights (4^D non-zeros
+    per row) and K_UU is a Kronecker product of Toeplitz matrices, whose
+    matrix-vector products are computed with the FFT in O(M log M) for
+    grids of at least TOEPLITZ_FFT_SIZE points per dimension. TensorFlow
+    only has a single precision FFT, smaller grids therefore use dense
+    Toeplitz blocks in double precision.
+
+    The solve with W K_UU Wᵀ + σ²I uses conjugate gradients, and the log
+    determinant uses the eigenvalues of K_UU scaled by N/M. Training
+    therefore costs O(N + M log M) per CG iteration. The predictive mean
+    and variance are cached on the grid, the variance via a Lanczos
+    decomposition as in LOVE, so prediction costs O(4^D k) per point for
+    k Lanczos iterations.
+
+    The kernel must be stationary. In more than one dimension it must be a
+    Product of one-dimensional stationary kernels with active dimensions
+    0, ..., D - 1 in this order. Test points outside the grid are clipped
+    to its boundary.
+
+    The key references are
+
+    ::
+
+      @inproceedings{wilson2015kernel,
+        title={Kernel interpolation for scalable structured Gaussian
+               processes (KISS-GP)},
+        author={Wilson, Andrew and Nickisch, Hannes},
+        booktitle={International Conference on Machine Learning},
+        pages={1775--1784},
+        year={2015}
+      }
+
+      @inproceedings{pleiss2018constant,
+        title={Constant-time predictive distributions for Gaussian processes},
+        author={Pleiss, Geoff and Gardner, Jacob and Weinberger, Kilian and
+                Wilson, Andrew Gordon},
+        booktitle={International Conference on Machine Learning},
+        pages={4114--4123},
+        year={2018}
+      }
+    """
+
+    def __init__(self, X, Y, kern, grid_size, mean_function=None, grid_bounds=None,
+                 cg_max_iter=1000, cg_tolerance=1e-6, num_lanczos=100, **kwargs):
+        """
+        X is a data matrix, size N x D
+        Y is a data matrix, size N x R
+        kern is a stationary kernel, see the class description
+        grid_size is the number of grid points per dimension, integer or list
+        grid_bounds is None or a D x 2 array of lower and upper bounds of the
+          region the grid must cover, by default the range of X
+        cg_max_iter, cg_tolerance control the conjugate gradient solver
+        num_lanczos is the number of Lanczos iterations for the variances
+        """
+        X = np.asarray(X, dtype=settings.float_type)
+        input_dim = X.shape[1]
+        factors = list(kern.kernels) if isinstance(kern, kernels.Product) else [kern]
+        if len(factors) != input_dim:
+            raise ValueError('Kernel must have one factor per input dimension.')
+        for d, factor in enumerate(factors):
+            if not isinstance(factor, kernels.Stationary):
+                raise ValueError('Kernel factors must be stationary.')
+            if input_dim > 1 and not np.array_equal(np.arange(input_dim)[factor.active_dims], [d]):
+                raise ValueError('Kernel factor {0} must act on input dimension {0}.'.format(d))
+
+        grid_size = np.broadcast_to(np.asarray(grid_size, dtype=int), (input_dim,))
+        if np.any(grid_size < 6):
+            raise ValueError('Grid must have at least 6 points per dimension.')
+        if grid_bounds is None:
+            grid_bounds = np.stack([X.min(0), X.max(0)], axis=1)
+        grid_bounds = np.asarray(grid_bounds, dtype=settings.float_type)
+        step = (grid_bounds[:, 1] - grid_bounds[:, 0]) / (grid_size - 5)
+        step = np.where(step > 0, step, 1.)
+
+        likelihood = likelihoods.Gaussian()
+        X = DataHolder(X)
+        Y = DataHolder(Y)
+        GPModel.__init__(self, X, Y, kern, likelihood, mean_function, **kwargs)
+        # two extra points at each side keep the cubic stencil inside the grid
+        self.grid_lower = grid_bounds[:, 0] - 2 * step
+        self.grid_step = step
+        self.grid_size = [int(n) for n in grid_size]
+        self.cg_max_iter = cg_max_iter
+        self.cg_tolerance = cg_tolerance
+        # the Lanczos process breaks down after N iterations
+        self.num_lanczos = max(min(num_lanczos, X.shape[0] - 1), 1)
+
+    def _kernel_factors(self):
+        return list(self.kern.kernels) if isinstance(self.kern, kernels.Product) else [self.kern]
+
+    @params_as_tensors
+    def _build_grid_columns(self):
+        """
+        Computes the first columns of the Toeplitz matrices K_d of the grid.
+        """
+        columns = []
+        for factor, lower, step, size in zip(self._kernel_factors(), self.grid_lower,
+                                             self.grid_step, self.grid_size):
+            grid = lower + step * np.arange(size, dtype=settings.float_type).reshape(-1, 1)
+            columns.append(factor.K(grid[:1], grid, presliced=True)[0])
+        return columns
+
+    def _build_grid_mvm(self, columns, V):
+        """
+        Computes K_UU V for the M x C matrix V.
+        """
+        num_columns = tf.shape(V)[1]
+        T = tf.reshape(V, tf.stack(self.grid_size + [num_columns]))
+        num_axes = len(self.grid_size)
+        for d, column in enumerate(columns):
+            perm = [i for i in range(num_axes + 1) if i != d] + [d]
+            T = tf.transpose(T, perm)
+            shape = tf.shape(T)
+            T = tf.reshape(_toeplitz_mvm(column, tf.reshape(T, [-1, self.grid_size[d]])), shape)
+            T = tf.transpose(T, np.argsort(perm))
+        return tf.reshape(T, tf.stack([-1, num_columns]))
+
+    def _build_interpolation(self, X):
+        return _interpolation_weights(X, self.grid_lower, self.grid_step, self.grid_size)
+
+    @params_as_tensors
+    def _build_operator(self, interpolation, columns):
+        """
+        Returns the function computing (W K_UU Wᵀ + σ²I) V.
+        """
+        num_grid = int(np.prod(self.grid_size))
+
+        def operator(V):
+            WtV = _interpolate_adjoint(interpolation, V, num_grid)
+            return _interpolate(interpolation, self._build_grid_mvm(columns, WtV)) \
+                + self.likelihood.variance * V
+        return operator
+
+    @params_as_tensors
+    def _build_logdet(self, num_data):
+        """
+        Approximates log |W K_UU Wᵀ + σ²I| by Σ log(N/M λ_i + σ²) over the
+        min(N, M) largest eigenvalues λ_i of K_UU and σ² for the rest.
+        """
+        eigvals = None
+        for factor, lower, step, size in zip(self._kernel_factors(), self.grid_lower,
+                                             self.grid_step, self.grid_size):
+            grid = lower + step * np.arange(size, dtype=settings.float_type).reshape(-1, 1)
+            e = tf.self_adjoint_eigvals(factor.K(grid, presliced=True))
+            eigvals = e if eigvals is None else \
+                tf.reshape(tf.expand_dims(eigvals, 1) * tf.expand_dims(e, 0), [-1])
+        num_grid = int(np.prod(self.grid_size))
+        k = tf.minimum(tf.shape(self.X)[0], num_grid)
+        top, _ = tf.nn.top_k(eigvals, k=k)
+        scale = tf.cast(num_data, settings.float_type) / num_grid
+        logdet = tf.reduce_sum(tf.log(scale * tf.maximum(top, 0.) + self.likelihood.variance))
+        rest = tf.cast(num_data - k, settings.float_type)
+        return logdet + rest * tf.log(self.likelihood.variance)
+
+    @name_scope('likelihood')
+    @params_as_tensors
+    def _build_likelihood(self):
+        """
+        Construct a tensorflow function to compute the approximate log marginal
+        likelihood. With α = Σ⁻¹(Y - m(X)) from conjugate gradients, the
+        quadratic term is written as 2 errᵀα - αᵀΣα with α held constant,
+        which has the value errᵀα and the exact gradient -αᵀ dΣ α.
+        """
+        num_data = tf.shape(self.Y)[0]
+        output_dim = tf.cast(tf.shape(self.Y)[1], settings.float_type)
+        err = self.Y - self.mean_function(self.X)
+        operator = self._build_operator(self._build_interpolation(self.X), self._build_grid_columns())
+        alpha = tf.stop_gradient(
+            krylov.conjugate_gradient(operator, err, self.cg_max_iter, self.cg_tolerance))
+        quad = 2. * tf.reduce_sum(err * alpha) - tf.reduce_sum(alpha * operator(alpha))
+        logdet = self._build_logdet(num_data)
+
+        const = tf.cast(num_data, settings.float_type) * output_dim * np.log(2 * np.pi)
+        return -0.5 * (const + output_dim * logdet + quad)
+
+    @name_scope('predict')
+    @params_as_tensors
+    def _build_predict(self, Xnew, full_cov=False):
+        """
+        Xnew is a data matrix, point at which we want to predict
+
+        This method computes p(F* | Y) under the interpolated kernel.
+        """
+        return self._build_cached_predict(Xnew, self._build_predict_cache(), full_cov=full_cov)
+
+    @name_scope('predict_cache')
+    @params_as_tensors
+    def _build_predict_cache(self):
+        """
+        Computes the grid caches a = K_UU Wᵀα of the mean (M x R) and
+        V = K_UU Wᵀ Q L⁻ᵀ of the variance (M x k), where Q T Qᵀ is the Lanczos
+        decomposition of Σ = W K_UU Wᵀ + σ²I and T = L Lᵀ.
+        """
+        num_grid = int(np.prod(self.grid_size))
+        err = self.Y - self.mean_function(self.X)
+        interpolation = self._build_interpolation(self.X)
+        columns = self._build_grid_columns()
+        operator = self._build_operator(interpolation, columns)
+        alpha = krylov.conjugate_gradient(operator, err, self.cg_max_iter, self.cg_tolerance)
+        mean_cache = self._build_grid_mvm(columns, _interpolate_adjoint(interpolation, alpha, num_grid))
+
+        start = tf.ones(tf.stack([tf.shape(err)[0], 1]), dtype=settings.float_type)
+        Q, T = krylov.lanczos(operator, start, self.num_lanczos)
+        LT = tf.cholesky(T)
+        R = tf.transpose(tf.matrix_triangular_solve(LT, tf.transpose(Q), lower=True))
+        var_cache = self._build_grid_mvm(columns, _interpolate_adjoint(interpolation, R, num_grid))
+        return mean_cache, var_cache
+
+    @name_scope('predict')
+    @params_as_tensors
+    def _build_cached_predict(self, Xnew, cache, full_cov=False):
+        """
+        Computes p(F* | Y) from the grid caches with O(4^D) interpolation
+        weights per test point.
+        """
+        mean_cache, var_cache = cache
+        interpolation = self._build_interpolation(Xnew)
+        fmean = _interpolate(interpolation, mean_cache) + self.mean_function(Xnew)
+        B = _interpolate(interpolation, var_cache)  # N* x k
+        if full_cov:
+            fvar = self.kern.K(Xnew) - tf.matmul(B, B, transpose_b=True)
+            shape = tf.stack([1, 1, tf.shape(mean_cache)[1]])
+            fvar = tf.tile(tf.expand_dims(fvar, 2), shape)
+        else:
+            fvar = self.kern.Kdiag(Xnew) - tf.reduce_sum(tf.square(B), 1)
+            fvar = tf.tile(tf.reshape(fvar, (-1, 1)), [1, tf.shape(mean_cache)[1]])
+        return fmean, fvar
+
+
+def _cubic_convolution(s, a=-0.5):
+    """
+    Keys' cubic convolution kernel, which interpolates cubic polynomials.
+    """
+    s = tf.abs(s)
+    inner = ((a + 2.) * s - (a + 3.)) * tf.square(s) + 1.
+    outer = ((a * s - 5. * a) * s + 8. * a) * s - 4. * a
+    return tf.where(s <= 1., inner, tf.where(s < 2., outer, tf.zeros_like(s)))
+
+
+def _interpolation_weights(X, lower, step, size):
+    """
+    Computes the cubic interpolation weights of the points X on the regular
+    grid with the given lower corner, step and size per dimension.
+
+    :return: Tuple of grid indices (N x 4^D) and weights (N x 4^D).
+    """
+    num_data = tf.shape(X)[0]
+    offsets = tf.constant([-1, 0, 1, 2], dtype=settings.float_type)
+    indices, weights = None, None
+    for d, n in enumerate(size):
+        t = tf.clip_by_value((X[:, d] - lower[d]) / step[d], 1., n - 2.)
+        j = tf.expand_dims(tf.minimum(tf.floor(t), n - 3.), 1) + offsets
+        w = _cubic_convolution(tf.expand_dims(t, 1) - j)
+        j = tf.cast(j, tf.int32)
+        if indices is None:
+            indices, weights = j, w
+            continue
+        indices = tf.reshape(tf.expand_dims(indices, 2) * n + tf.expand_dims(j, 1),
+                             tf.stack([num_data, -1]))
+        weights = tf.reshape(tf.expand_dims(weights, 2) * tf.expand_dims(w, 1),
+                             tf.stack([num_data, -1]))
+    return indices, weights
+
+
+def _interpolate(interpolation, V):
+    """
+    Computes W V for the M x C matrix V of values on the grid.
+    """
+    indices, weights = interpolation
+    return tf.reduce_sum(tf.expand_dims(weights, 2) * tf.gather(V, indices), 1)
+
+
+def _interpolate_adjoint(interpolation, U, num_grid):
+    """
+    Computes Wᵀ U for the N x C matrix U.
+    """
+    indices, weights = interpolation
+    values = tf.expand_dims(weights, 2) * tf.expand_dims(U, 1)  # N x J x C
+    values = tf.reshape(values, tf.stack([-1, tf.shape(U)[1]]))
+    return tf.unsorted_segment_sum(values, tf.reshape(indices, [-1]), num_grid)
+
+
+def _toeplitz_mvm(column, V):
+    """
+    Computes T Vᵀ for the symmetric Toeplitz matrix T with the first column
+    `column` and returns it transposed, B x n. For n < TOEPLITZ_FFT_SIZE the
+    product uses T itself in full precision. Larger grids use the FFT of
+    the circulant embedding of T of size 2n in O(n log n), which TensorFlow
+    only provides in single precision (complex64), so the product has a
+    relative error of about 1e-7.
+    """
+    n = V.get_shape()[1].value
+    if n < TOEPLITZ_FFT_SIZE:
+        T = tf.gather(column, np.abs(np.arange(n)[:, None] - np.arange(n)[None, :]))
+        return tf.matmul(V, T)
+
+    def to_complex(x):
+        x = tf.cast(x, tf.float32)
+        return tf.complex(x, tf.zeros_like(x))
+
+    circulant = tf.concat([column, tf.zeros([1], dtype=column.dtype), tf.reverse(column[1:], [0])], 0)
+    padded = tf.pad(V, [[0, 0], [0, n]])
+    product = tf.ifft(tf.fft(to_complex(padded)) * tf.fft(to_complex(circulant)))
+    return tf.cast(tf.real(product)[:, :n], V.dtype)
@@ -0,0 +1,322 @@
+# Copyright 2018 the GPflow authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+import tensorflow as tf
+
+from .. import kernels
+from .. import likelihoods
+from .. import settings
+
+from ..params import DataHolder, ParamList
+from ..decors import params_as_tensors
+from ..decors import name_scope
+
+from .model import GPModel
+
+
+class GPRKronecker(GPModel):
+    """
+    Exact Gaussian process regression for inputs on a Cartesian grid.
+
+    The inputs are the grid x_1 × ... × x_D of D axes, where each axis may
+    be multidimensional, and the kernel is a Product of D kernels acting on
+    the input dimensions of the respective axes. The Gram matrix then is the
+    Kronecker product K = K_1 ⊗ ... ⊗ K_D, which is diagonalised through
+    the eigendecompositions of the per-axis matrices K_d = Q_d Λ_d Q_dᵀ.
+    The marginal likelihood and the predictions are exact and cost
+    O(Σ n_d³ + N Σ n_d) = O(D N^(1+1/D)) for N = Π n_d grid points.
+
+    Partially observed grids are supported: rows of Y which are NaN mark
+    missing grid points. With P = (K + σ²I)⁻¹ and the missing set M, the
+    inverse and the determinant for the observed points follow from the
+    Schur complement of P_MM, which adds O(m N Σ n_d + m³) for m missing
+    points, so the model is meant for grids with few missing points.
+
+    Predictions of the variance form an N* x N intermediate matrix, use
+    `predict_f_batched` for large test sets.
+
+    The key reference is
+
+    ::
+
+      @phdthesis{saatci2012scalable,
+        title={Scalable inference for structured Gaussian process models},
+        author={Saat{\\c{c}}i, Yunus},
+        year={2012},
+        school={University of Cambridge}
+      }
+    """
+
+    def __init__(self, grid, Y, kern, mean_function=None, **kwargs):
+        """
+        grid is a list of D axes, each a matrix of size n_d x D_d or a vector
+        Y is a data matrix, size Π n_d x R, its rows follow the grid in
+          row-major order (the first axis varies slowest), rows of NaN mark
+          missing observations
+        kern is a Product of D kernels, the d-th one acting on the input
+          dimensions of the d-th axis, or any kernel if D is 1
+        """
+        grid = [np.asarray(axis, dtype=settings.float_type) for axis in grid]
+        grid = [axis.reshape(-1, 1) if axis.ndim == 1 else axis for axis in grid]
+        factors = list(kern.kernels) if isinstance(kern, kernels.Product) else [kern]
+        if len(factors) != len(grid):
+            raise ValueError('Kernel must have one factor per grid axis, got {} factors '
+                             'for {} axes.'.format(len(factors), len(grid)))
+        input_dim = sum(axis.shape[1] for axis in grid)
+        dims, offset = [], 0
+        for i, (factor, axis) in enumerate(zip(factors, grid)):
+            block = np.arange(offset, offset + axis.shape[1])
+            if not np.array_equal(np.arange(input_dim)[factor.active_dims], block):
+                raise ValueError('Kernel factor {} must act on the input dimensions {} '
+                                 'of grid axis {}.'.format(i, block.tolist(), i))
+            dims.append((offset, offset + axis.shape[1]))
+            offset += axis.shape[1]
+
+        shape = [len(axis) for axis in grid]
+        index = np.indices(shape).reshape(len(grid), -1)
+        X = np.hstack([axis[i] for axis, i in zip(grid, index)])
+        Y = np.asarray(Y, dtype=settings.float_type)
+        Y = Y.reshape(-1, 1) if Y.ndim == 1 else Y
+        if Y.shape[0] != X.shape[0]:
+            raise ValueError('Grid has {} points, but Y has {} rows.'.format(X.shape[0], Y.shape[0]))
+        nans = np.isnan(Y)
+        missing = np.all(nans, axis=1)
+        if np.any(nans[~missing]):
+            raise ValueError('Missing observations must be NaN in all columns of Y.')
+
+        likelihood = likelihoods.Gaussian()
+        X = DataHolder(X)
+        Y = DataHolder(np.where(nans, 0., Y))
+        GPModel.__init__(self, X, Y, kern, likelihood, mean_function, **kwargs)
+        self.grid = ParamList([DataHolder(axis) for axis in grid])
+        self.observed = DataHolder((~missing).astype(settings.float_type).reshape(-1, 1))
+        self.missing = DataHolder(np.flatnonzero(missing).astype(np.int32), dtype=np.int32)
+        self.num_missing = int(np.sum(missing))
+        self.grid_dims = dims
+
+    def _kernel_factors(self):
+        return list(self.kern.kernels) if isinstance(self.kern, kernels.Product) else [self.kern]
+
+    @params_as_tensors
+    def _build_grams(self):
+        """
+        Returns the per-axis Gram matrices K_d.
+        """
+        return [factor.K(self.grid[d], presliced=True)
+                for d, factor in enumerate(self._kernel_factors())]
+
+    @name_scope('eigen')
+    @params_as_tensors
+    def _build_eigen(self, grams, stable_gradients=False):
+        """
+        Eigendecomposes the per-axis Gram matrices K_d = Q_d Λ_d Q_dᵀ.
+
+        The gradients of the eigenvectors contain 1/(λ_i - λ_j) terms, which
+        are unstable for the many nearly equal eigenvalues of smooth kernels
+        on regular grids. With `stable_gradients`, the eigenvectors have no
+        gradients and the eigenvalues get the first order perturbation
+        gradients dλ_i = q_iᵀ dK_d q_i.
+
+        :return: List of eigenvector matrices Q_d and the eigenvalues
+            of K + σ²I, a vector of size N.
+        """
+        eigvecs, eigvals = [], None
+        for K in grams:
+            e, Q = tf.self_adjoint_eig(K)
+            if stable_gradients:
+                Q = tf.stop_gradient(Q)
+                perturbation = tf.reduce_sum(Q * tf.matmul(K, Q), 0)
+                e = tf.stop_gradient(e) + perturbation - tf.stop_gradient(perturbation)
+            eigvecs.append(Q)
+            eigvals = e if eigvals is None else \
+                tf.reshape(tf.expand_dims(eigvals, 1) * tf.expand_dims(e, 0), [-1])
+        return eigvecs, eigvals + self.likelihood.variance
+
+    @params_as_tensors
+    def _build_covariance_mvm(self, grams, V):
+        """
+        Computes (K + σ²I) V from the per-axis Gram matrices.
+        """
+        return _kron_mvm(grams, V) + self.likelihood.variance * V
+
+    def _build_precision_mvm(self, eigvecs, eigvals, V):
+        """
+        Computes P V = Q diag(1/λ) Qᵀ V, where P = (K + σ²I)⁻¹.
+        """
+        V = _kron_mvm([tf.transpose(Q) for Q in eigvecs], V)
+        return _kron_mvm(eigvecs, V / tf.expand_dims(eigvals, 1))
+
+    @params_as_tensors
+    def _build_missing_terms(self, eigvecs, eigvals):
+        """
+        Computes the columns P_:M of the precision for the missing points
+        and the Cholesky factor of P_MM.
+        """
+        num_data = tf.shape(self.Y)[0]
+        E = tf.transpose(tf.one_hot(self.missing, num_data, dtype=settings.float_type))
+        PM = self._build_precision_mvm(eigvecs, eigvals, E)
+        LM = tf.cholesky(tf.gather(PM, self.missing))
+        return PM, LM
+
+    @params_as_tensors
+    def _build_weights(self, eigvecs, eigvals, err):
+        """
+        Computes the weights α = Σ_OO⁻¹ y embedded into the grid with zeros
+        at the missing points and, if any points are missing, P_:M and the
+        Cholesky factor of P_MM.
+        """
+        alpha = self._build_precision_mvm(eigvecs, eigvals, err)
+        if not self.num_missing:
+            return alpha, None, None
+        PM, LM = self._build_missing_terms(eigvecs, eigvals)
+        tmp = tf.matrix_triangular_solve(LM, tf.gather(alpha, self.missing), lower=True)
+        alpha -= tf.matmul(PM, tf.matrix_triangular_solve(LM, tmp, lower=True, adjoint=True))
+        return alpha, PM, LM
+
+    @name_scope('likelihood')
+    @params_as_tensors
+    def _build_likelihood(self):
+        """
+        Construct a tensorflow function to compute the log marginal likelihood
+        of the observed grid points,
+
+            log |Σ_OO| = Σ log λ + log |P_MM|,
+            yᵀ Σ_OO⁻¹ y = 2 yᵀα - αᵀ(K + σ²I)α,
+
+        where y and α = Σ_OO⁻¹ y are zero at the missing points. No gradients
+        flow through the eigenvectors: the quadratic term is differentiated
+        with α held fixed, the log determinant through the eigenvalues and,
+        with d log |P_MM| = -tr(P_MM⁻¹ P_:Mᵀ (dK) P_:M), through K.
+        """
+        grams = self._build_grams()
+        eigvecs, eigvals = self._build_eigen(grams, stable_gradients=True)
+        err = (self.Y - self.mean_function(self.X)) * self.observed
+        alpha, PM, LM = self._build_weights(eigvecs, tf.stop_gradient(eigvals), err)
+        alpha = tf.stop_gradient(alpha)
+        quad = 2. * tf.reduce_sum(err * alpha)
+        quad -= tf.reduce_sum(alpha * self._build_covariance_mvm(grams, alpha))
+        logdet = tf.reduce_sum(tf.log(eigvals))
+        if self.num_missing:
+            G = tf.transpose(tf.matrix_triangular_solve(LM, tf.transpose(PM), lower=True))
+            trace = tf.reduce_sum(G * self._build_covariance_mvm(grams, G))
+            logdet += 2. * tf.reduce_sum(tf.log(tf.matrix_diag_part(LM)))
+            logdet -= trace - tf.stop_gradient(trace)
+
+        num_observed = tf.reduce_sum(self.observed)
+        output_dim = tf.cast(tf.shape(self.Y)[1], settings.float_type)
+        return -0.5 * (num_observed * output_dim * np.log(2 * np.pi) + output_dim * logdet + quad)
+
+    @name_scope('predict')
+    @params_as_tensors
+    def _build_predict(self, Xnew, full_cov=False):
+        """
+        Xnew is a data matrix, point at which we want to predict
+
+        This method computes p(F* | Y) exactly using the Kronecker structure.
+        """
+        return self._build_cached_predict(Xnew, self._build_predict_cache(), full_cov=full_cov)
+
+    @name_scope('predict_cache')
+    @params_as_tensors
+    def _build_predict_cache(self):
+        """
+        Computes the eigendecompositions Q_d, the eigenvalues λ of K + σ²I,
+        the weights α = Σ_OO⁻¹ y embedded into the grid with zeros at the
+        missing points and, if any points are missing, P_:M and the Cholesky
+        factor of P_MM.
+        """
+        eigvecs, eigvals = self._build_eigen(self._build_grams())
+        err = (self.Y - self.mean_function(self.X)) * self.observed
+        alpha, PM, LM = self._build_weights(eigvecs, eigvals, err)
+        cache = tuple(eigvecs) + (eigvals,)
+        if self.num_missing:
+            cache += (PM, LM)
+        return cache + (alpha,)
+
+    @name_scope('predict')
+    @params_as_tensors
+    def _build_cached_predict(self, Xnew, cache, full_cov=False):
+        """
+        Computes p(F* | Y) from the terms returned by `_build_predict_cache`.
+        The cross-covariances K(X, Xnew) are never formed: their columns are
+        Kronecker products of the per-axis cross-covariances.
+        """
+        num_axes = len(self.grid_dims)
+        eigvecs, eigvals, alpha = cache[:num_axes], cache[num_axes], cache[-1]
+        W = [factor.K(self.grid[d], Xnew[:, start:stop], presliced=True)
+             for d, (factor, (start, stop)) in enumerate(zip(self._kernel_factors(), self.grid_dims))]
+        fmean = _kron_contract(W, alpha) + self.mean_function(Xnew)
+
+        S = _kron_vectors([tf.matmul(Q, Wd, transpose_a=True) for Q, Wd in zip(eigvecs, W)])
+        S = S / tf.sqrt(eigvals)  # N* x N
+        if self.num_missing:
+            PM, LM = cache[num_axes + 1], cache[num_axes + 2]
+            C = tf.matrix_triangular_solve(LM, tf.transpose(_kron_contract(W, PM)), lower=True)
+        if full_cov:
+            fvar = self.kern.K(Xnew) - tf.matmul(S, S, transpose_b=True)
+            if self.num_missing:
+                fvar += tf.matmul(C, C, transpose_a=True)
+            shape = tf.stack([1, 1, tf.shape(alpha)[1]])
+            fvar = tf.tile(tf.expand_dims(fvar, 2), shape)
+        else:
+            fvar = self.kern.Kdiag(Xnew) - tf.reduce_sum(tf.square(S), 1)
+            if self.num_missing:
+                fvar += tf.reduce_sum(tf.square(C), 0)
+            fvar = tf.tile(tf.reshape(fvar, (-1, 1)), [1, tf.shape(alpha)[1]])
+        return fmean, fvar
+
+
+def _kron_mvm(matrices, V):
+    """
+    Computes (A_1 ⊗ ... ⊗ A_D) V for the N x C matrix V without forming the
+    Kronecker product, by applying each factor along its axis of V reshaped
+    to n_1 x ... x n_D x C.
+    """
+    num_axes = len(matrices)
+    num_columns = tf.shape(V)[1]
+    T = tf.reshape(V, tf.stack([tf.shape(A)[1] for A in matrices] + [num_columns]))
+    for d, A in enumerate(matrices):
+        T = tf.tensordot(A, T, axes=[[1], [d]])
+        T = tf.transpose(T, list(range(1, d + 1)) + [0] + list(range(d + 1, num_axes + 1)))
+    return tf.reshape(T, tf.stack([-1, num_columns]))
+
+
+def _kron_contract(W, V):
+    """
+    Computes Kᵀ V for the N x C matrix V, where the n-th column of K is the
+    Kronecker product of the n-th columns of the n_d x N* matrices W_d.
+
+    :return: N* x C tensor.
+    """
+    num_columns = tf.shape(V)[1]
+    T = tf.reshape(V, tf.stack([tf.shape(Wd)[0] for Wd in W] + [num_columns]))
+    T = tf.tensordot(W[0], T, axes=[[0], [0]])
+    for d, Wd in enumerate(W[1:], 1):
+        ones = [1] * (len(W) - d)
+        Wt = tf.reshape(tf.transpose(Wd), tf.concat([tf.shape(Wd)[::-1], ones], 0))
+        T = tf.reduce_sum(T * Wt, axis=1)
+    return T
+
+
+def _kron_vectors(U):
+    """
+    Returns the N* x N matrix whose n-th row is the Kronecker product of the
+    n-th columns of the n_d x N* matrices U_d.
+    """
+    V = tf.transpose(U[0])
+    for Ud in U[1:]:
+        V = tf.expand_dims(V, 2) * tf.expand_dims(tf.transpose(Ud), 1)
+        V = tf.reshape(V, tf.stack([tf.shape(V)[0], -1]))
+    return V
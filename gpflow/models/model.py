@@ -13,6 +13,7 @@
 # limitations under the License.
 
 import abc
+from concurrent.futures import ThreadPoolExecutor
 
 import numpy as np
 import tensorflow as tf
@@ -21,8 +22,13 @@ from .. import settings
 from ..core.compilable import Build
 from ..params import Parameterized, DataHolder
 from ..decors import autoflow
+from ..decors import params_as_tensors
 from ..mean_functions import Zero
 
+from . import export
+from .posterior import Posterior
+from .pathwise import FunctionSamples, samples_to_columns, columns_to_samples
+
 
 class Model(Parameterized):
     def __init__(self, name=None):
@@ -138,6 +144,21 @@ class GPModel(Model):
             # columns are treated independently
             Y = DataHolder(Y)
         self.X, self.Y = X, Y
+        self._posterior = None
+
+    def posterior(self):
+        """
+        Returns the cached posterior predictor of the model. The predictor
+        computes the training-set dependent terms of the predictive
+        distribution once and reuses them until any model parameter or
+        data holder is assigned a new value. See `Posterior` for details.
+
+        Models without caching support raise NotImplementedError at the first
+        prediction made by the posterior.
+        """
+        if self._posterior is None:
+            self._posterior = Posterior(self)
+        return self._posterior
 
     @autoflow((settings.float_type, [None, None]))
     def predict_f(self, Xnew):
@@ -191,6 +212,252 @@ class GPModel(Model):
         pred_f_mean, pred_f_var = self._build_predict(Xnew)
         return self.likelihood.predict_density(pred_f_mean, pred_f_var, Ynew)
 
+    def sample_functions(self, num_samples, num_features=1000, random_state=None, session=None):
+        """
+        Draws functions from the posterior by pathwise conditioning: a sample
+        from the random Fourier feature approximation of the prior with
+        `num_features` features is updated exactly given the training data
+        or the inducing points. Unlike `predict_f_samples`, the returned
+        samples can be evaluated at any number of points in linear time.
+
+        Requires a kernel with `spectral_frequencies`, i.e. a stationary
+        kernel with a known spectral density, and a model implementing
+        `_build_pathwise_update` and `_build_pathwise_basis`.
+
+        :param random_state: None or numpy RandomState for the random
+            Fourier features.
+        :return: FunctionSamples instance.
+        """
+        random_state = random_state or np.random
+        frequencies = self.kern.spectral_frequencies(num_features, random_state)
+        phases = random_state.uniform(0., 2. * np.pi, num_features).astype(settings.float_type)
+        weights, update = self._draw_function_samples(num_samples, frequencies, phases, session=session)
+        return FunctionSamples(self, frequencies, phases, weights, update)
+
+    def export_predictor(self, path, methods=('predict_f', 'predict_y'), session=None):
+        """
+        Writes the prediction methods as a SavedModel with a frozen graph,
+        built from the cached posterior terms, to the directory `path`.
+        The export can be loaded without the model by `Predictor`.
+        See `export.export_predictor` for details.
+
+        :param methods: Names of the methods, out of 'predict_f',
+            'predict_f_full_cov', 'predict_y' and 'predict_density'.
+        """
+        export.export_predictor(self, path, methods=methods, session=session)
+
+    def numpy_predictor(self, session=None):
+        """
+        Returns a `NumpyPredictor`, which evaluates `predict_f` and
+        `predict_y` from the cached posterior terms with NumPy only and can
+        be saved to a `.npz` file. See `export.numpy_predictor` for details.
+        """
+        return export.numpy_predictor(self, session=session)
+
+    def predict_f_batches(self, Xnew, batch_size, session=None, prefetch=True):
+        """
+        Generator version of `predict_f`, which yields the mean and variance
+        of the latent function(s) for consecutive batches of `batch_size`
+        rows of Xnew. See `_predict_batches` for details.
+        """
+        return self._predict_batches(self.predict_f, [Xnew], batch_size, session, prefetch)
+
+    def predict_y_batches(self, Xnew, batch_size, session=None, prefetch=True):
+        """
+        Generator version of `predict_y`, which yields the mean and variance
+        of held-out data for consecutive batches of `batch_size` rows of Xnew.
+        """
+        return self._predict_batches(self.predict_y, [Xnew], batch_size, session, prefetch)
+
+    def predict_density_batches(self, Xnew, Ynew, batch_size, session=None, prefetch=True):
+        """
+        Generator version of `predict_density`, which yields the (log) density
+        of the data for consecutive batches of `batch_size` rows of Xnew, Ynew.
+        """
+        return self._predict_batches(self.predict_density, [Xnew, Ynew], batch_size, session, prefetch)
+
+    def predict_f_batched(self, Xnew, batch_size, out=None, session=None, prefetch=True):
+        """
+        Computes `predict_f` for large Xnew in batches of `batch_size` rows.
+
+        :param out: None or tuple of preallocated mean and variance arrays,
+            e.g. `np.memmap` instances, the results are written into them.
+        :return: Tuple of mean and variance arrays.
+        """
+        return self._predict_batched(self.predict_f, [Xnew], batch_size, out, session, prefetch)
+
+    def predict_y_batched(self, Xnew, batch_size, out=None, session=None, prefetch=True):
+        """
+        Computes `predict_y` for large Xnew in batches of `batch_size` rows.
+
+        :param out: None or tuple of preallocated mean and variance arrays.
+        :return: Tuple of mean and variance arrays.
+        """
+        return self._predict_batched(self.predict_y, [Xnew], batch_size, out, session, prefetch)
+
+    def predict_density_batched(self, Xnew, Ynew, batch_size, out=None, session=None, prefetch=True):
+        """
+        Computes `predict_density` for large Xnew, Ynew in batches of
+        `batch_size` rows.
+
+        :param out: None or preallocated array for the log densities.
+        :return: Array of log densities.
+        """
+        out = None if out is None else (out,)
+        result = self._predict_batched(self.predict_density, [Xnew, Ynew], batch_size,
+                                       out, session, prefetch)
+        return result[0]
+
+    @autoflow((tf.int32, []), (settings.float_type, [None, None]), (settings.float_type, [None]))
+    @params_as_tensors
+    def _draw_function_samples(self, num_samples, frequencies, phases):
+        shape = tf.stack([num_samples, tf.shape(frequencies)[1], self.num_latent])
+        weights = tf.random_normal(shape, dtype=settings.float_type)
+        prior = lambda X: self._build_prior_function_samples(X, frequencies, phases, weights)
+        update = self._build_pathwise_update(prior, num_samples)
+        return weights, update
+
+    @autoflow((settings.float_type, [None, None]), (settings.float_type, [None, None]),
+              (settings.float_type, [None]), (settings.float_type, [None, None, None]),
+              (settings.float_type, [None, None, None]))
+    @params_as_tensors
+    def _evaluate_function_samples(self, Xnew, frequencies, phases, weights, update):
+        num_samples = tf.shape(weights)[0]
+        prior = self._build_prior_function_samples(Xnew, frequencies, phases, weights)
+        basis = self._build_pathwise_basis(Xnew)
+        correction = tf.matmul(basis, samples_to_columns(update), transpose_a=True)
+        correction = columns_to_samples(correction, num_samples)
+        return prior + correction + tf.expand_dims(self.mean_function(Xnew), 0)
+
+    def _build_prior_function_samples(self, X, frequencies, phases, weights):
+        """
+        Evaluates the random Fourier feature prior samples Φ(X) w at X.
+
+        :return: S x N x R tensor.
+        """
+        num_samples = tf.shape(weights)[0]
+        features = self.kern.random_features(X, frequencies, phases)
+        values = tf.matmul(features, samples_to_columns(weights))
+        return columns_to_samples(values, num_samples)
+
+    def _build_pathwise_update(self, prior, num_samples):
+        """
+        Builds the update coefficients v of the pathwise posterior samples
+        f(·) = f_prior(·) + k(·, Z)ᵀ v, where k(·, Z) is given by
+        `_build_pathwise_basis`.
+
+        :param prior: Function which evaluates the prior samples at given
+            points as an S x N x R tensor.
+        :param num_samples: Number of samples S.
+        :return: S x M x R tensor.
+        """
+        raise NotImplementedError('Pathwise sampling is not supported by "{}".'
+                                  .format(self.__class__.__name__))
+
+    def _build_pathwise_basis(self, Xnew):
+        """
+        Builds the M x N cross-covariance between the points which the
+        pathwise update is expressed in and Xnew.
+        """
+        raise NotImplementedError('Pathwise sampling is not supported by "{}".'
+                                  .format(self.__class__.__name__))
+
+    def _predict_batches(self, method, args, batch_size, session, prefetch):
+        """
+        Runs the autoflow `method` on consecutive batches of rows of `args`.
+        All batches are computed by the same compiled graph. When `prefetch`
+        is True, the next batch is computed in a background thread while the
+        current one is consumed.
+
+        :return: Generator of tuples of numpy arrays, one tuple per batch.
+        """
+        if batch_size < 1:
+            raise ValueError('Batch size must be positive, got {}.'.format(batch_size))
+        session = self.enquire_session(session)
+        num_rows = len(args[0])
+
+        def run(start):
+            result = method(*[arg[start:start + batch_size] for arg in args], session=session)
+            return tuple(result) if isinstance(result, (tuple, list)) else (result,)
+
+        starts = iter(range(0, num_rows, batch_size))
+        first = next(starts, None)
+        if first is None:
+            return
+        # The first batch is computed in the calling thread, which builds the graph.
+        pending = run(first)
+        if not prefetch:
+            yield pending
+            for start in starts:
+                yield run(start)
+            return
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            for start in starts:
+                future = executor.submit(run, start)
+                yield pending
+                pending = future.result()
+            yield pending
+
+    def _predict_batched(self, method, args, batch_size, out, session, prefetch):
+        if len(args[0]) == 0:
+            raise ValueError('At least one row is required for prediction.')
+        start = 0
+        for results in self._predict_batches(method, args, batch_size, session, prefetch):
+            if out is None:
+                num_rows = len(args[0])
+                out = tuple(np.empty((num_rows,) + r.shape[1:], dtype=r.dtype) for r in results)
+            stop = start + len(results[0])
+            for array, result in zip(out, results):
+                array[start:stop] = result
+            start = stop
+        return tuple(out)
+
+    def _clear(self):
+        super(GPModel, self)._clear()
+        self._posterior = None
+
     @abc.abstractmethod
     def _build_predict(self, *args, **kwargs):
         raise NotImplementedError('') # TODO(@awav): write error message
+
+    def _build_predict_cache(self):
+        """
+        Builds tensors for the terms of the predictive distribution which do
+        not depend on the test points. Models which support `posterior` caching
+        override this method together with `_build_cached_predict`.
+
+        :return: Tuple of tensors.
+        """
+        raise NotImplementedError('Posterior caching is not supported by "{}".'
+                                  .format(self.__class__.__name__))
+
+    def _build_cached_predict(self, Xnew, cache, full_cov=False):
+        """
+        Computes the mean and variance of the latent function(s) at the points
+        Xnew given the terms returned by `_build_predict_cache`.
+        """
+        raise NotImplementedError('Posterior caching is not supported by "{}".'
+                                  .format(self.__class__.__name__))
+
+    def _build_cache_extension(self, cache, Xnew, Ynew):
+        """
+        Computes the terms returned by `_build_predict_cache` for the training
+        data extended with the observations Xnew and Ynew, given the cached
+        terms for the current training data.
+
+        :return: Tuple of tensors.
+        """
+        raise NotImplementedError('Incremental posterior updates are not supported by "{}".'
+                                  .format(self.__class__.__name__))
+
+    def _numpy_predict_terms(self, cache, session):
+        """
+        Converts the values of the terms returned by `_build_predict_cache`
+        into the form used by `NumpyPredictor`.
+
+        :param cache: Tuple of numpy arrays.
+        :return: Tuple of the inducing inputs Z, the projected mean, the prior
+            projection and None or the posterior projections.
+        """
+        raise NotImplementedError('NumPy prediction is not supported by "{}".'
+                                  .format(self.__class__.__name__))
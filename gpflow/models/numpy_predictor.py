@@ -0,0 +1,250 @@
+# Copyright 2018 the GPflow authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+NumPy-only predictions of trained GPR, SGPR and SVGP models.
+
+This module depends on NumPy only. Importing it as
+`gpflow.models.numpy_predictor` runs `gpflow/__init__.py`, which imports
+TensorFlow, so processes without TensorFlow load the file by itself:
+
+    import importlib.util
+    import os
+
+    gpflow_dir = importlib.util.find_spec('gpflow').submodule_search_locations[0]
+    spec = importlib.util.spec_from_file_location(
+        'numpy_predictor', os.path.join(gpflow_dir, 'models', 'numpy_predictor.py'))
+    numpy_predictor = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(numpy_predictor)
+    predictor = numpy_predictor.NumpyPredictor.load('/tmp/gp.npz')
+
+`find_spec` locates the installed package without executing it. The module
+file may also be copied into the serving process' own code base.
+"""
+
+import json
+
+import numpy as np
+
+
+class NumpyPredictor:
+    """
+    NumpyPredictor evaluates the predictive distribution of a trained GPR,
+    SGPR or SVGP model with NumPy. It is created by
+    `GPModel.numpy_predictor` from the cached posterior terms of the model,
+    which are brought into the common form
+
+        m(X*) = K*z α + μ(X*),
+        v(X*) = diag(K**) - |K*z W|² + |K*z Sₖ|²,
+
+    with inducing inputs Z (the training inputs for GPR), the projected mean
+    α (M x K), the prior projection W (M x M) and the posterior projections
+    Sₖ (S x M x P, where S is 1 when all latent functions share them, as for
+    GPR and SGPR). The kernel and the mean function are given as nested
+    dictionaries of their type and parameter values, e.g.
+
+        {'type': 'Sum', 'kernels': [
+            {'type': 'RBF', 'variance': 1.0, 'lengthscales': [1.0, 2.0], 'active_dims': [0, 1]},
+            {'type': 'Linear', 'variance': 0.5, 'active_dims': [2]}]}
+
+    Supported kernels are RBF, Exponential, Matern12, Matern32, Matern52,
+    Linear, Sum and Product, supported mean functions Zero, Constant, Linear
+    and Identity. Predictions cost one kernel evaluation between X* and Z
+    followed by matrix multiplications.
+
+    ```
+    m.numpy_predictor().save('/tmp/gp.npz')
+    # in the serving process, with the module loaded as described above
+    predictor = numpy_predictor.NumpyPredictor.load('/tmp/gp.npz')
+    mean, var = predictor.predict_y(Xnew)
+    ```
+
+    :param kernel: Kernel specification.
+    :param mean_function: Mean function specification.
+    :param Z: Inducing inputs, M x D.
+    :param mean_proj: Projected mean α, M x K.
+    :param var_proj: Prior projection W, M x M.
+    :param sqrt_proj: None or posterior projections Sₖ, S x M x P.
+    :param likelihood_variance: None or variance of the Gaussian likelihood,
+        which is required by `predict_y`.
+    """
+
+    KERNELS = ('RBF', 'Exponential', 'Matern12', 'Matern32', 'Matern52', 'Linear', 'Sum', 'Product')
+    MEAN_FUNCTIONS = ('Zero', 'Constant', 'Linear', 'Identity')
+
+    def __init__(self, kernel, mean_function, Z, mean_proj, var_proj, sqrt_proj=None,
+                 likelihood_variance=None):
+        self.kernel = kernel
+        self.mean_function = mean_function
+        self.Z = np.asarray(Z)
+        self.mean_proj = np.asarray(mean_proj)
+        self.var_proj = np.asarray(var_proj)
+        self.sqrt_proj = None if sqrt_proj is None else np.asarray(sqrt_proj)
+        self.likelihood_variance = likelihood_variance
+
+    def predict_f(self, Xnew):
+        """
+        Compute the mean and variance of the latent function(s) at the points
+        Xnew.
+        """
+        Xnew = np.asarray(Xnew)
+        Ksz = _kernel(self.kernel, Xnew, self.Z)
+        A = Ksz.dot(self.var_proj)
+        var = _kernel_diag(self.kernel, Xnew) - np.sum(np.square(A), 1)
+        var = np.tile(var[:, None], [1, self.mean_proj.shape[1]])
+        if self.sqrt_proj is not None:
+            B = np.matmul(Ksz, self.sqrt_proj)  # S x N x P
+            var += np.sum(np.square(B), 2).T
+        return self._mean(Xnew, Ksz), var
+
+    def predict_f_full_cov(self, Xnew):
+        """
+        Compute the mean and covariance matrix of the latent function(s) at the
+        points Xnew.
+        """
+        Xnew = np.asarray(Xnew)
+        Ksz = _kernel(self.kernel, Xnew, self.Z)
+        A = Ksz.dot(self.var_proj)
+        cov = _kernel(self.kernel, Xnew, Xnew) - A.dot(A.T)
+        cov = np.tile(cov[:, :, None], [1, 1, self.mean_proj.shape[1]])
+        if self.sqrt_proj is not None:
+            B = np.matmul(Ksz, self.sqrt_proj)  # S x N x P
+            cov += np.transpose(np.matmul(B, np.transpose(B, [0, 2, 1])), [1, 2, 0])
+        return self._mean(Xnew, Ksz), cov
+
+    def predict_y(self, Xnew):
+        """
+        Compute the mean and variance of held-out data at the points Xnew.
+        """
+        if self.likelihood_variance is None:
+            raise ValueError('Predictions of held-out data require a Gaussian likelihood.')
+        mean, var = self.predict_f(Xnew)
+        return mean, var + self.likelihood_variance
+
+    def save(self, path):
+        """
+        Writes the predictor to the compressed `.npz` file `path`.
+        """
+        spec = {'kernel': _to_lists(self.kernel),
+                'mean_function': _to_lists(self.mean_function),
+                'likelihood_variance': _to_lists(self.likelihood_variance)}
+        arrays = {'Z': self.Z, 'mean_proj': self.mean_proj, 'var_proj': self.var_proj}
+        if self.sqrt_proj is not None:
+            arrays['sqrt_proj'] = self.sqrt_proj
+        np.savez_compressed(path, spec=np.array(json.dumps(spec)), **arrays)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Reads a predictor written by `save`.
+        """
+        with np.load(path) as data:
+            spec = json.loads(str(data['spec']))
+            sqrt_proj = data['sqrt_proj'] if 'sqrt_proj' in data.files else None
+            return cls(spec['kernel'], spec['mean_function'], data['Z'], data['mean_proj'],
+                       data['var_proj'], sqrt_proj=sqrt_proj,
+                       likelihood_variance=spec['likelihood_variance'])
+
+    def _mean(self, Xnew, Ksz):
+        return Ksz.dot(self.mean_proj) + _mean_function(self.mean_function, Xnew)
+
+
+def _to_lists(value):
+    if isinstance(value, dict):
+        return {key: _to_lists(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_to_lists(item) for item in value]
+    if isinstance(value, (np.ndarray, np.generic)):
+        return value.tolist()
+    return value
+
+
+def _slice(spec, X):
+    dims = spec['active_dims']
+    if dims == list(range(dims[0], dims[-1] + 1)):
+        return X[:, dims[0]:dims[-1] + 1]
+    return X[:, dims]
+
+
+def _scaled_square_dist(spec, X, X2):
+    X = _slice(spec, X) / np.asarray(spec['lengthscales'])
+    X2 = _slice(spec, X2) / np.asarray(spec['lengthscales'])
+    Xs = np.sum(np.square(X), 1)
+    X2s = np.sum(np.square(X2), 1)
+    return Xs[:, None] + X2s[None, :] - 2 * X.dot(X2.T)
+
+
+def _euclid_dist(r2):
+    return np.sqrt(np.maximum(r2, 1e-40))
+
+
+def _matern32(r2):
+    r = np.sqrt(3.) * _euclid_dist(r2)
+    return (1. + r) * np.exp(-r)
+
+
+def _matern52(r2):
+    r = np.sqrt(5.) * _euclid_dist(r2)
+    return (1. + r + np.square(r) / 3.) * np.exp(-r)
+
+
+# correlation functions of the stationary kernels in terms of the scaled square distance
+_STATIONARY_KERNELS = {
+    'RBF': lambda r2: np.exp(-r2 / 2),
+    'Exponential': lambda r2: np.exp(-0.5 * _euclid_dist(r2)),
+    'Matern12': lambda r2: np.exp(-_euclid_dist(r2)),
+    'Matern32': _matern32,
+    'Matern52': _matern52,
+}
+
+
+def _kernel(spec, X, X2):
+    kind = spec['type']
+    if kind == 'Sum':
+        return sum(_kernel(k, X, X2) for k in spec['kernels'])
+    if kind == 'Product':
+        return np.prod([_kernel(k, X, X2) for k in spec['kernels']], 0)
+    if kind == 'Linear':
+        X = _slice(spec, X) * np.asarray(spec['variance'])
+        return X.dot(_slice(spec, X2).T)
+    if kind in _STATIONARY_KERNELS:
+        return spec['variance'] * _STATIONARY_KERNELS[kind](_scaled_square_dist(spec, X, X2))
+    raise ValueError('Unsupported kernel "{}".'.format(kind))
+
+
+def _kernel_diag(spec, X):
+    kind = spec['type']
+    if kind == 'Sum':
+        return sum(_kernel_diag(k, X) for k in spec['kernels'])
+    if kind == 'Product':
+        return np.prod([_kernel_diag(k, X) for k in spec['kernels']], 0)
+    if kind == 'Linear':
+        return np.sum(np.square(_slice(spec, X)) * np.asarray(spec['variance']), 1)
+    if kind in _STATIONARY_KERNELS:
+        return np.full(len(X), spec['variance'], dtype=X.dtype)
+    raise ValueError('Unsupported kernel "{}".'.format(kind))
+
+
+def _mean_function(spec, X):
+    kind = spec['type']
+    if kind == 'Zero':
+        return np.zeros((len(X), spec['output_dim']), dtype=X.dtype)
+    if kind == 'Constant':
+        return np.tile(np.reshape(spec['c'], (1, -1)), [len(X), 1])
+    if kind == 'Linear':
+        return X.dot(np.asarray(spec['A'])) + np.asarray(spec['b'])
+    if kind == 'Identity':
+        return X
+    raise ValueError('Unsupported mean function "{}".'.format(kind))
+
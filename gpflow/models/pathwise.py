@@ -0,0 +1,81 @@
+# Copyright 2018 the GPflow authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import tensorflow as tf
+
+
+class FunctionSamples:
+    """
+    Posterior function samples drawn by `GPModel.sample_functions` with
+    pathwise conditioning,
+
+        f(·) = f_prior(·) + k(·, Z) v,
+
+    where f_prior is a sample from a random Fourier feature approximation of
+    the prior and the update coefficients v condition the sample on the data
+    through the training inputs or the inducing points Z. The samples are
+    fixed functions: evaluating them at the same points gives the same
+    values, and the cost is linear in the number of points.
+
+    ```
+    samples = m.sample_functions(10)
+    F = samples(Xgrid)  # 10 x N x R
+    ```
+
+    :param model: GP model the samples are drawn from.
+    :param frequencies: Random Fourier feature frequencies, D x F.
+    :param phases: Random Fourier feature phases, F.
+    :param weights: Prior weights of the features, S x F x R.
+    :param update: Update coefficients v, S x M x R.
+    """
+
+    def __init__(self, model, frequencies, phases, weights, update):
+        self.model = model
+        self.frequencies = frequencies
+        self.phases = phases
+        self.weights = weights
+        self.update = update
+
+    @property
+    def num_samples(self):
+        return self.weights.shape[0]
+
+    def __call__(self, Xnew, session=None):
+        """
+        Evaluates the function samples at the points Xnew.
+
+        :param Xnew: Inputs, N x D.
+        :param session: TensorFlow session or None.
+        :return: Array of values, S x N x R.
+        """
+        return self.model._evaluate_function_samples(
+            Xnew, self.frequencies, self.phases, self.weights, self.update, session=session)
+
+
+def samples_to_columns(samples):
+    """
+    Reshapes an S x N x R tensor of samples to the N x SR matrix whose
+    columns are the samples, so that they can be used in matrix operations.
+    """
+    shape = tf.shape(samples)
+    columns = tf.transpose(samples, [1, 0, 2])
+    return tf.reshape(columns, tf.stack([shape[1], shape[0] * shape[2]]))
+
+
+def columns_to_samples(columns, num_samples):
+    """
+    Inverse of `samples_to_columns`, reshapes an N x SR matrix to S x N x R.
+    """
+    shape = tf.stack([tf.shape(columns)[0], num_samples, -1])
+    return tf.transpose(tf.reshape(columns, shape), [1, 0, 2])
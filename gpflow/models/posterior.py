@@ -0,0 +1,265 @@
+# Copyright 2018 the GPflow authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+import tensorflow as tf
+
+from .. import settings
+from ..core.errors import GPflowError
+from ..core.compilable import Build
+
+
+class Posterior:
+    """
+    Posterior is a predictor which caches the training-set dependent terms of
+    a GP model's predictive distribution, e.g. the Cholesky factor of
+    K + σ²I in GPR. The cached terms are kept in non-trainable TensorFlow
+    variables and are recomputed only when any parameter or data holder
+    of the model gets a new value through `assign`, i.e. when the revision
+    of the model changes.
+
+    ```
+    m = gpflow.models.GPR(X, Y, kern)
+    gpflow.train.ScipyOptimizer().minimize(m)
+    posterior = m.posterior()
+    mu, var = posterior.predict_f(Xnew)  # O(N³) work happens once here
+    mu, var = posterior.predict_f(Xnew)  # reuses the cached factorisation
+    m.likelihood.variance = 0.1          # cache becomes stale
+    mu, var = posterior.predict_f(Xnew)  # recomputes the cache
+    ```
+
+    The cache tracks values assigned through the GPflow interface only.
+    If parameter variables are changed directly in the session, e.g. by a
+    TensorFlow optimizer which is run without anchoring, call `update`
+    to refresh the cache.
+
+    Models support posterior caching by implementing `_build_predict_cache`,
+    which returns a tuple of tensors, and `_build_cached_predict`, which
+    computes the predictive mean and variance from these tensors.
+
+    :param model: GPflow model with posterior caching support.
+    """
+
+    def __init__(self, model):
+        self._model = model
+        self._graph = None
+        self._cache = None
+        self._cache_variables = None
+        self._cache_update = None
+        self._session = None
+        self._revision = None
+        self._methods = {}
+
+    @property
+    def model(self):
+        return self._model
+
+    @property
+    def cache_tensors(self):
+        """
+        Tuple of tensors which read the cached posterior terms.
+        """
+        return self._cache
+
+    @property
+    def cache_variables(self):
+        """
+        List of TensorFlow variables holding the cached posterior terms.
+        """
+        return self._cache_variables
+
+    def is_stale(self, session=None):
+        """
+        Checks whether the cached values must be recomputed for the `session`.
+
+        :param session: TensorFlow session or None.
+        :return: Boolean value.
+        """
+        session = self._model.enquire_session(session)
+        return (self._cache is None
+                or session is not self._session
+                or self._revision != self._model.revision)
+
+    def update(self, session=None):
+        """
+        Recomputes the cached posterior terms unconditionally.
+
+        :param session: TensorFlow session or None.
+        """
+        session = self._model.enquire_session(session)
+        self._build(session)
+        self._model.initialize(session=session)
+        feeds = self._model.feeds
+        session.run(self._cache_update, feed_dict=feeds if feeds else None)
+        self._session = session
+        self._revision = self._model.revision
+
+    def extend(self, args, session=None):
+        """
+        Updates the cached posterior terms in place for the arguments `args`,
+        e.g. new observations, using `_build_cache_extension` of the model,
+        which maps the current cached terms and the arguments to the new
+        cached terms. Stale terms are recomputed first.
+
+        The caller is responsible for bringing the model into the state the
+        extended cache corresponds to and then calling `mark_updated`.
+
+        :param args: List of numpy arrays.
+        :param session: TensorFlow session or None.
+        :return: TensorFlow session which was used for the update.
+        """
+        session = self._prepare(session)
+        arguments, update = self._get_method('extend', session)
+        feed_dict = dict(zip(arguments, args))
+        feeds = self._model.feeds
+        if feeds:
+            feed_dict.update(feeds)
+        session.run(update, feed_dict=feed_dict)
+        return session
+
+    def mark_updated(self, session=None):
+        """
+        Marks the cached posterior terms as valid for the current state of
+        the model in the `session`.
+
+        :param session: TensorFlow session or None.
+        """
+        self._session = self._model.enquire_session(session)
+        self._revision = self._model.revision
+
+    def read_cache(self, session=None):
+        """
+        Returns current values of the cached posterior terms, recomputing them
+        if they are stale.
+
+        :param session: TensorFlow session or None.
+        :return: Tuple of numpy arrays.
+        """
+        session = self._prepare(session)
+        return tuple(session.run(list(self._cache)))
+
+    def predict_f(self, Xnew, session=None):
+        """
+        Compute the mean and variance of the latent function(s) at the points
+        Xnew using the cached posterior terms.
+        """
+        return self._run('predict_f', [Xnew], session)
+
+    def predict_f_full_cov(self, Xnew, session=None):
+        """
+        Compute the mean and covariance matrix of the latent function(s) at the
+        points Xnew using the cached posterior terms.
+        """
+        return self._run('predict_f_full_cov', [Xnew], session)
+
+    def predict_y(self, Xnew, session=None):
+        """
+        Compute the mean and variance of held-out data at the points Xnew
+        using the cached posterior terms.
+        """
+        return self._run('predict_y', [Xnew], session)
+
+    def predict_density(self, Xnew, Ynew, session=None):
+        """
+        Compute the (log) density of the data Ynew at the points Xnew using
+        the cached posterior terms.
+        """
+        return self._run('predict_density', [Xnew, Ynew], session)
+
+    def _prepare(self, session):
+        session = self._model.enquire_session(session)
+        if self.is_stale(session):
+            self.update(session)
+        return session
+
+    def _run(self, name, args, session):
+        session = self._prepare(session)
+        arguments, result = self._get_method(name, session)
+        feed_dict = dict(zip(arguments, args))
+        feeds = self._model.feeds
+        if feeds:
+            feed_dict.update(feeds)
+        return session.run(result, feed_dict=feed_dict)
+
+    def _get_method(self, name, session):
+        method = self._methods.get(name)
+        if method is None:
+            with session.graph.as_default(), tf.name_scope(self._name_scope(name)):
+                method = self._build_method(name)
+            self._methods[name] = method
+        return method
+
+    def _build_method(self, name):
+        model = self._model
+        Xnew = tf.placeholder(settings.float_type, [None, None])
+        if name == 'extend':
+            Ynew = tf.placeholder(settings.float_type, [None, None])
+            cache = model._build_cache_extension(self._cache, Xnew, Ynew)
+            updates = [tf.assign(variable, value, validate_shape=False)
+                       for variable, value in zip(self._cache_variables, cache)]
+            return [Xnew, Ynew], tf.group(*updates)
+        if name == 'predict_f':
+            return [Xnew], model._build_cached_predict(Xnew, self._cache)
+        if name == 'predict_f_full_cov':
+            return [Xnew], model._build_cached_predict(Xnew, self._cache, full_cov=True)
+        mean, var = model._build_cached_predict(Xnew, self._cache)
+        if name == 'predict_y':
+            return [Xnew], model.likelihood.predict_mean_and_var(mean, var)
+        if name == 'predict_density':
+            Ynew = tf.placeholder(settings.float_type, [None, None])
+            return [Xnew, Ynew], model.likelihood.predict_density(mean, var, Ynew)
+        raise ValueError('Unknown posterior method "{}".'.format(name))  # pragma: no cover
+
+    def _build(self, session):
+        model = self._model
+        if model.is_built_coherence(session.graph) is Build.NO:
+            raise GPflowError('Model "{}" is not built.'.format(model.pathname))
+        if self._graph is session.graph:
+            return
+        with session.graph.as_default(), tf.name_scope(self._name_scope('cache')):
+            tensors = model._build_predict_cache()
+            variables, updates, cache = [], [], []
+            for i, tensor in enumerate(tensors):
+                variable, update, value = _build_cache_variable(tensor, 'cache_{}'.format(i))
+                variables.append(variable)
+                updates.append(update)
+                cache.append(value)
+        self._graph = session.graph
+        self._cache_variables = variables
+        self._cache_update = tf.group(*updates)
+        self._cache = tuple(cache)
+        self._methods = {}
+
+    def _name_scope(self, name):
+        return '/'.join(['posterior', self._model.name, name])
+
+
+def _build_cache_variable(tensor, name):
+    """
+    Creates a variable for caching `tensor` values. The variable has a floating
+    shape, therefore the cache survives changes of the data size. Its initial
+    value is an empty array of the same rank, as the cache must not be computed
+    at variable initialization.
+
+    :return: Tuple with the variable, update operation and the tensor which
+        reads the cached value with the static shape of `tensor`.
+    """
+    ndims = tensor.get_shape().ndims
+    empty = np.zeros((0,) * (ndims or 0), dtype=tensor.dtype.as_numpy_dtype)
+    variable = tf.Variable(empty, trainable=False, validate_shape=False,
+                           collections=[tf.GraphKeys.LOCAL_VARIABLES], name=name)
+    update = tf.assign(variable, tensor, validate_shape=False)
+    value = tf.identity(variable)
+    value.set_shape(tensor.get_shape())
+    return variable, update, value
@@ -0,0 +1,246 @@
+# Copyright 2018 the GPflow authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+import tensorflow as tf
+
+from .. import kernels
+from .. import likelihoods
+from .. import misc
+from .. import settings
+
+from ..params import DataHolder
+from ..decors import params_as_tensors
+from ..decors import name_scope
+
+from .model import GPModel
+
+
+class RandomFeatureGPR(GPModel):
+    """
+    GP regression with a random Fourier feature approximation of a stationary
+    kernel, i.e. Bayesian linear regression
+
+        y = φ(x)ᵀw + m(x) + ε,  w ~ N(0, I),  ε ~ N(0, σ²),
+
+    where the F features φ(x) = sqrt(2σ_k²/F) cos(x/ℓ ω + b) use frequencies
+    ω drawn from the spectral density of the kernel and fixed at
+    construction. The kernel variance and lengthscales remain trainable. The
+    frequencies of the RationalQuadratic kernel depend on α, which is
+    therefore made non-trainable.
+
+    The data enter through ΦᵀΦ (F x F) and Φᵀ(Y - m(X)) (F x R) only, so
+    training costs O(NF²) and prediction O(F²) per point. With `chunk_size`
+    the statistics and the gradients of the likelihood are accumulated over
+    chunks of the data, which keeps the memory at O(F² + BF) for datasets
+    with tens of millions of rows, in training as well as in prediction.
+
+    The key reference is
+
+    ::
+
+      @inproceedings{rahimi2008random,
+        title={Random features for large-scale kernel machines},
+        author={Rahimi, Ali and Recht, Benjamin},
+        booktitle={Advances in Neural Information Processing Systems},
+        pages={1177--1184},
+        year={2008}
+      }
+    """
+
+    def __init__(self, X, Y, kern, num_features=1000, mean_function=None,
+                 chunk_size=None, random_state=None, **kwargs):
+        """
+        X is a data matrix, size N x D
+        Y is a data matrix, size N x R
+        kern is a stationary kernel with `spectral_frequencies`
+        num_features is the number of random Fourier features F
+        chunk_size is None or the number of data points processed at once
+        random_state is None or numpy RandomState for drawing the features
+        """
+        random_state = random_state or np.random
+        likelihood = likelihoods.Gaussian()
+        X = DataHolder(X)
+        Y = DataHolder(Y)
+        GPModel.__init__(self, X, Y, kern, likelihood, mean_function, **kwargs)
+        if isinstance(kern, kernels.RationalQuadratic):
+            # the frequencies are drawn for the current value of alpha
+            self.kern.alpha.trainable = False
+        self.frequencies = DataHolder(kern.spectral_frequencies(num_features, random_state))
+        phases = random_state.uniform(0., 2. * np.pi, num_features)
+        self.phases = DataHolder(phases.astype(settings.float_type))
+        self.num_features = num_features
+        self.chunk_size = chunk_size
+
+    @params_as_tensors
+    def _build_features(self, X):
+        return self.kern.random_features(X, self.frequencies, self.phases)
+
+    @params_as_tensors
+    def _build_chunk_statistics(self, X, Y):
+        """
+        Computes ΦᵀΦ, Φᵀ(Y - m(X)) and Σ (Y - m(X))² of the observations X, Y.
+        """
+        err = Y - self.mean_function(X)
+        Phi = self._build_features(X)
+        return (tf.matmul(Phi, Phi, transpose_a=True), tf.matmul(Phi, err, transpose_a=True),
+                tf.reduce_sum(tf.square(err)))
+
+    @params_as_tensors
+    def _build_statistics(self):
+        """
+        Computes ΦᵀΦ, Φᵀ(Y - m(X)) and Σ (Y - m(X))² with a loop over chunks
+        of `chunk_size` data points. The statistics have no gradients, see
+        `_build_statistics_gradient`.
+        """
+        num_data = tf.shape(self.X)[0]
+        chunk_size = self.chunk_size
+
+        def body(start, *sums):
+            X = self.X[start:start + chunk_size]
+            Y = self.Y[start:start + chunk_size]
+            statistics = self._build_chunk_statistics(X, Y)
+            new_sums = [a + b for a, b in zip(sums, statistics)]
+            for a, new_sum in zip(sums, new_sums):
+                new_sum.set_shape(a.get_shape())
+            return [start + chunk_size] + new_sums
+
+        num_features = self.num_features
+        init = [tf.constant(0, dtype=tf.int32),
+                tf.zeros((num_features, num_features), dtype=settings.float_type),
+                tf.zeros(tf.stack([num_features, tf.shape(self.Y)[1]]), dtype=settings.float_type),
+                tf.constant(0, dtype=settings.float_type)]
+        invariants = [tf.TensorShape([]),
+                      tf.TensorShape([num_features, num_features]),
+                      tf.TensorShape([num_features, None]),
+                      tf.TensorShape([])]
+        _, PhiPhi, PhiY, YY_sum = tf.while_loop(
+            lambda start, *_: start < num_data, body, init,
+            shape_invariants=invariants, back_prop=False, swap_memory=True)
+        return [tf.stop_gradient(s) for s in [PhiPhi, PhiY, YY_sum]]
+
+    @params_as_tensors
+    def _build_statistics_gradient(self, adjoints):
+        """
+        Returns a tensor of value zero with the gradient of the inner product
+        of `adjoints` and the statistics with respect to the parameters of the
+        kernel and the mean function, accumulated over chunks of the data so
+        that only the features Φ of a single chunk are held in memory.
+
+        :param adjoints: Gradients of the objective with respect to the
+            statistics returned by `_build_statistics`.
+        """
+        adjoints = [tf.stop_gradient(adjoint) for adjoint in adjoints]
+        num_data = tf.shape(self.X)[0]
+        chunk_size = self.chunk_size
+
+        def chunk_objective(i):
+            start = i * chunk_size
+            statistics = self._build_chunk_statistics(self.X[start:start + chunk_size],
+                                                      self.Y[start:start + chunk_size])
+            return tf.add_n([tf.reduce_sum(a * s) for a, s in zip(adjoints, statistics)])
+
+        num_chunks = (num_data + chunk_size - 1) // chunk_size
+        xs = [param.constrained_tensor
+              for parameterized in [self.kern, self.mean_function]
+              for param in parameterized.parameters]
+        return misc.attach_gradients(xs, misc.chunked_gradients(chunk_objective, num_chunks, xs))
+
+    @params_as_tensors
+    def _build_weight_posterior(self, PhiPhi, PhiY):
+        """
+        Returns the Cholesky factor LA of A = ΦᵀΦ/σ² + I and the posterior
+        mean A⁻¹Φᵀ(Y - m(X))/σ² of the weights.
+        """
+        A = PhiPhi / self.likelihood.variance + tf.eye(self.num_features, dtype=settings.float_type)
+        LA = tf.cholesky(A)
+        w_mean = tf.cholesky_solve(LA, PhiY / self.likelihood.variance)
+        return LA, w_mean
+
+    @name_scope('likelihood')
+    @params_as_tensors
+    def _build_likelihood(self):
+        """
+        Construct a tensorflow function to compute the log marginal likelihood
+        with the matrix determinant lemma and the Woodbury identity,
+
+            log |ΦΦᵀ + σ²I| = N log σ² + log |A|,
+            errᵀ(ΦΦᵀ + σ²I)⁻¹err = (errᵀerr - errᵀΦ A⁻¹ Φᵀerr / σ²) / σ².
+        """
+        if self.chunk_size is None:
+            return self._build_likelihood_from_statistics(*self._build_chunk_statistics(self.X, self.Y))
+        statistics = self._build_statistics()
+        bound = self._build_likelihood_from_statistics(*statistics)
+        adjoints = tf.gradients(bound, statistics)
+        return bound + self._build_statistics_gradient(adjoints)
+
+    @params_as_tensors
+    def _build_likelihood_from_statistics(self, PhiPhi, PhiY, YY_sum):
+        """
+        Computes the log marginal likelihood from the statistics ΦᵀΦ,
+        Φᵀ(Y - m(X)) and Σ (Y - m(X))².
+        """
+        num_data = tf.cast(tf.shape(self.Y)[0], settings.float_type)
+        output_dim = tf.cast(tf.shape(self.Y)[1], settings.float_type)
+        LA, w_mean = self._build_weight_posterior(PhiPhi, PhiY)
+
+        bound = -0.5 * num_data * output_dim * np.log(2 * np.pi)
+        bound -= 0.5 * num_data * output_dim * tf.log(self.likelihood.variance)
+        bound -= output_dim * tf.reduce_sum(tf.log(tf.matrix_diag_part(LA)))
+        bound -= 0.5 * YY_sum / self.likelihood.variance
+        bound += 0.5 * tf.reduce_sum(PhiY * w_mean) / self.likelihood.variance
+        return bound
+
+    @name_scope('predict')
+    @params_as_tensors
+    def _build_predict(self, Xnew, full_cov=False):
+        """
+        Xnew is a data matrix, point at which we want to predict
+
+        This method computes p(F* | Y) under the posterior of the weights.
+        """
+        return self._build_cached_predict(Xnew, self._build_predict_cache(), full_cov=full_cov)
+
+    @name_scope('predict_cache')
+    @params_as_tensors
+    def _build_predict_cache(self):
+        """
+        Computes the O(NF²) terms of the posterior: the Cholesky factor LA
+        and the posterior mean of the weights.
+        """
+        if self.chunk_size is None:
+            PhiPhi, PhiY, _ = self._build_chunk_statistics(self.X, self.Y)
+        else:
+            PhiPhi, PhiY, _ = self._build_statistics()
+        return self._build_weight_posterior(PhiPhi, PhiY)
+
+    @name_scope('predict')
+    @params_as_tensors
+    def _build_cached_predict(self, Xnew, cache, full_cov=False):
+        """
+        Computes p(F* | Y) from the terms returned by `_build_predict_cache`
+        in O(F²) per point.
+        """
+        LA, w_mean = cache
+        Phi = self._build_features(Xnew)
+        fmean = tf.matmul(Phi, w_mean) + self.mean_function(Xnew)
+        B = tf.matrix_triangular_solve(LA, tf.transpose(Phi), lower=True)
+        if full_cov:
+            fvar = tf.matmul(B, B, transpose_a=True)
+            shape = tf.stack([1, 1, tf.shape(w_mean)[1]])
+            fvar = tf.tile(tf.expand_dims(fvar, 2), shape)
+        else:
+            fvar = tf.reduce_sum(tf.square(B), 0)
+            fvar = tf.tile(tf.reshape(fvar, (-1, 1)), [1, tf.shape(w_mean)[1]])
+        return fmean, fvar
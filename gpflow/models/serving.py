@@ -0,0 +1,225 @@
+# Copyright 2018 the GPflow authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+import tensorflow as tf
+
+from ..core.errors import GPflowError
+
+
+class PredictionServer:
+    """
+    PredictionServer coalesces concurrent prediction requests into batches,
+    so that many small requests share a single `session.run` call. A
+    background thread waits for the first request, gathers further requests
+    for at most `max_latency` seconds or until `max_batch_size` rows are
+    collected, concatenates their arguments along the first axis, calls
+    `predict` once and hands every request its own rows of the results.
+
+    Any function whose results are row-aligned with its arguments can be
+    served, e.g. `predict_f`, `predict_y` and `predict_density` of a model
+    or of its cached `posterior`:
+
+    ```
+    with gpflow.models.PredictionServer(m.posterior().predict_f, max_latency=0.002) as server:
+        # called concurrently, e.g. from the threads of a web service
+        mean, var = server.predict(Xnew)
+        # or from coroutines
+        mean, var = await server.predict_async(Xnew)
+    ```
+
+    A single request with more than `max_batch_size` rows is run on its own.
+    The first request fixes the number of arguments and their shapes beyond
+    the first axis, requests which do not match are rejected by `submit`
+    instead of failing the batch they would join.
+
+    :param predict: Function mapping arrays with a common number of rows to
+        an array or a tuple of arrays with the same number of rows. It is
+        called with the `session` keyword argument when a session is given.
+    :param max_batch_size: Maximum number of rows of a batch.
+    :param max_latency: Maximum time in seconds the first request of a batch
+        waits for further requests.
+    :param session: TensorFlow session, by default the default session of
+        the thread which creates the server. The default session is thread
+        local, therefore it is not visible in the serving thread.
+    """
+
+    def __init__(self, predict, max_batch_size=1024, max_latency=0.005, session=None):
+        if max_batch_size < 1:
+            raise ValueError('Maximum batch size must be positive, got {}.'.format(max_batch_size))
+        if max_latency < 0:
+            raise ValueError('Maximum latency must be non-negative, got {}.'.format(max_latency))
+        self._predict = predict
+        self._max_batch_size = max_batch_size
+        self._max_latency = max_latency
+        self._session = session or tf.get_default_session()
+        self._requests = queue.Queue()
+        self._signature = None
+        self._signature_lock = threading.Lock()
+        self._thread = None
+        self._stopping = threading.Event()
+
+    @property
+    def max_batch_size(self):
+        return self._max_batch_size
+
+    @property
+    def max_latency(self):
+        return self._max_latency
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """
+        Starts the serving thread.
+        """
+        if self.running:
+            raise GPflowError('Prediction server is already running.')
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._serve, name='gpflow-prediction-server',
+                                        daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """
+        Stops the serving thread after the pending requests are answered.
+        """
+        if not self.running:
+            return
+        self._stopping.set()
+        self._thread.join()
+        self._thread = None
+        # requests which raced with stopping are not answered
+        while not self._requests.empty():
+            _, future = self._requests.get_nowait()
+            if future.set_running_or_notify_cancel():
+                future.set_exception(GPflowError('Prediction server was stopped.'))
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def submit(self, *args):
+        """
+        Queues a request.
+
+        :param args: Arrays with a common number of rows.
+        :return: `concurrent.futures.Future` of the results for these rows.
+        """
+        if not self.running or self._stopping.is_set():
+            raise GPflowError('Prediction server is not running.')
+        args = [np.asarray(arg) for arg in args]
+        if not args or any(arg.ndim == 0 for arg in args) or len({len(arg) for arg in args}) != 1:
+            raise ValueError('Arguments must have the same number of rows.')
+        self._check_signature(args)
+        future = Future()
+        self._requests.put((args, future))
+        return future
+
+    def predict(self, *args, timeout=None):
+        """
+        Queues a request and waits for its results.
+
+        :param args: Arrays with a common number of rows.
+        :param timeout: None or maximum number of seconds to wait.
+        :return: Results of `predict` for these rows.
+        """
+        return self.submit(*args).result(timeout=timeout)
+
+    async def predict_async(self, *args):
+        """
+        Coroutine version of `predict`.
+        """
+        return await asyncio.wrap_future(self.submit(*args))
+
+    def _check_signature(self, args):
+        signature = tuple(arg.shape[1:] for arg in args)
+        with self._signature_lock:
+            if self._signature is None:
+                self._signature = signature
+        if signature != self._signature:
+            raise ValueError('Arguments of shapes {} do not match the shapes {} of the served '
+                             'requests beyond the first axis.'
+                             .format([arg.shape for arg in args], list(self._signature)))
+
+    def _serve(self):
+        pending = None
+        while True:
+            if pending is None:
+                try:
+                    pending = self._requests.get(timeout=0.1)
+                except queue.Empty:
+                    if self._stopping.is_set():
+                        return
+                    continue
+            batch, pending = self._gather(pending)
+            self._run(batch)
+
+    def _gather(self, first):
+        """
+        Collects requests following `first` until the batch is full or the
+        latency budget of `first` is spent.
+
+        :return: Tuple of the batch and the request which did not fit into
+            it or None.
+        """
+        batch = [first]
+        num_rows = len(first[0][0])
+        deadline = time.monotonic() + self._max_latency
+        while num_rows < self._max_batch_size:
+            try:
+                timeout = deadline - time.monotonic()
+                request = self._requests.get(timeout=timeout) if timeout > 0 \
+                    else self._requests.get_nowait()
+            except queue.Empty:
+                break
+            rows = len(request[0][0])
+            if num_rows + rows > self._max_batch_size:
+                return batch, request
+            batch.append(request)
+            num_rows += rows
+        return batch, None
+
+    def _run(self, batch):
+        # cancelled requests are dropped
+        batch = [(args, future) for args, future in batch if future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        futures = [future for _, future in batch]
+        try:
+            args = [np.concatenate(arrays) for arrays in zip(*[args for args, _ in batch])]
+            kwargs = {} if self._session is None else {'session': self._session}
+            results = self._predict(*args, **kwargs)
+        except Exception as error:  # pylint: disable=broad-except
+            for future in futures:
+                future.set_exception(error)
+            return
+        single = not isinstance(results, (tuple, list))
+        results = [results] if single else results
+        splits = np.cumsum([len(args[0]) for args, _ in batch])[:-1]
+        parts = [np.split(np.asarray(result), splits) for result in results]
+        for i, future in enumerate(futures):
+            values = [part[i] for part in parts]
+            future.set_result(values[0] if single else tuple(values))
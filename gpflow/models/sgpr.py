@@ -19,13 +19,16 @@ import numpy as np
 from .. import settings
 from .. import likelihoods
 from .. import features
+from .. import misc
 
+from ..core.errors import GPflowError
 from ..decors import autoflow
 from ..decors import params_as_tensors
 from ..params import Parameter, DataHolder
 from ..mean_functions import Zero
 
 from .model import GPModel
+from .pathwise import samples_to_columns, columns_to_samples
 
 class SGPRUpperMixin(object):
     """
@@ -84,7 +87,87 @@ class SGPRUpperMixin(object):
         return const + logdet + quad
 
 
-class SGPR(GPModel, SGPRUpperMixin):
+class SGPRBase(GPModel):
+    """
+    Common part of SGPR and StreamingSGPR: the collapsed bound and the
+    predictions in terms of the sufficient statistics Kuf Kfu, Kuf (Y - m(X)),
+    Σ Kdiag and Σ (Y - m(X))². Subclasses define `feature` and
+    `_build_predict_cache`.
+    """
+
+    @params_as_tensors
+    def _build_chunk_statistics(self, X, Y):
+        """
+        Computes the sufficient statistics of the observations X, Y.
+        """
+        err = Y - self.mean_function(X)
+        Kuf = self.feature.Kuf(self.kern, X)
+        return (tf.matmul(Kuf, Kuf, transpose_b=True), tf.matmul(Kuf, err),
+                tf.reduce_sum(self.kern.Kdiag(X)), tf.reduce_sum(tf.square(err)))
+
+    @params_as_tensors
+    def _build_likelihood_from_statistics(self, KufKfu, KufY, Kdiag_sum, YY_sum, num_data):
+        """
+        Computes the collapsed bound of SGPR from the sufficient
+        statistics, using AAᵀ = L⁻¹ Kuf Kfu L⁻ᵀ / σ² and
+        A err = L⁻¹ Kuf (Y - m(X)) / σ.
+        """
+        output_dim = tf.cast(tf.shape(KufY)[1], settings.float_type)
+        L, LB, AAT, c = self._build_statistics_terms(KufKfu, KufY)
+
+        # compute log marginal bound
+        bound = -0.5 * num_data * output_dim * np.log(2 * np.pi)
+        bound += tf.negative(output_dim) * tf.reduce_sum(tf.log(tf.matrix_diag_part(LB)))
+        bound -= 0.5 * num_data * output_dim * tf.log(self.likelihood.variance)
+        bound += -0.5 * YY_sum / self.likelihood.variance
+        bound += 0.5 * tf.reduce_sum(tf.square(c))
+        bound += -0.5 * output_dim * Kdiag_sum / self.likelihood.variance
+        bound += 0.5 * output_dim * tf.reduce_sum(tf.matrix_diag_part(AAT))
+
+        return bound
+
+    @params_as_tensors
+    def _build_statistics_terms(self, KufKfu, KufY):
+        """
+        Computes the Cholesky factors L of Kuu and LB of I + AAᵀ, AAᵀ and
+        c = LB⁻¹ A (Y - m(X)) / σ from the sufficient statistics.
+        """
+        num_inducing = len(self.feature)
+        Kuu = self.feature.Kuu(self.kern, jitter=settings.numerics.jitter_level)
+        L = tf.cholesky(Kuu)
+        sigma = tf.sqrt(self.likelihood.variance)
+        LinvKufKfu = tf.matrix_triangular_solve(L, KufKfu, lower=True)
+        AAT = tf.matrix_triangular_solve(L, tf.transpose(LinvKufKfu), lower=True) / self.likelihood.variance
+        LB = tf.cholesky(AAT + tf.eye(num_inducing, dtype=settings.float_type))
+        Aerr = tf.matrix_triangular_solve(L, KufY, lower=True) / sigma
+        c = tf.matrix_triangular_solve(LB, Aerr, lower=True) / sigma
+        return L, LB, AAT, c
+
+    @params_as_tensors
+    def _build_cached_predict(self, Xnew, cache, full_cov=False):
+        """
+        Computes the predictive mean and variance at Xnew from the terms
+        returned by `_build_predict_cache` in O(N*M²), independently of N.
+        """
+        L, LB, c = cache
+        Kus = self.feature.Kuf(self.kern, Xnew)
+        tmp1 = tf.matrix_triangular_solve(L, Kus, lower=True)
+        tmp2 = tf.matrix_triangular_solve(LB, tmp1, lower=True)
+        mean = tf.matmul(tmp2, c, transpose_a=True)
+        if full_cov:
+            var = self.kern.K(Xnew) + tf.matmul(tmp2, tmp2, transpose_a=True) \
+                  - tf.matmul(tmp1, tmp1, transpose_a=True)
+            shape = tf.stack([1, 1, tf.shape(c)[1]])
+            var = tf.tile(tf.expand_dims(var, 2), shape)
+        else:
+            var = self.kern.Kdiag(Xnew) + tf.reduce_sum(tf.square(tmp2), 0) \
+                  - tf.reduce_sum(tf.square(tmp1), 0)
+            shape = tf.stack([1, tf.shape(c)[1]])
+            var = tf.tile(tf.expand_dims(var, 1), shape)
+        return mean + self.mean_function(Xnew), var
+
+
+class SGPR(SGPRBase, SGPRUpperMixin):
     """
     Sparse Variational GP regression. The key reference is
 
@@ -104,12 +187,19 @@ class SGPR(GPModel, SGPRUpperMixin):
 
     """
 
-    def __init__(self, X, Y, kern, feat=None, mean_function=None, Z=None, **kwargs):
+    def __init__(self, X, Y, kern, feat=None, mean_function=None, Z=None, chunk_size=None, **kwargs):
         """
         X is a data matrix, size N x D
         Y is a data matrix, size N x R
         Z is a matrix of pseudo inputs, size M x D
         kern, mean_function are appropriate GPflow objects
+        chunk_size is None or the number of data points B processed at once.
+        If it is given, the bound and the predictive cache are computed by
+        accumulating the sufficient statistics Kuf Kfu and Kuf (Y - m(X))
+        over chunks of the data, which needs O(M² + MB) memory instead of
+        O(MN). The gradients of the bound are accumulated over the same
+        chunks, so this holds for training as well. It must be set before
+        compilation.
 
         This method only works with a Gaussian likelihood.
         """
@@ -119,6 +209,7 @@ class SGPR(GPModel, SGPRUpperMixin):
         GPModel.__init__(self, X, Y, kern, likelihood, mean_function, **kwargs)
         self.feature = features.inducingpoint_wrapper(feat, Z)
         self.num_data = X.shape[0]
+        self.chunk_size = chunk_size
 
     @params_as_tensors
     def _build_likelihood(self):
@@ -127,6 +218,12 @@ class SGPR(GPModel, SGPRUpperMixin):
         likelihood. For a derivation of the terms in here, see the associated
         SGPR notebook.
         """
+        if self.chunk_size is not None:
+            num_data = tf.cast(tf.shape(self.Y)[0], settings.float_type)
+            statistics = self._build_statistics()
+            bound = self._build_likelihood_from_statistics(*statistics, num_data)
+            adjoints = tf.gradients(bound, statistics)
+            return bound + self._build_statistics_gradient(adjoints)
 
         num_inducing = len(self.feature)
         num_data = tf.cast(tf.shape(self.Y)[0], settings.float_type)
@@ -158,6 +255,76 @@ class SGPR(GPModel, SGPRUpperMixin):
 
         return bound
 
+    @params_as_tensors
+    def _build_statistics(self):
+        """
+        Computes the sufficient statistics Kuf Kfu (M x M), Kuf (Y - m(X))
+        (M x R), Σ Kdiag and Σ (Y - m(X))² with a loop over chunks of
+        `chunk_size` data points, or at once if it is None. The statistics
+        have no gradients, see `_build_statistics_gradient`.
+        """
+        if self.chunk_size is None:
+            return [tf.stop_gradient(s) for s in self._build_chunk_statistics(self.X, self.Y)]
+
+        num_inducing = len(self.feature)
+        num_data = tf.shape(self.X)[0]
+        chunk_size = self.chunk_size
+
+        def body(start, *sums):
+            X = self.X[start:start + chunk_size]
+            Y = self.Y[start:start + chunk_size]
+            statistics = self._build_chunk_statistics(X, Y)
+            return [start + chunk_size] + [a + b for a, b in zip(sums, statistics)]
+
+        zero = tf.constant(0, dtype=settings.float_type)
+        init = [tf.constant(0, dtype=tf.int32),
+                tf.zeros((num_inducing, num_inducing), dtype=settings.float_type),
+                tf.zeros(tf.stack([num_inducing, tf.shape(self.Y)[1]]), dtype=settings.float_type),
+                zero, zero]
+        invariants = [tf.TensorShape([]),
+                      tf.TensorShape([num_inducing, num_inducing]),
+                      tf.TensorShape([num_inducing, None]),
+                      tf.TensorShape([]), tf.TensorShape([])]
+        _, KufKfu, KufY, Kdiag_sum, YY_sum = tf.while_loop(
+            lambda start, *_: start < num_data, body, init,
+            shape_invariants=invariants, back_prop=False, swap_memory=True)
+        return [tf.stop_gradient(s) for s in [KufKfu, KufY, Kdiag_sum, YY_sum]]
+
+    @params_as_tensors
+    def _build_statistics_gradient(self, adjoints):
+        """
+        Returns a tensor of value zero with the gradient of the inner product
+        of `adjoints` and the sufficient statistics with respect to the
+        parameters of the kernel, the inducing features and the mean
+        function. With `chunk_size`, the gradient is accumulated over chunks
+        of the data, which needs O(M² + MB) memory instead of O(MN).
+
+        :param adjoints: Gradients of the objective with respect to the
+            statistics returned by `_build_statistics`.
+        """
+        adjoints = [tf.stop_gradient(adjoint) for adjoint in adjoints]
+
+        def objective(X, Y):
+            statistics = self._build_chunk_statistics(X, Y)
+            return tf.add_n([tf.reduce_sum(a * s) for a, s in zip(adjoints, statistics)])
+
+        if self.chunk_size is None:
+            form = objective(self.X, self.Y)
+            return form - tf.stop_gradient(form)
+
+        num_data = tf.shape(self.X)[0]
+        chunk_size = self.chunk_size
+
+        def chunk_objective(i):
+            start = i * chunk_size
+            return objective(self.X[start:start + chunk_size], self.Y[start:start + chunk_size])
+
+        num_chunks = (num_data + chunk_size - 1) // chunk_size
+        xs = [param.constrained_tensor
+              for parameterized in [self.kern, self.feature, self.mean_function]
+              for param in parameterized.parameters]
+        return misc.attach_gradients(xs, misc.chunked_gradients(chunk_objective, num_chunks, xs))
+
     @params_as_tensors
     def _build_predict(self, Xnew, full_cov=False):
         """
@@ -165,11 +332,22 @@ class SGPR(GPModel, SGPRUpperMixin):
         Xnew. For a derivation of the terms in here, see the associated SGPR
         notebook.
         """
+        return self._build_cached_predict(Xnew, self._build_predict_cache(), full_cov=full_cov)
+
+    @params_as_tensors
+    def _build_predict_cache(self):
+        """
+        Computes the O(NM²) terms of the predictive distribution: the Cholesky
+        factors L of Kuu and LB of B = I + AAᵀ, and c = LB⁻¹ A (Y - m(X)) / σ.
+        """
+        if self.chunk_size is not None:
+            KufKfu, KufY, _, _ = self._build_statistics()
+            L, LB, _, c = self._build_statistics_terms(KufKfu, KufY)
+            return L, LB, c
         num_inducing = len(self.feature)
         err = self.Y - self.mean_function(self.X)
         Kuf = self.feature.Kuf(self.kern, self.X)
         Kuu = self.feature.Kuu(self.kern, jitter=settings.numerics.jitter_level)
-        Kus = self.feature.Kuf(self.kern, Xnew)
         sigma = tf.sqrt(self.likelihood.variance)
         L = tf.cholesky(Kuu)
         A = tf.matrix_triangular_solve(L, Kuf, lower=True) / sigma
@@ -177,20 +355,39 @@ class SGPR(GPModel, SGPRUpperMixin):
         LB = tf.cholesky(B)
         Aerr = tf.matmul(A, err)
         c = tf.matrix_triangular_solve(LB, Aerr, lower=True) / sigma
-        tmp1 = tf.matrix_triangular_solve(L, Kus, lower=True)
-        tmp2 = tf.matrix_triangular_solve(LB, tmp1, lower=True)
-        mean = tf.matmul(tmp2, c, transpose_a=True)
-        if full_cov:
-            var = self.kern.K(Xnew) + tf.matmul(tmp2, tmp2, transpose_a=True) \
-                  - tf.matmul(tmp1, tmp1, transpose_a=True)
-            shape = tf.stack([1, 1, tf.shape(self.Y)[1]])
-            var = tf.tile(tf.expand_dims(var, 2), shape)
-        else:
-            var = self.kern.Kdiag(Xnew) + tf.reduce_sum(tf.square(tmp2), 0) \
-                  - tf.reduce_sum(tf.square(tmp1), 0)
-            shape = tf.stack([1, tf.shape(self.Y)[1]])
-            var = tf.tile(tf.expand_dims(var, 1), shape)
-        return mean + self.mean_function(Xnew), var
+        return L, LB, c
+
+    @params_as_tensors
+    def _build_pathwise_update(self, prior, num_samples):
+        """
+        Draws inducing outputs u = L v from the optimal q(v) = N(LB⁻ᵀc, B⁻¹)
+        of the whitened inducing variables and computes the update
+        Kuu⁻¹(u - f_prior(Z)).
+        """
+        if type(self.feature) is not features.InducingPoints:
+            raise NotImplementedError('Pathwise sampling requires inducing points.')
+        L, LB, c = self._build_predict_cache()
+        c = tf.tile(c, tf.stack([1, num_samples]))
+        noise = tf.random_normal(tf.shape(c), dtype=settings.float_type)
+        v = tf.matrix_triangular_solve(LB, c + noise, lower=True, adjoint=True)
+        u = tf.matmul(L, v)
+        f = samples_to_columns(prior(self.feature.Z))
+        return columns_to_samples(tf.cholesky_solve(L, u - f), num_samples)
+
+    @params_as_tensors
+    def _build_pathwise_basis(self, Xnew):
+        return self.feature.Kuf(self.kern, Xnew)
+
+    def _numpy_predict_terms(self, cache, session):
+        if type(self.feature) is not features.InducingPoints:
+            raise NotImplementedError('NumPy prediction requires inducing points.')
+        import scipy.linalg
+        L, LB, c = cache
+        eye = np.eye(len(L), dtype=L.dtype)
+        L_inv = scipy.linalg.solve_triangular(L, eye, lower=True)
+        LB_inv = scipy.linalg.solve_triangular(LB, eye, lower=True)
+        proj = L_inv.T.dot(LB_inv.T)
+        return self.feature.Z.read_value(session), proj.dot(c), L_inv.T, proj[None]
 
 
 class GPRFITC(GPModel, SGPRUpperMixin):
@@ -303,23 +500,40 @@ class GPRFITC(GPModel, SGPRUpperMixin):
         Compute the mean and variance of the latent function at some new points
         Xnew.
         """
+        return self._build_cached_predict(Xnew, self._build_predict_cache(), full_cov=full_cov)
+
+    @params_as_tensors
+    def _build_predict_cache(self):
+        """
+        Computes the O(NM²) terms of the FITC predictive distribution:
+        the Cholesky factors Luu of Kuu and L of B, and L⁻ᵀ γ.
+        """
         _, _, Luu, L, _, _, gamma = self._build_common_terms()
+        tmp = tf.matrix_triangular_solve(tf.transpose(L), gamma, lower=False)
+        return Luu, L, tmp
+
+    @params_as_tensors
+    def _build_cached_predict(self, Xnew, cache, full_cov=False):
+        """
+        Computes the predictive mean and variance at Xnew from the terms
+        returned by `_build_predict_cache` in O(N*M²), independently of N.
+        """
+        Luu, L, tmp = cache
         Kus = self.feature.Kuf(self.kern, Xnew)  # size  M x Xnew
 
         w = tf.matrix_triangular_solve(Luu, Kus, lower=True)  # size M x Xnew
 
-        tmp = tf.matrix_triangular_solve(tf.transpose(L), gamma, lower=False)
         mean = tf.matmul(w, tmp, transpose_a=True) + self.mean_function(Xnew)
         intermediateA = tf.matrix_triangular_solve(L, w, lower=True)
 
         if full_cov:
             var = self.kern.K(Xnew) - tf.matmul(w, w, transpose_a=True) \
                   + tf.matmul(intermediateA, intermediateA, transpose_a=True)
-            var = tf.tile(tf.expand_dims(var, 2), tf.stack([1, 1, tf.shape(self.Y)[1]]))
+            var = tf.tile(tf.expand_dims(var, 2), tf.stack([1, 1, tf.shape(tmp)[1]]))
         else:
             var = self.kern.Kdiag(Xnew) - tf.reduce_sum(tf.square(w), 0) \
                   + tf.reduce_sum(tf.square(intermediateA), 0)  # size Xnew,
-            var = tf.tile(tf.expand_dims(var, 1), tf.stack([1, tf.shape(self.Y)[1]]))
+            var = tf.tile(tf.expand_dims(var, 1), tf.stack([1, tf.shape(tmp)[1]]))
 
         return mean, var
 
@@ -330,3 +544,134 @@ class GPRFITC(GPModel, SGPRUpperMixin):
     @Z.setter
     def Z(self, _):
         raise NotImplementedError("Inducing points are now in `model.feature.Z`.")
+
+
+class StreamingSGPR(SGPRBase):
+    """
+    Sparse Variational GP regression which never holds the training data.
+
+    The collapsed bound of SGPR depends on the data only through the
+    sufficient statistics
+
+        Kuf Kfu (M x M),  Kuf (Y - m(X)) (M x R),  Σ Kdiag,  Σ (Y - m(X))²,
+
+    and the number of data points. This model accumulates these statistics
+    batch by batch with `add_data`, therefore it can be fitted to datasets
+    which do not fit into memory and updated as new observations arrive.
+    The bound and the predictions are exact and coincide with SGPR on all
+    data seen so far.
+
+    The statistics are computed for the current kernel, inducing features
+    and mean function, which are set non-trainable at construction. If any
+    of them is changed, the statistics must be recomputed: call
+    `reset_data` and add the data again. The likelihood variance does not
+    enter the statistics and can be optimised.
+
+    ```
+    m = gpflow.models.StreamingSGPR(kern, Z=Z, num_latent=1)
+    for X, Y in batches:
+        m.add_data(X, Y)
+    gpflow.train.ScipyOptimizer().minimize(m)
+    ```
+    """
+
+    def __init__(self, kern, feat=None, mean_function=None, Z=None, num_latent=1, **kwargs):
+        """
+        Z is a matrix of pseudo inputs, size M x D
+        num_latent is the number of columns R of the data Y
+        kern, mean_function are appropriate GPflow objects
+
+        This method only works with a Gaussian likelihood.
+        """
+        likelihood = likelihoods.Gaussian()
+        GPModel.__init__(self, None, None, kern, likelihood, mean_function,
+                         num_latent=num_latent, **kwargs)
+        self.feature = features.inducingpoint_wrapper(feat, Z)
+        self.kern.trainable = False
+        self.feature.trainable = False
+        self.mean_function.trainable = False
+        num_inducing = len(self.feature)
+        self.KufKfu = DataHolder(np.zeros((num_inducing, num_inducing)))
+        self.KufY = DataHolder(np.zeros((num_inducing, num_latent)))
+        self.Kdiag_sum = DataHolder(np.array(0.))
+        self.YY_sum = DataHolder(np.array(0.))
+        self.num_data = DataHolder(np.array(0.))
+        self._statistics_revision = None
+
+    def add_data(self, X, Y, session=None):
+        """
+        Accumulates the sufficient statistics of the observations X, Y.
+        The cost is O(NM²) for N new points.
+
+        :param X: Inputs, size N x D.
+        :param Y: Observations, size N x R.
+        :param session: TensorFlow session or None.
+        :raises GPflowError: if the kernel, inducing features or mean function
+            have changed since the statistics were started.
+        """
+        revision = self._statistics_dependencies_revision()
+        if self._statistics_revision is not None and self._statistics_revision != revision:
+            raise GPflowError('Kernel, inducing features or mean function of "{}" have changed '
+                              'since the data were added, call `reset_data` first.'
+                              .format(self.name))
+        X = np.atleast_2d(np.asarray(X, dtype=settings.float_type))
+        Y = np.atleast_2d(np.asarray(Y, dtype=settings.float_type))
+        if X.shape[0] != Y.shape[0]:
+            raise ValueError('Number of inputs and observations must match, '
+                             'got {} and {}.'.format(X.shape[0], Y.shape[0]))
+        KufKfu, KufY, Kdiag_sum, YY_sum = self.compute_statistics(X, Y, session=session)
+        self.KufKfu.assign(self.KufKfu.read_value(session) + KufKfu, session=session)
+        self.KufY.assign(self.KufY.read_value(session) + KufY, session=session)
+        self.Kdiag_sum.assign(self.Kdiag_sum.read_value(session) + Kdiag_sum, session=session)
+        self.YY_sum.assign(self.YY_sum.read_value(session) + YY_sum, session=session)
+        self.num_data.assign(self.num_data.read_value(session) + X.shape[0], session=session)
+        self._statistics_revision = revision
+
+    def reset_data(self, session=None):
+        """
+        Removes all accumulated data from the model.
+
+        :param session: TensorFlow session or None.
+        """
+        for holder in [self.KufKfu, self.KufY, self.Kdiag_sum, self.YY_sum, self.num_data]:
+            holder.assign(np.zeros_like(holder.read_value(session)), session=session)
+        self._statistics_revision = None
+
+    @autoflow((settings.float_type, [None, None]), (settings.float_type, [None, None]))
+    @params_as_tensors
+    def compute_statistics(self, X, Y):
+        """
+        Computes the sufficient statistics Kuf Kfu, Kuf (Y - m(X)), Σ Kdiag
+        and Σ (Y - m(X))² of the observations X, Y.
+        """
+        return self._build_chunk_statistics(X, Y)
+
+    def _statistics_dependencies_revision(self):
+        return max(self.kern.revision, self.feature.revision, self.mean_function.revision)
+
+    @params_as_tensors
+    def _build_likelihood(self):
+        """
+        Construct a tensorflow function to compute the bound on the marginal
+        likelihood from the sufficient statistics, see
+        `_build_likelihood_from_statistics`.
+        """
+        return self._build_likelihood_from_statistics(
+            self.KufKfu, self.KufY, self.Kdiag_sum, self.YY_sum, self.num_data)
+
+    @params_as_tensors
+    def _build_predict(self, Xnew, full_cov=False):
+        """
+        Compute the mean and variance of the latent function at some new points
+        Xnew from the sufficient statistics.
+        """
+        return self._build_cached_predict(Xnew, self._build_predict_cache(), full_cov=full_cov)
+
+    @params_as_tensors
+    def _build_predict_cache(self):
+        """
+        Computes the terms L, LB and c of `SGPR._build_predict_cache` from the
+        sufficient statistics in O(M³).
+        """
+        L, LB, _, c = self._build_statistics_terms(self.KufKfu, self.KufY)
+        return L, LB, c
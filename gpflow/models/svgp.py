@@ -13,6 +13,8 @@
 # limitations under the License.
 
 
+import sys
+
 import tensorflow as tf
 import numpy as np
 
@@ -23,11 +25,13 @@ from .. import kullback_leiblers, features
 
 from ..params import Parameter
 from ..params import Minibatch
+from ..params import IndexedMinibatch
 from ..params import DataHolder
 
 from ..decors import params_as_tensors
 
 from ..models.model import GPModel
+from ..models.pathwise import samples_to_columns, columns_to_samples
 
 
 class SVGP(GPModel):
@@ -49,6 +53,7 @@ class SVGP(GPModel):
                  mean_function=None,
                  num_latent=None,
                  q_diag=False,
+                 q_rank=None,
                  whiten=True,
                  minibatch_size=None,
                  Z=None,
@@ -63,36 +68,54 @@ class SVGP(GPModel):
           Y.shape[1]
         - q_diag is a boolean. If True, the covariance is approximated by a
           diagonal matrix.
+        - q_rank is None or an integer r. If set, the covariance is
+          approximated by a diagonal plus rank r matrix diag(q_sqrt²) + U Uᵀ,
+          where q_sqrt is M x R and the factors U = q_factor are R x M x r,
+          so the variational parameters take O(Mr) instead of O(M²) memory.
+          The factors are initialised deterministically to 1e-3 times the
+          first r unit vectors.
         - whiten is a boolean. If True, we use the whitened representation of
           the inducing points.
         - minibatch_size, if not None, turns on mini-batching with that size.
+          X and Y can then also be np.memmap arrays or h5py datasets, which
+          are read batch by batch.
         - num_data is the total number of observations, default to X.shape[0]
           (relevant when feeding in external minibatches)
         """
+        if q_diag and q_rank is not None:
+            raise ValueError('Cannot use both q_diag and q_rank.')
+
         # sort out the X, Y into MiniBatch objects if required.
         if minibatch_size is None:
             X = DataHolder(X)
             Y = DataHolder(Y)
         else:
-            X = Minibatch(X, batch_size=minibatch_size, seed=0)
-            Y = Minibatch(Y, batch_size=minibatch_size, seed=0)
+            # np.memmap arrays and h5py datasets are read by index batch by batch
+            out_of_core = any(_is_out_of_core(v) for v in [X, Y])
+            minibatch = IndexedMinibatch if out_of_core else Minibatch
+            X = minibatch(X, batch_size=minibatch_size, seed=0)
+            Y = minibatch(Y, batch_size=minibatch_size, seed=0)
 
         # init the super class, accept args
         GPModel.__init__(self, X, Y, kern, likelihood, mean_function, num_latent, **kwargs)
         self.num_data = num_data or X.shape[0]
-        self.q_diag, self.whiten = q_diag, whiten
+        self.q_diag, self.q_rank, self.whiten = q_diag, q_rank, whiten
         self.feature = features.inducingpoint_wrapper(feat, Z)
 
         # init variational parameters
         num_inducing = len(self.feature)
         self.q_mu = Parameter(np.zeros((num_inducing, self.num_latent), dtype=settings.float_type))
-        if self.q_diag:
+        if self.q_diag or self.q_rank is not None:
             self.q_sqrt = Parameter(np.ones((num_inducing, self.num_latent), dtype=settings.float_type),
                                     transforms.positive)
         else:
             q_sqrt = np.array([np.eye(num_inducing, dtype=settings.float_type)
                                for _ in range(self.num_latent)])
             self.q_sqrt = Parameter(q_sqrt, transform=transforms.LowerTriangular(num_inducing, self.num_latent))
+        if self.q_rank is not None:
+            # small distinct unit factors, zero factors would receive zero gradients
+            q_factor = 1e-3 * np.eye(num_inducing, self.q_rank, dtype=settings.float_type)
+            self.q_factor = Parameter(np.tile(q_factor[None], [self.num_latent, 1, 1]))
 
     @params_as_tensors
     def build_prior_KL(self):
@@ -100,7 +123,11 @@ class SVGP(GPModel):
             K = None
         else:
             K = self.feature.Kuu(self.kern, jitter=settings.numerics.jitter_level)
-        return kullback_leiblers.gauss_kl(self.q_mu, self.q_sqrt, K)
+        return kullback_leiblers.gauss_kl(self.q_mu, self.q_sqrt, K, q_factor=self._q_factor())
+
+    @params_as_tensors
+    def _q_factor(self):
+        return self.q_factor if self.q_rank is not None else None
 
     @params_as_tensors
     def _build_likelihood(self):
@@ -125,5 +152,145 @@ class SVGP(GPModel):
     @params_as_tensors
     def _build_predict(self, Xnew, full_cov=False):
         mu, var = features.conditional(self.feature, self.kern, Xnew, self.q_mu,
-                                       q_sqrt=self.q_sqrt, full_cov=full_cov, white=self.whiten)
+                                       q_sqrt=self.q_sqrt, q_factor=self._q_factor(),
+                                       full_cov=full_cov, white=self.whiten)
+        return mu + self.mean_function(Xnew), var
+
+    @params_as_tensors
+    def _build_predict_cache(self):
+        """
+        Precomputes the terms of the predictive distribution which depend on
+        the inducing features and the variational parameters only. With
+        Lm the Cholesky factor of Kuu and P = Lm⁻ᵀ (whitened) or P = Kuu⁻¹,
+        these are Lm⁻¹, P q_mu and
+
+        - for a full q_sqrt, P q_sqrt stored as an M x KM matrix so that all
+          latent functions share one matmul,
+        - for a diagonal q_sqrt, P and q_sqrt (M x K), without forming the
+          K x M x M products,
+        - for q_rank, additionally P q_factor stored as an M x Kr matrix.
+        """
+        conditional = features.conditional.dispatch(type(self.feature))
+        if conditional is not features.default_feature_conditional:
+            raise NotImplementedError('Posterior caching is not supported for "{}" features.'
+                                      .format(self.feature.__class__.__name__))
+        num_inducing = len(self.feature)
+        Kmm = self.feature.Kuu(self.kern, jitter=settings.numerics.jitter_level)
+        Lm = tf.cholesky(Kmm)
+        Lm_inv = tf.matrix_triangular_solve(Lm, tf.eye(num_inducing, dtype=settings.float_type), lower=True)
+        if self.whiten:
+            proj = tf.transpose(Lm_inv)
+        else:
+            proj = tf.matmul(Lm_inv, Lm_inv, transpose_a=True)
+        mean_proj = tf.matmul(proj, self.q_mu)  # M x K
+        if self.q_diag:
+            return Lm_inv, mean_proj, proj, self.q_sqrt
+        if self.q_rank is not None:
+            factor_proj = tf.tensordot(proj, self.q_factor, [[1], [1]])  # M x K x r
+            factor_proj = tf.reshape(factor_proj, [num_inducing, -1])  # M x Kr
+            return Lm_inv, mean_proj, proj, self.q_sqrt, factor_proj
+        q_sqrt = tf.matrix_band_part(self.q_sqrt, -1, 0)  # K x M x M
+        sqrt_proj = tf.tensordot(proj, q_sqrt, [[1], [1]])  # M x K x M
+        sqrt_proj = tf.reshape(sqrt_proj, [num_inducing, -1])  # M x KM
+        return Lm_inv, mean_proj, sqrt_proj
+
+    @params_as_tensors
+    def _build_cached_predict(self, Xnew, cache, full_cov=False):
+        """
+        Computes the predictive mean and variance at Xnew from the terms
+        returned by `_build_predict_cache`. It requires one Kuf evaluation
+        followed by matrix multiplications, no decompositions or solves.
+        """
+        Lm_inv, mean_proj = cache[:2]
+        num_func = tf.shape(mean_proj)[1]
+        num_data = tf.shape(Xnew)[0]
+        Kmn = self.feature.Kuf(self.kern, Xnew)  # M x N
+        A = tf.matmul(Lm_inv, Kmn)  # M x N
+        mu = tf.matmul(Kmn, mean_proj, transpose_a=True)
+        if full_cov:
+            fvar = self.kern.K(Xnew) - tf.matmul(A, A, transpose_a=True)  # N x N
+        else:
+            fvar = self.kern.Kdiag(Xnew) - tf.reduce_sum(tf.square(A), 0)  # N
+
+        if self.q_diag or self.q_rank is not None:
+            proj, q_sqrt = cache[2:4]
+            C = tf.matmul(Kmn, proj, transpose_a=True)  # N x M
+            if full_cov:
+                CS = tf.expand_dims(C, 0) * tf.expand_dims(tf.transpose(q_sqrt), 1)  # K x N x M
+                fvar = tf.expand_dims(fvar, 0) + tf.matmul(CS, CS, transpose_b=True)  # K x N x N
+            else:
+                fvar = tf.expand_dims(fvar, 1) + tf.matmul(tf.square(C), tf.square(q_sqrt))  # N x K
+            sqrt_proj = cache[4] if self.q_rank is not None else None
+        else:
+            fvar = tf.expand_dims(fvar, 0) if full_cov else tf.expand_dims(fvar, 1)
+            sqrt_proj = cache[2]
+
+        if sqrt_proj is not None:
+            B = tf.matmul(Kmn, sqrt_proj, transpose_a=True)  # N x KM or N x Kr
+            B = tf.reshape(B, tf.stack([num_data, num_func, -1]))  # N x K x M or N x K x r
+            if full_cov:
+                B = tf.transpose(B, [1, 0, 2])  # K x N x M
+                fvar = fvar + tf.matmul(B, B, transpose_b=True)  # K x N x N
+            else:
+                fvar = fvar + tf.reduce_sum(tf.square(B), 2)  # N x K
+        var = tf.transpose(fvar) if full_cov else fvar  # N x N x K or N x K
         return mu + self.mean_function(Xnew), var
+
+    @params_as_tensors
+    def _build_pathwise_update(self, prior, num_samples):
+        """
+        Draws inducing outputs u from q(u) and computes the update
+        Kuu⁻¹(u - f_prior(Z)).
+        """
+        if type(self.feature) is not features.InducingPoints:
+            raise NotImplementedError('Pathwise sampling requires inducing points.')
+        num_inducing = len(self.feature)
+        shape = tf.stack([num_samples, num_inducing, self.num_latent])
+        noise = tf.random_normal(shape, dtype=settings.float_type)  # S x M x K
+        if self.q_diag or self.q_rank is not None:
+            u = tf.expand_dims(self.q_sqrt, 0) * noise
+            if self.q_rank is not None:
+                shape = tf.stack([self.num_latent, self.q_rank, num_samples])
+                factor_noise = tf.random_normal(shape, dtype=settings.float_type)  # K x r x S
+                u += tf.transpose(tf.matmul(self.q_factor, factor_noise), [2, 1, 0])
+        else:
+            q_sqrt = tf.matrix_band_part(self.q_sqrt, -1, 0)  # K x M x M
+            u = tf.matmul(q_sqrt, tf.transpose(noise, [2, 1, 0]))  # K x M x S
+            u = tf.transpose(u, [2, 1, 0])
+        u = samples_to_columns(u + tf.expand_dims(self.q_mu, 0))  # M x SK
+        Kmm = self.feature.Kuu(self.kern, jitter=settings.numerics.jitter_level)
+        Lm = tf.cholesky(Kmm)
+        if self.whiten:
+            u = tf.matmul(Lm, u)
+        f = samples_to_columns(prior(self.feature.Z))
+        return columns_to_samples(tf.cholesky_solve(Lm, u - f), num_samples)
+
+    @params_as_tensors
+    def _build_pathwise_basis(self, Xnew):
+        return self.feature.Kuf(self.kern, Xnew)
+
+    def _numpy_predict_terms(self, cache, session):
+        if type(self.feature) is not features.InducingPoints:
+            raise NotImplementedError('NumPy prediction requires inducing points.')
+        Lm_inv, mean_proj = cache[:2]
+        num_inducing, num_func = mean_proj.shape
+        if self.q_diag or self.q_rank is not None:
+            proj, q_sqrt = cache[2:4]
+            sqrt_proj = proj[None] * q_sqrt.T[:, None, :]  # K x M x M
+            if self.q_rank is not None:
+                factor_proj = np.transpose(cache[4].reshape(num_inducing, num_func, -1), [1, 0, 2])
+                sqrt_proj = np.concatenate([sqrt_proj, factor_proj], 2)  # K x M x (M + r)
+        else:
+            sqrt_proj = np.transpose(cache[2].reshape(num_inducing, num_func, -1), [1, 0, 2])
+        return self.feature.Z.read_value(session), mean_proj, Lm_inv.T, sqrt_proj
+
+
+def _is_out_of_core(value):
+    """
+    Returns whether `value` is a np.memmap array or a h5py dataset.
+    """
+    if isinstance(value, np.memmap):
+        return True
+    # datasets exist only if h5py has been imported
+    h5py = sys.modules.get('h5py')
+    return h5py is not None and isinstance(value, h5py.Dataset)
@@ -50,11 +50,17 @@ class VGP(GPModel):
     def __init__(self, X, Y, kern, likelihood,
                  mean_function=None,
                  num_latent=None,
+                 q_rank=None,
                  **kwargs):
         """
         X is a data matrix, size N x D
         Y is a data matrix, size N x R
         kern, likelihood, mean_function are appropriate GPflow objects
+        q_rank is None or an integer r. If set, the covariance of the whitened
+          variables is diag(q_sqrt²) + U Uᵀ with q_sqrt of size N x R and
+          U = q_factor of size R x N x r, which takes O(Nr) instead of O(N²)
+          memory. The factors are initialised deterministically to 1e-3 times
+          the first r unit vectors.
 
         """
 
@@ -62,12 +68,21 @@ class VGP(GPModel):
         Y = DataHolder(Y)
         GPModel.__init__(self, X, Y, kern, likelihood, mean_function, num_latent, **kwargs)
         self.num_data = X.shape[0]
+        self.q_rank = q_rank
+        self._init_variational_parameters()
 
+    def _init_variational_parameters(self):
         self.q_mu = Parameter(np.zeros((self.num_data, self.num_latent)))
-        q_sqrt = np.array([np.eye(self.num_data)
-                           for _ in range(self.num_latent)])
-        transform = transforms.LowerTriangular(self.num_data, self.num_latent)
-        self.q_sqrt = Parameter(q_sqrt, transform=transform)
+        if self.q_rank is None:
+            q_sqrt = np.array([np.eye(self.num_data)
+                               for _ in range(self.num_latent)])
+            transform = transforms.LowerTriangular(self.num_data, self.num_latent)
+            self.q_sqrt = Parameter(q_sqrt, transform=transform)
+        else:
+            self.q_sqrt = Parameter(np.ones((self.num_data, self.num_latent)), transforms.positive)
+            # small distinct unit factors, zero factors would receive zero gradients
+            q_factor = 1e-3 * np.eye(self.num_data, self.q_rank)
+            self.q_factor = Parameter(np.tile(q_factor[None], [self.num_latent, 1, 1]))
 
     def compile(self, session=None):
         """
@@ -79,12 +94,14 @@ class VGP(GPModel):
         """
         if not self.num_data == self.X.shape[0]:
             self.num_data = self.X.shape[0]
-            self.q_mu = Parameter(np.zeros((self.num_data, self.num_latent)))
-            self.q_sqrt = Parameter(np.eye(self.num_data)[:, :, None] *
-                                    np.ones((1, 1, self.num_latent)))
+            self._init_variational_parameters()
 
         return super(VGP, self).compile(session=session)
 
+    @params_as_tensors
+    def _q_factor(self):
+        return self.q_factor if self.q_rank is not None else None
+
     @params_as_tensors
     def _build_likelihood(self):
         """
@@ -100,7 +117,7 @@ class VGP(GPModel):
         """
 
         # Get prior KL.
-        KL = gauss_kl(self.q_mu, self.q_sqrt)
+        KL = gauss_kl(self.q_mu, self.q_sqrt, q_factor=self._q_factor())
 
         # Get conditionals
         K = self.kern.K(self.X) + tf.eye(self.num_data, dtype=settings.float_type) * \
@@ -109,14 +126,19 @@ class VGP(GPModel):
 
         fmean = tf.matmul(L, self.q_mu) + self.mean_function(self.X)  # NN,ND->ND
 
-        q_sqrt_dnn = tf.matrix_band_part(self.q_sqrt, -1, 0)  # D x N x N
+        if self.q_rank is None:
+            q_sqrt_dnn = tf.matrix_band_part(self.q_sqrt, -1, 0)  # D x N x N
 
-        L_tiled = tf.tile(tf.expand_dims(L, 0), tf.stack([self.num_latent, 1, 1]))
+            L_tiled = tf.tile(tf.expand_dims(L, 0), tf.stack([self.num_latent, 1, 1]))
 
-        LTA = tf.matmul(L_tiled, q_sqrt_dnn)  # D x N x N
-        fvar = tf.reduce_sum(tf.square(LTA), 2)
+            LTA = tf.matmul(L_tiled, q_sqrt_dnn)  # D x N x N
+            fvar = tf.reduce_sum(tf.square(LTA), 2)
 
-        fvar = tf.transpose(fvar)
+            fvar = tf.transpose(fvar)
+        else:
+            fvar = tf.matmul(tf.square(L), tf.square(self.q_sqrt))  # N x D
+            LU = tf.tensordot(L, self.q_factor, [[1], [1]])  # N x D x r
+            fvar = fvar + tf.reduce_sum(tf.square(LU), 2)
 
         # Get variational expectations.
         var_exp = self.likelihood.variational_expectations(fmean, fvar, self.Y)
@@ -125,8 +147,8 @@ class VGP(GPModel):
 
     @params_as_tensors
     def _build_predict(self, Xnew, full_cov=False):
-        mu, var = conditional(Xnew, self.X, self.kern, self.q_mu,
-                              q_sqrt=self.q_sqrt, full_cov=full_cov, white=True)
+        mu, var = conditional(Xnew, self.X, self.kern, self.q_mu, q_sqrt=self.q_sqrt,
+                              q_factor=self._q_factor(), full_cov=full_cov, white=True)
         return mu + self.mean_function(Xnew), var
 
 
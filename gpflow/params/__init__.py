@@ -17,5 +17,6 @@
 from .parameter import Parameter
 from .dataholders import DataHolder
 from .dataholders import Minibatch
+from .dataholders import IndexedMinibatch
 from .parameterized import Parameterized
 from .paramlist import ParamList
@@ -17,6 +17,7 @@
 # limitations under the License.
 
 
+import numpy as np
 import tensorflow as tf
 
 from .. import misc
@@ -138,18 +139,37 @@ class Minibatch(DataHolder):
         mini.read_value(session=session2) # <<< works fine.
     ```
 
+    The batches are assembled by gathering rows of the data at the indices of
+    a random permutation, which is redrawn every epoch. Unlike a shuffle
+    buffer, this does not keep a second copy of the data. With `prefetch`
+    the next batches are prepared in the background while the current
+    gradient step runs, and `num_parallel_calls` batches are assembled
+    concurrently. An optional `transform` is applied to every batch inside
+    the input pipeline, e.g. standardisation of the inputs:
+
+    ```
+    mini = gpflow.Minibatch(X, batch_size=100, prefetch=2, num_parallel_calls=4,
+                            transform=lambda x: (x - X.mean(0)) / X.std(0))
+    ```
+
     :param value: Numpy array.
     :param batch_size: Size of the batches.
     :param shuffle: If `True` then input data will be shuffled before batching.
     :param seed: Seed value for TensorFlow random generator.
     :param dtype: Type of new minibatch.
     :param name: Minibatch name.
+    :param prefetch: Number of batches prepared ahead of time, zero turns
+        prefetching off.
+    :param num_parallel_calls: Number of batches assembled in parallel.
+    :param transform: None or function mapping a batch tensor to a tensor of
+        the same type and row shape.
 
     :raises: ValueError exception if input value is not a numpy array or a list.
     """
 
     def __init__(self, value, batch_size=1, shuffle=True,
-                 seed=None, dtype=None, name=None):
+                 seed=None, dtype=None, name=None,
+                 prefetch=1, num_parallel_calls=1, transform=None):
         if not misc.is_valid_param_value(value) or misc.is_tensor(value):
             raise ValueError('The value must be either an array or a scalar.')
 
@@ -158,6 +178,9 @@ class Minibatch(DataHolder):
         self._batch_size = batch_size
         self._shuffle = shuffle
         self._seed = seed
+        self._prefetch = prefetch
+        self._num_parallel_calls = num_parallel_calls
+        self._transform = transform
 
     @property
     def batch_size(self):
@@ -213,13 +236,25 @@ class Minibatch(DataHolder):
     def _build_dataholder(self, initial_tensor):
         if initial_tensor is None:
             raise GPflowError("Minibatch state corrupted.")
-        data = tf.data.Dataset.from_tensor_slices(initial_tensor)
-        data = data.repeat()
+        num_data = tf.shape(initial_tensor, out_type=tf.int64)[0]
         if self._shuffle:
-            shape = self._value.shape
-            data = data.shuffle(buffer_size=shape[0], seed=self._seed)
+            seed = self._seed
+            epochs = tf.data.Dataset.from_tensors(num_data).repeat()
+            indices = epochs.flat_map(lambda n: tf.data.Dataset.from_tensor_slices(
+                tf.random_shuffle(tf.range(n), seed=seed)))
+        else:
+            indices = tf.data.Dataset.range(num_data).repeat()
         self._batch_size_tensor = tf.placeholder(tf.int64, shape=())
-        data = data.batch(batch_size=self._batch_size_tensor)
+        data = indices.batch(batch_size=self._batch_size_tensor)
+        data = data.map(lambda index: tf.gather(initial_tensor, index),
+                        num_parallel_calls=self._num_parallel_calls)
+        return self._build_iterator(data)
+
+    def _build_iterator(self, data):
+        if self._transform is not None:
+            data = data.map(self._transform, num_parallel_calls=self._num_parallel_calls)
+        if self._prefetch:
+            data = data.prefetch(self._prefetch)
         self._iterator_tensor = data.make_initializable_iterator()
         name = self._parameter_name()
         return self._iterator_tensor.get_next(name=name)
@@ -232,9 +267,98 @@ class Minibatch(DataHolder):
         self._shuffle = True
         self._batch_size = 1
         self._seed = None
+        self._prefetch = 1
+        self._num_parallel_calls = 1
+        self._transform = None
 
     def _parameter_name(self):
         name = 'minibatch'
         if self.parent is self:
             return misc.tensor_name(self.tf_pathname, name)
         return name
+
+
+class IndexedMinibatch(Minibatch):
+    """
+    IndexedMinibatch is a minibatch which reads the batches by index from an
+    array-like source, e.g. `np.memmap` or `h5py.Dataset`, instead of copying
+    the whole array into the TensorFlow runtime. Only the current batch is
+    loaded into memory, so the dataset can be larger than RAM.
+
+    The indices are drawn by a NumPy random state seeded with `seed` and are
+    sorted within each batch, as h5py requires increasing indices. Therefore
+    minibatches with the same length and seed read the same rows, which keeps
+    inputs and outputs aligned.
+
+    ```
+    X = np.memmap('X.dat', dtype=np.float64, mode='r', shape=(N, D))
+    with h5py.File('Y.h5', 'r') as f:
+        mX = gpflow.IndexedMinibatch(X, batch_size=100, seed=0)
+        mY = gpflow.IndexedMinibatch(f['Y'], batch_size=100, seed=0)
+    ```
+
+    :param value: Array-like object with `shape` and `dtype` attributes which
+        supports indexing of the zero axis by an increasing index array.
+    :param batch_size: Size of the batches.
+    :param shuffle: If `True` then rows are visited in random order.
+    :param seed: Seed value for NumPy random generator.
+    :param dtype: Type of new minibatch, by default the type of the source.
+    :param name: Minibatch name.
+    :param prefetch: Number of batches read ahead of time.
+    :param transform: None or function applied to every batch tensor.
+
+    :raises: ValueError exception if input value is not array-like.
+    """
+
+    def __init__(self, value, batch_size=1, shuffle=True,
+                 seed=None, dtype=None, name=None, prefetch=1, transform=None):
+        if not hasattr(value, 'shape') or not hasattr(value, 'dtype') or not value.shape:
+            raise ValueError('The value must be an array-like object with at least one axis.')
+        self._source = value
+        dtype = value.dtype if dtype is None else dtype
+        # the parameter value only keeps the shape of a row and the data type
+        empty = np.empty((0,) + tuple(value.shape[1:]), dtype=dtype)
+        super().__init__(empty, batch_size=batch_size, shuffle=shuffle, seed=seed,
+                         name=name, prefetch=prefetch, transform=transform)
+
+    @property
+    def shape(self):
+        return (self._source.shape[0],) + self._value.shape[1:]
+
+    @property
+    def initializable_feeds(self):
+        return {}
+
+    def read_value(self, session=None):
+        if session is not None and self.is_built_coherence(session.graph) is Build.YES:
+            return super().read_value(session=session)
+        return self._source
+
+    def assign(self, value, session=None, dtype=None, force=True):
+        raise GPflowError('IndexedMinibatch cannot be assigned, it reads from its source.')
+
+    def _build(self):
+        self._dataholder_tensor = self._build_dataholder(None)
+
+    def _build_dataholder(self, _initial_tensor):
+        shape = tf.TensorShape((None,) + self._value.shape[1:])
+        data = tf.data.Dataset.from_generator(self._batches, tf.as_dtype(self.dtype), shape)
+        return self._build_iterator(data)
+
+    def _batches(self):
+        """
+        Generates the batches, it restarts whenever the iterator is
+        initialized and then uses the current batch size.
+        """
+        num_data = self.shape[0]
+        batch_size = self._batch_size
+        random_state = np.random.RandomState(self._seed)
+        index = np.empty(0, dtype=np.int64)
+        while True:
+            while index.size < batch_size:
+                order = random_state.permutation(num_data) if self._shuffle else np.arange(num_data)
+                index = np.concatenate([index, order])
+            batch, index = index[:batch_size], index[batch_size:]
+            # batches across epochs may repeat rows, which are read once
+            rows, inverse = np.unique(batch, return_inverse=True)
+            yield np.asarray(self._source[rows], dtype=self.dtype)[inverse]
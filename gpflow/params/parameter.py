@@ -130,6 +130,8 @@ class Parameter(Node):
             elif self.value == self.TRANSFORM.value:
                 return ITransform
 
+    __global_revision = 0
+
     def __init__(self, value, transform=None, prior=None,
                  trainable=True, dtype=None, fix_shape=True,
                  name=None):
@@ -141,6 +143,7 @@ class Parameter(Node):
         self._init_parameter_defaults()
         self._init_parameter_attributes(prior, transform, trainable)
         self._init_parameter_value(value)
+        self._revision = Parameter._next_revision()
 
     @property
     def shape(self):
@@ -209,6 +212,15 @@ class Parameter(Node):
         """
         return self.read_value()
 
+    @property
+    def revision(self):
+        """
+        Monotonically increasing counter which changes whenever a new value is
+        assigned to the parameter. Caches computed from parameter values can
+        compare revisions to find out that they became stale.
+        """
+        return self._revision
+
     @property
     def is_initialized_tensor(self):
         """
@@ -278,6 +290,7 @@ class Parameter(Node):
         if self.is_built_coherence() is Build.YES:
             session = self.enquire_session(session)
             self.initialize(session=session, force=force)
+        self._revision = Parameter._next_revision()
 
     def read_value(self, session=None):
         if session is not None and not isinstance(session, tf.Session):
@@ -446,6 +459,11 @@ class Parameter(Node):
     def _read_parameter_tensor(self, session):
         return session.run(self.constrained_tensor)
 
+    @classmethod
+    def _next_revision(cls):
+        Parameter.__global_revision += 1
+        return Parameter.__global_revision
+
     def _apply_transform(self, value):
         return self.transform.backward(value)
 
@@ -18,7 +18,6 @@
 
 
 import tensorflow as tf
-import pandas as pd
 
 from ..core.errors import GPflowError
 from ..core.compilable import Build
@@ -133,6 +132,16 @@ class Parameterized(Node):
             elif isinstance(param, DataHolder):
                 yield param
 
+    @property
+    def revision(self):
+        """
+        The most recent revision among all parameters and data holders of this
+        object. It changes whenever any of them gets a new value via `assign`.
+        """
+        revisions = [param.revision for param in self.parameters]
+        revisions += [holder.revision for holder in self.data_holders]
+        return max(revisions, default=0)
+
     @property
     def trainable_parameters(self):
         for parameter in self.parameters:
@@ -208,10 +217,12 @@ class Parameterized(Node):
                 data_holder.fix_shape()
 
     def assign(self, values, session=None, force=True):
-        if not isinstance(values, (dict, pd.Series)):
-            raise ValueError('Input values must be either dictionary or panda '
-                             'Series data structure.')
-        if isinstance(values, pd.Series):
+        if not isinstance(values, dict):
+            # a pandas Series implies that pandas is imported already
+            import pandas as pd
+            if not isinstance(values, pd.Series):
+                raise ValueError('Input values must be either dictionary or panda '
+                                 'Series data structure.')
             values = values.to_dict()
         params = {param.pathname: param for param in self.parameters}
         val_keys = set(values.keys())
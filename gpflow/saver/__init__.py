@@ -16,4 +16,6 @@
 from .saver import Saver
 from .saver import SaverContext
 from .coders import CoderDispatcher
-from .serializers import HDF5Serializer
\ No newline at end of file
+from .serializers import HDF5Serializer
+from .serializers import ChunkedHDF5Serializer
+from .serializers import LazyValues
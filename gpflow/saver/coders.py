@@ -28,6 +28,12 @@ Standard coders can encode/decode:
 * Numpy array and scalar.
 * Function, except lambda and class methods.
 
+Serializers which store parameter values outside of the encoded structure,
+e.g. `ChunkedHDF5Serializer`, register a dictionary under the
+`EXTERNAL_ARRAYS` key of the context's shared data. The parameter values are
+then collected there as `ExternalArray` records and only their keys are
+encoded.
+
 """
 
 import abc
@@ -42,7 +48,8 @@ import numpy as np
 import tensorflow as tf
 
 from ..core import AutoFlow, Node
-from ..params import Parameter, Parameterized, ParamList
+from ..params import Parameter, Parameterized, ParamList, DataHolder
+from ..models.posterior import Posterior
 from ..priors import Prior
 from ..transforms import Transform
 from .context import BaseContext, Contexture
@@ -62,11 +69,15 @@ class StructField(Enum):
 
 class StructType(Enum):
     """Custom np.dtype values for '__type__' field."""
-    OBJECT, DICT, LIST, FUNCTION, SLICE = range(0, 5)
+    OBJECT, DICT, LIST, FUNCTION, SLICE, EXTERNAL = range(0, 6)
 
 
 NoneType = type(None)
 
+EXTERNAL_ARRAYS = 'external_arrays'
+
+ExternalArray = namedtuple('ExternalArray', ['key', 'value', 'pathname', 'data_holder'])
+
 PrimitiveType = Union[str, int, float, bool,
                       np.string_, np.bytes_,
                       np.ndarray, np.bool_,
@@ -334,6 +345,30 @@ class SliceCoder(StructCoder):
         return slice(*map(try_decode, data))
 
 
+class ExternalArrayCoder(StructCoder):
+    """External array coder encodes the key of a value, which the serializer
+    stores separately, and decodes it to the value read by the serializer.
+    {
+        '__type__': StructType.EXTERNAL.value,
+        '__data__': <key>
+    }."""
+
+    @classmethod
+    def decoding_type(cls):
+        return StructType.EXTERNAL.value
+
+    @classmethod
+    def encoding_type(cls):
+        return ExternalArray
+
+    def encode(self, item: ExternalArray):
+        return self.struct(self.decoding_type(), np.string_(item.key))
+
+    def decode(self, item: np.ndarray):
+        key = _convert_to_string(item[StructField.DATA.value])
+        return self.context.shared_data[EXTERNAL_ARRAYS][key].value
+
+
 class FunctionCoder(StructCoder):
     """Function coder is able to encode only importable functions.
     Lambdas, class methods and static methods as well can not be encoded.
@@ -505,9 +540,28 @@ class ParameterCoder(NodeCoder):
         session = self.context.session
         values = super()._take_values(item)
         cached_value = np.array(item.read_value(session=session))
-        values['_value'] = cached_value
+        values['_value'] = self._take_array(item, cached_value)
+        values.pop('_revision', None)
         return values
 
+    def _take_array(self, item: Parameter, value: np.ndarray):
+        """Registers the value as an external array when the serializer
+        stores arrays separately, otherwise returns it unchanged.
+
+        :param item: GPflow parameter.
+        :param value: numpy value of the parameter.
+        :return: ExternalArray record or the value."""
+
+        arrays = self.context.shared_data.get(EXTERNAL_ARRAYS)
+        if arrays is None:
+            return value
+        key = item.pathname
+        if key in arrays:
+            key = '{}_{}'.format(key, len(arrays))
+        array = ExternalArray(key, value, item.pathname, isinstance(item, DataHolder))
+        arrays[key] = array
+        return array
+
     def _take_extras(self, item: Parameter) -> Optional[bool]:
         """Return either this GPflow objects requires compilation at decoding time.
 
@@ -524,6 +578,7 @@ class ParameterCoder(NodeCoder):
 
     def _decode_object(self, item: np.ndarray, attributes: DictBasicType) -> Parameter:
         instance = super()._decode_object(item, attributes)
+        instance._revision = Parameter._next_revision()  # pylint: disable=W0212
         extra = item[StructField.EXTRA.value]
         extra = CoderDispatcher(self.context).decode(extra)
         if extra and self.context.autocompile:
@@ -539,13 +594,15 @@ class ParameterizedCoder(NodeCoder):
         return Parameterized
 
     def _take_values(self, item: Parameterized) -> DictBasicType:
-        """Uses super()._take_values() method and removes autoflow cache in-place.
+        """Uses super()._take_values() method and removes autoflow and posterior
+        caches in-place.
 
         :param item: GPflow parameterized object.
         :return: dictionary snapshot of the parameter object."""
 
         values = super()._take_values(item)
         values = {k: v for k, v in values.items() if not k.startswith(AutoFlow.__autoflow_prefix__)}
+        values = {k: (None if isinstance(v, Posterior) else v) for k, v in values.items()}
         return values
 
     def _decode_object(self, item: np.ndarray, attributes: DictBasicType) -> Parameterized:
@@ -593,6 +650,7 @@ class CoderDispatcher(BaseCoder):
                 ListCoder,
                 DictCoder,
                 SliceCoder,
+                ExternalArrayCoder,
                 ParameterCoder,
                 ParamListCoder,
                 ParameterizedCoder,
@@ -15,7 +15,6 @@
 
 from datetime import datetime
 
-import h5py
 import numpy as np
 import tensorflow as tf
 
@@ -33,14 +32,34 @@ class SaverContext(BaseContext):
 class Saver:
     def save(self, pathname, target, context=None):
         context = Saver.__get_context(context)
+        # the serializer is created first, as it may change how values are encoded
+        serializer = context.serializer(context)
         encoded_target = CoderDispatcher(context).encode(target)
-        context.serializer(context).dump(pathname, encoded_target)
+        serializer.dump(pathname, encoded_target)
 
     def load(self, pathname, context=None):
         context = Saver.__get_context(context)
         encoded_target = context.serializer(context).load(pathname)
         return CoderDispatcher(context).decode(encoded_target)
 
+    def load_values(self, pathname, prefix=None, data_holders=True, lazy=False, context=None):
+        """
+        Reads the values of parameters and data holders by their path names
+        without restoring the saved object, e.g. to assign them to an existing
+        model. It requires a serializer which stores values separately, like
+        `ChunkedHDF5Serializer`.
+
+        :param prefix: None or path name of the subtree to read, e.g. 'GPR/kern'.
+        :param data_holders: Whether to read the values of data holders.
+        :param lazy: Whether to return array-like objects which read on access.
+            The result then has to be closed, see `LazyValues`.
+        :return: Dictionary of values by path name, see the serializer's
+            `load_values` for details.
+        """
+        context = Saver.__get_context(context)
+        return context.serializer(context).load_values(
+            pathname, prefix=prefix, data_holders=data_holders, lazy=lazy)
+
     @staticmethod
     def __get_context(context):
         if context is None:
@@ -16,10 +16,10 @@
 import abc
 from datetime import datetime
 
-import h5py
 import numpy as np
 
 from .. import misc
+from .coders import EXTERNAL_ARRAYS, ExternalArray
 from .context import Contexture
 
 
@@ -32,17 +32,168 @@ class BaseSerializer(Contexture, metaclass=abc.ABCMeta):
     def load(self, pathname):
         pass
 
+    def load_values(self, pathname, prefix=None, data_holders=True, lazy=False):
+        raise NotImplementedError('Serializer "{}" does not support loading of selected values.'
+                                  .format(self.__class__.__name__))
+
 
 class HDF5Serializer(BaseSerializer):
     def dump(self, pathname, data):
+        import h5py
         with h5py.File(pathname) as h5file:
-            meta = h5file.create_group('meta')
-            date = datetime.now().isoformat() #TODO(@awav): py3.6 timespec='seconds'.
-            version = misc.version()
-            meta.create_dataset(name='date', data=date)
-            meta.create_dataset(name='version', data=version)
+            _dump_meta(h5file)
             h5file.create_dataset(name='data', data=data)
 
     def load(self, pathname):
+        import h5py
         with h5py.File(pathname) as h5file:
-            return h5file['data'].value
\ No newline at end of file
+            return h5file['data'].value
+
+
+class ChunkedHDF5Serializer(BaseSerializer):
+    """
+    Stores the value of every parameter and data holder in its own chunked
+    and compressed HDF5 dataset, while the encoded structure of the saved
+    object keeps only the keys of the values and remains small. The datasets
+    are arranged by the parameters' path names, e.g. `arrays/GPR/kern/variance`,
+    so that values of subtrees can be read selectively by `load_values`
+    without decoding the object.
+
+    ```
+    context = gpflow.SaverContext(serializer=ChunkedHDF5Serializer)
+    gpflow.Saver().save('/tmp/model.h5', m, context=context)
+    # parameters only, the data holders are not read
+    values = gpflow.Saver().load_values('/tmp/model.h5', data_holders=False, context=context)
+    m.assign(values)
+    ```
+
+    Options are passed with `functools.partial`, e.g.
+    `SaverContext(serializer=partial(ChunkedHDF5Serializer, compression='lzf', compression_opts=None))`.
+
+    :param context: Saver context.
+    :param compression: HDF5 compression filter.
+    :param compression_opts: Options of the compression filter.
+    :param chunks: Chunk shape or True for automatic chunking by h5py.
+    """
+
+    def __init__(self, context, compression='gzip', compression_opts=4, chunks=True):
+        super().__init__(context)
+        self.compression = compression
+        self.compression_opts = compression_opts
+        self.chunks = chunks
+        context.shared_data[EXTERNAL_ARRAYS] = {}
+
+    def dump(self, pathname, data):
+        import h5py
+        with h5py.File(pathname, 'w') as h5file:
+            _dump_meta(h5file)
+            h5file.create_dataset(name='index', data=data)
+            group = h5file.create_group('arrays')
+            for array in self.context.shared_data[EXTERNAL_ARRAYS].values():
+                options = {}
+                if array.value.shape and array.value.size:
+                    options = dict(chunks=self.chunks, compression=self.compression,
+                                   compression_opts=self.compression_opts, shuffle=True)
+                dataset = group.create_dataset(array.key, data=array.value, **options)
+                dataset.attrs['pathname'] = array.pathname
+                dataset.attrs['data_holder'] = array.data_holder
+
+    def load(self, pathname):
+        import h5py
+        arrays = self.context.shared_data[EXTERNAL_ARRAYS]
+        with h5py.File(pathname, 'r') as h5file:
+            for key, dataset in _datasets(h5file['arrays']):
+                arrays[key] = _external_array(key, dataset, np.asarray(dataset[()]))
+            return h5file['index'][()]
+
+    def load_values(self, pathname, prefix=None, data_holders=True, lazy=False):
+        """
+        Reads the values of the parameters and data holders in a subtree of
+        the saved object without decoding it.
+
+        :param pathname: Path of the file.
+        :param prefix: None or path name of the subtree, e.g. 'GPR/kern'.
+        :param data_holders: Whether to read the values of data holders.
+        :param lazy: Whether to return `h5py.Dataset` objects instead of numpy
+            arrays. The datasets read from the open file on access, e.g. as
+            sources of `IndexedMinibatch`, and the file is closed by closing
+            the returned `LazyValues`.
+        :return: Dictionary of values by key, which can be assigned to a model
+            by `Parameterized.assign`. The key is the path name of the value,
+            unless several saved values share a path name, e.g. the values of
+            two models with the same name, which are distinguished by suffixes.
+            `LazyValues` if `lazy` is True.
+        """
+        import h5py
+        h5file = h5py.File(pathname, 'r')
+        values = LazyValues(h5file) if lazy else {}
+        try:
+            group = h5file['arrays'] if prefix is None else h5file['arrays'][prefix]
+            for key, dataset in _datasets(group):
+                array = _external_array(key, dataset, dataset if lazy else np.asarray(dataset[()]))
+                if data_holders or not array.data_holder:
+                    values[key] = array.value
+        except Exception:
+            h5file.close()
+            raise
+        if not lazy:
+            h5file.close()
+        return values
+
+
+class LazyValues(dict):
+    """
+    Dictionary of the `h5py.Dataset` values returned by `load_values` with
+    `lazy=True`. The datasets read from the file, which stays open until
+    `close` is called or the `with` block is left.
+
+    ```
+    with saver.load_values('/tmp/model.h5', lazy=True, context=context) as values:
+        X = values['GPR/X'][:100]
+    ```
+    """
+
+    def __init__(self, h5file):
+        super().__init__()
+        self.file = h5file
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _dump_meta(h5file):
+    meta = h5file.create_group('meta')
+    date = datetime.now().isoformat() #TODO(@awav): py3.6 timespec='seconds'.
+    version = misc.version()
+    meta.create_dataset(name='date', data=date)
+    meta.create_dataset(name='version', data=version)
+
+
+def _datasets(group):
+    """Yields the datasets below the group with their keys, i.e. their path
+    relative to the 'arrays' group."""
+    import h5py
+    if isinstance(group, h5py.Dataset):
+        yield group.name.split('/', 2)[-1], group
+        return
+    datasets = []
+
+    def visit(_name, obj):
+        if isinstance(obj, h5py.Dataset):
+            datasets.append((obj.name.split('/', 2)[-1], obj))
+
+    group.visititems(visit)
+    yield from datasets
+
+
+def _external_array(key, dataset, value):
+    pathname = dataset.attrs['pathname']
+    if isinstance(pathname, bytes):
+        pathname = pathname.decode('utf-8')
+    return ExternalArray(key, value, pathname, bool(dataset.attrs['data_holder']))
@@ -6,4 +6,6 @@ from .natgrad_optimizer import XiTransform
 from .natgrad_optimizer import XiNat
 from .natgrad_optimizer import XiSqrtMeanVar
 from .natgrad_optimizer import NatGradOptimizer
+from .data_parallel import DataParallelOptimizer
+from .data_parallel import DistributedSGPROptimizer
 from .tensorflow_optimizer import *
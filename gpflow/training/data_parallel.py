@@ -0,0 +1,531 @@
+# Copyright 2018 the GPflow authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import multiprocessing
+import queue
+import traceback
+
+import numpy as np
+import tensorflow as tf
+
+from . import optimizer
+from .. import settings
+from ..core.errors import GPflowError
+from ..models.model import Model
+from ..models.sgpr import SGPR
+
+
+class DataParallelOptimizer(optimizer.Optimizer):
+    """
+    Data-parallel training with several worker processes, for models whose
+    objective is an unbiased stochastic estimate, such as SVGP with
+    minibatches. The rows of X and Y are split into `num_workers` shards and
+    each worker builds its own copy of the model on its shard in a separate
+    process, graph and session. Workers compute the gradients of the
+    objective with respect to the unconstrained parameters and the calling
+    process, which holds the single copy of the parameters, applies Adam
+    updates to them in shared memory.
+
+    With `staleness=0` the updates are synchronous: every step averages one
+    gradient of each worker. Otherwise every gradient is applied as soon as it
+    arrives, and a worker may run at most `staleness` steps ahead of the
+    slowest one (stale synchronous parallel), so no gradient is computed at
+    parameters which are too old.
+
+    The workers are started with the `spawn` method, so `model_factory` must
+    be picklable, i.e. a module-level function, and scripts must guard the
+    training with `if __name__ == '__main__'`. It is called as
+    `model_factory(X, Y, num_data)` with the worker's shard and the total
+    number of rows, and must return a model with the same trainable
+    parameters as the model passed to `minimize`. For SVGP, `num_data` must
+    be passed on to the model, so that the shard's objective estimates the
+    full objective:
+
+    ```
+    def make_svgp(X, Y, num_data):
+        return gpflow.models.SVGP(X, Y, gpflow.kernels.RBF(1), gpflow.likelihoods.Gaussian(),
+                                  Z=np.linspace(-3, 3, 20)[:, None], minibatch_size=100,
+                                  num_data=num_data)
+
+    opt = gpflow.train.DataParallelOptimizer(make_svgp, X, Y, num_workers=4, learning_rate=0.01)
+    opt.minimize(make_svgp(X, Y, len(X)), maxiter=1000)
+    ```
+
+    :param model_factory: Function building a worker's model, see above.
+    :param X: Inputs, N x D array.
+    :param Y: Outputs, N x R array.
+    :param num_workers: Number of worker processes K.
+    :param learning_rate: Adam step size.
+    :param beta1: Adam decay rate of the first moment estimates.
+    :param beta2: Adam decay rate of the second moment estimates.
+    :param epsilon: Adam stabilising constant.
+    :param staleness: Maximum number of steps a worker may run ahead of the
+        slowest worker, zero for synchronous updates.
+    :param num_threads: Number of TensorFlow threads of each worker.
+    """
+
+    def __init__(self, model_factory, X, Y, num_workers=2, learning_rate=0.001,
+                 beta1=0.9, beta2=0.999, epsilon=1e-8, staleness=0, num_threads=1):
+        if np.shape(X)[0] != np.shape(Y)[0]:
+            raise ValueError('X and Y must have the same number of rows.')
+        if num_workers < 1 or num_workers > np.shape(X)[0]:
+            raise ValueError('The number of workers must be between one and the number of rows.')
+        if staleness < 0:
+            raise ValueError('The staleness bound must be non-negative.')
+        super().__init__()
+        self._model_factory = model_factory
+        self._X = X
+        self._Y = Y
+        self._num_workers = num_workers
+        self._adam_args = dict(learning_rate=learning_rate, beta1=beta1,
+                               beta2=beta2, epsilon=epsilon)
+        self._staleness = staleness
+        self._num_threads = num_threads
+
+    @property
+    def num_workers(self):
+        return self._num_workers
+
+    @property
+    def staleness(self):
+        return self._staleness
+
+    def make_optimize_tensor(self, model, session=None, var_list=None, **kwargs):
+        raise NotImplementedError('Data-parallel updates are applied outside of TensorFlow.')
+
+    def minimize(self, model, session=None, var_list=None, feed_dict=None,
+                 maxiter=1000, initialize=False, anchor=True, **kwargs):
+        """
+        Minimizes the objective of the model and assigns the trained values to
+        its trainable parameters.
+
+        :param model: GPflow model holding the parameters, it is not evaluated.
+        :param session: Session from which the initial parameter values are read.
+        :param var_list: Not supported, must be None.
+        :param feed_dict: Not supported, must be None.
+        :param maxiter: Number of gradients computed by each worker.
+        :param initialize: Ignored, the workers always initialize their copies.
+        :param anchor: Ignored, the trained values are always assigned.
+        :param kwargs: Not supported.
+        """
+        if model is None or not isinstance(model, Model):
+            raise ValueError('The `model` argument must be a GPflow model.')
+        if var_list is not None or feed_dict is not None or kwargs:
+            raise ValueError('Data-parallel optimization trains exactly the model parameters.')
+
+        session = model.enquire_session(session)
+        parameters = list(model.trainable_parameters)
+        theta, shapes = _pack_parameters(parameters, session)
+        size = theta.size
+
+        context = multiprocessing.get_context('spawn')
+        shared_theta = _shared_array(context, theta)
+        shared_gradients = _shared_array(context, np.zeros((self._num_workers, size)))
+        theta = np.frombuffer(shared_theta, dtype=np.float64)
+        gradients = np.frombuffer(shared_gradients, dtype=np.float64).reshape(self._num_workers, size)
+
+        lock = context.Lock()
+        num_data = np.shape(self._X)[0]
+        worker_args = [(self._model_factory, X, Y, num_data, shapes, shared_theta,
+                        shared_gradients, lock, self._num_threads)
+                       for X, Y in _split(self._X, self._Y, self._num_workers)]
+        adam = _Adam(size, **self._adam_args)
+        with _WorkerPool(_run_worker, worker_args) as pool:
+            if self._staleness == 0:
+                for step in range(maxiter):
+                    pool.broadcast(step)
+                    adam.apply(theta, gradients.mean(0))
+            else:
+                self._run_asynchronous(pool, theta, gradients, adam, lock, maxiter)
+
+        _assign_parameters(parameters, theta, shapes, session)
+
+    def _run_asynchronous(self, pool, theta, gradients, adam, lock, maxiter):
+        clocks = np.zeros(self._num_workers, dtype=int)
+        busy = np.ones(self._num_workers, dtype=bool)
+        for worker in range(self._num_workers):
+            pool.send(worker, 0)
+        while clocks.min() < maxiter:
+            index = pool.receive()
+            busy[index] = False
+            clocks[index] += 1
+            with lock:
+                adam.apply(theta, gradients[index])
+            for worker in range(self._num_workers):
+                ahead = clocks[worker] - clocks.min()
+                if not busy[worker] and clocks[worker] < maxiter and ahead <= self._staleness:
+                    busy[worker] = True
+                    pool.send(worker, clocks[worker])
+
+
+class DistributedSGPROptimizer(optimizer.Optimizer):
+    """
+    Map-reduce training of SGPR with worker processes. The collapsed bound
+    depends on the data only through the sums
+
+        S = (Kuf Kfu, Kuf (Y - m(X)), Σ Kdiag, Σ (Y - m(X))²)
+
+    over data points, see `StreamingSGPR`. The rows of X and Y are split
+    into `num_workers` shards. For every evaluation of the objective each
+    worker computes the statistics S_k of its shard, and the calling process
+    sums them and evaluates the exact bound f(Σ_k S_k) together with its
+    gradients with respect to the parameters and to S. The gradient is
+    completed by the workers, which compute the vector-Jacobian products of
+    ∂f/∂S with their statistics, so each evaluation costs O(NM²/K) time per
+    worker and O(M³) in the calling process. The objective and its gradient
+    are passed to `scipy.optimize.minimize`, as in `ScipyOptimizer`.
+
+    The workers are started with the `spawn` method, so `model_factory` must
+    be picklable, i.e. a module-level function, and scripts must guard the
+    training with `if __name__ == '__main__'`. It is called as
+    `model_factory(X, Y)` with the worker's shard and must return an SGPR
+    with the same trainable parameters as the model passed to `minimize`,
+    e.g. with `chunk_size` to bound the memory of the workers:
+
+    ```
+    def make_sgpr(X, Y):
+        return gpflow.models.SGPR(X, Y, gpflow.kernels.RBF(1), Z=Z, chunk_size=10000)
+
+    opt = gpflow.train.DistributedSGPROptimizer(make_sgpr, X, Y, num_workers=8)
+    opt.minimize(make_sgpr(X[:1], Y[:1]))
+    ```
+
+    The data of the model passed to `minimize` are not used, only its
+    parameters.
+
+    :param model_factory: Function building a worker's model, see above.
+    :param X: Inputs, N x D array.
+    :param Y: Outputs, N x R array.
+    :param num_workers: Number of worker processes K.
+    :param num_threads: Number of TensorFlow threads of each worker.
+    :param kwargs: Arguments of `scipy.optimize.minimize`, e.g. `method`.
+    """
+
+    def __init__(self, model_factory, X, Y, num_workers=2, num_threads=1, **kwargs):
+        if np.shape(X)[0] != np.shape(Y)[0]:
+            raise ValueError('X and Y must have the same number of rows.')
+        if num_workers < 1 or num_workers > np.shape(X)[0]:
+            raise ValueError('The number of workers must be between one and the number of rows.')
+        super().__init__()
+        self._model_factory = model_factory
+        self._X = X
+        self._Y = Y
+        self._num_workers = num_workers
+        self._num_threads = num_threads
+        self._optimizer_kwargs = kwargs
+
+    @property
+    def num_workers(self):
+        return self._num_workers
+
+    def make_optimize_tensor(self, model, session=None, var_list=None, **kwargs):
+        raise NotImplementedError('Map-reduce objectives are evaluated outside of TensorFlow.')
+
+    def minimize(self, model, session=None, var_list=None, feed_dict=None,
+                 maxiter=1000, disp=False, initialize=False, anchor=True, **kwargs):
+        """
+        Minimizes the objective of the SGPR model on X and Y and assigns the
+        optimal values to its trainable parameters.
+
+        :param model: SGPR model holding the parameters.
+        :param session: Session of the model.
+        :param var_list: Not supported, must be None.
+        :param feed_dict: Not supported, must be None.
+        :param maxiter: Maximum number of iterations of the SciPy optimizer.
+        :param disp: Set to True to print convergence messages.
+        :param initialize: Ignored, the workers always initialize their copies.
+        :param anchor: Ignored, the optimal values are always assigned.
+        :param kwargs: Extra options of the SciPy optimizer.
+        :return: `scipy.optimize.OptimizeResult`.
+        """
+        if model is None or not isinstance(model, SGPR):
+            raise ValueError('The `model` argument must be an SGPR model.')
+        if var_list is not None or feed_dict is not None:
+            raise ValueError('Map-reduce optimization trains exactly the model parameters.')
+
+        session = model.enquire_session(session)
+        parameters = list(model.trainable_parameters)
+        theta, shapes = _pack_parameters(parameters, session)
+        variables = [p.unconstrained_tensor for p in parameters]
+        num_inducing = len(model.feature)
+        output_dim = np.shape(self._Y)[1]
+        statistics_shapes = [(num_inducing, num_inducing), (num_inducing, output_dim), (), ()]
+        statistics_size = sum(int(np.prod(shape)) for shape in statistics_shapes)
+
+        with session.graph.as_default():
+            statistics = [tf.placeholder(settings.float_type, shape) for shape in statistics_shapes]
+            num_data = tf.constant(np.shape(self._X)[0], dtype=settings.float_type)
+            bound = model._build_likelihood_from_statistics(*statistics, num_data)
+            objective = model._build_objective(bound, model.prior_tensor)
+            gradient_tensors = _gradients(objective, statistics + variables)
+
+        context = multiprocessing.get_context('spawn')
+        shared_theta = _shared_array(context, theta)
+        shared_adjoint = _shared_array(context, np.zeros(statistics_size))
+        shared_statistics = _shared_array(context, np.zeros((self._num_workers, statistics_size)))
+        shared_gradients = _shared_array(context, np.zeros((self._num_workers, theta.size)))
+        theta = np.frombuffer(shared_theta, dtype=np.float64)
+        adjoint = np.frombuffer(shared_adjoint, dtype=np.float64)
+        worker_statistics = np.frombuffer(shared_statistics, dtype=np.float64)
+        worker_statistics = worker_statistics.reshape(self._num_workers, statistics_size)
+        worker_gradients = np.frombuffer(shared_gradients, dtype=np.float64)
+        worker_gradients = worker_gradients.reshape(self._num_workers, theta.size)
+        worker_args = [(self._model_factory, X, Y, shapes, statistics_shapes, shared_theta,
+                        shared_adjoint, shared_statistics, shared_gradients, self._num_threads)
+                       for X, Y in _split(self._X, self._Y, self._num_workers)]
+
+        with _WorkerPool(_run_statistics_worker, worker_args) as pool:
+            def evaluate(x):
+                theta[:] = x
+                _load_variables(variables, theta, shapes, session)
+                pool.broadcast('statistics')
+                values = _unpack(worker_statistics.sum(0), statistics_shapes)
+                feed = dict(zip(statistics, values))
+                result = session.run([objective] + gradient_tensors, feed_dict=feed)
+                adjoint[:] = _flatten(result[1:len(statistics) + 1])
+                pool.broadcast('gradient')
+                gradient = _flatten(result[len(statistics) + 1:]) + worker_gradients.sum(0)
+                return result[0], gradient
+
+            optimizer_kwargs = self._optimizer_kwargs.copy()
+            options = optimizer_kwargs.pop('options', {}).copy()
+            options.update(kwargs)
+            options.update(maxiter=maxiter, disp=disp)
+            optimizer_kwargs.setdefault('method', 'L-BFGS-B')
+            import scipy.optimize
+            result = scipy.optimize.minimize(evaluate, theta.copy(), jac=True,
+                                             options=options, **optimizer_kwargs)
+
+        _assign_parameters(parameters, result.x, shapes, session)
+        return result
+
+
+class _Adam:
+    """
+    Adam updates of a parameter vector in place, with the same bias
+    correction as `tf.train.AdamOptimizer`.
+    """
+
+    def __init__(self, size, learning_rate, beta1, beta2, epsilon):
+        self.learning_rate = learning_rate
+        self.beta1 = beta1
+        self.beta2 = beta2
+        self.epsilon = epsilon
+        self.m = np.zeros(size)
+        self.v = np.zeros(size)
+        self.t = 0
+
+    def apply(self, theta, gradient):
+        self.t += 1
+        self.m = self.beta1 * self.m + (1. - self.beta1) * gradient
+        self.v = self.beta2 * self.v + (1. - self.beta2) * np.square(gradient)
+        step = self.learning_rate * np.sqrt(1. - self.beta2 ** self.t) / (1. - self.beta1 ** self.t)
+        theta -= step * self.m / (np.sqrt(self.v) + self.epsilon)
+
+
+class _WorkerPool:
+    """
+    Worker processes started with `spawn`, which run
+    `target(index, *args, permit, done)`. Tasks are sent to the permit queue
+    of a worker and the workers report finished tasks, or the traceback of an
+    exception, on the common done queue. A `None` task stops a worker.
+    """
+
+    def __init__(self, target, worker_args):
+        context = multiprocessing.get_context('spawn')
+        self._done = context.Queue()
+        self._permits = [context.Queue() for _ in worker_args]
+        self._workers = [
+            context.Process(target=target, args=(index,) + tuple(args) + (permit, self._done),
+                            daemon=True)
+            for index, (args, permit) in enumerate(zip(worker_args, self._permits))]
+
+    def __enter__(self):
+        for worker in self._workers:
+            worker.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        for permit in self._permits:
+            permit.put(None)
+        for worker in self._workers:
+            worker.join(timeout=10)
+            if worker.is_alive():
+                worker.terminate()
+
+    def send(self, index, task):
+        self._permits[index].put(task)
+
+    def broadcast(self, task):
+        """
+        Sends the task to all workers and waits until they have finished it.
+        """
+        for permit in self._permits:
+            permit.put(task)
+        for _ in self._permits:
+            self.receive()
+
+    def receive(self):
+        """
+        Waits for the next finished task and returns the index of its worker.
+        """
+        while True:
+            try:
+                index, error = self._done.get(timeout=1.)
+                break
+            except queue.Empty:
+                if not all(worker.is_alive() for worker in self._workers):
+                    raise GPflowError('Data-parallel worker terminated unexpectedly.')
+        if error is not None:
+            raise GPflowError('Data-parallel worker {} failed:\n{}'.format(index, error))
+        return index
+
+
+def _split(X, Y, num_workers):
+    bounds = np.linspace(0, np.shape(X)[0], num_workers + 1).astype(int)
+    return [(np.asarray(X[start:stop]), np.asarray(Y[start:stop]))
+            for start, stop in zip(bounds[:-1], bounds[1:])]
+
+
+def _shared_array(context, value):
+    array = context.RawArray('d', int(np.size(value)))
+    np.frombuffer(array, dtype=np.float64)[:] = np.ravel(value)
+    return array
+
+
+def _pack_parameters(parameters, session=None):
+    """
+    Returns the concatenated unconstrained values of the parameters and
+    their shapes.
+    """
+    values = [p._apply_transform(p.read_value(session=session)) for p in parameters]
+    shapes = [np.shape(value) for value in values]
+    theta = np.concatenate([np.ravel(value) for value in values]) if values else np.empty(0)
+    return theta.astype(np.float64), shapes
+
+
+def _unpack(theta, shapes):
+    values, start = [], 0
+    for shape in shapes:
+        stop = start + int(np.prod(shape))
+        values.append(np.reshape(theta[start:stop], shape))
+        start = stop
+    return values
+
+
+def _assign_parameters(parameters, theta, shapes, session=None):
+    for parameter, value in zip(parameters, _unpack(theta, shapes)):
+        parameter.assign(parameter.transform.forward(value), session=session)
+
+
+def _worker_session(num_threads):
+    config = tf.ConfigProto(intra_op_parallelism_threads=num_threads,
+                            inter_op_parallelism_threads=num_threads)
+    return tf.Session(config=config)
+
+
+def _worker_variables(model, shapes):
+    """
+    Returns the unconstrained variables of the worker's model, which must
+    match the parameters of the optimized model.
+    """
+    parameters = list(model.trainable_parameters)
+    _, worker_shapes = _pack_parameters(parameters)
+    if worker_shapes != list(shapes):
+        raise ValueError('The model factory must build models with the same '
+                         'trainable parameters as the optimized model.')
+    return [p.unconstrained_tensor for p in parameters]
+
+
+def _load_variables(variables, theta, shapes, session):
+    for variable, value in zip(variables, _unpack(theta, shapes)):
+        variable.load(value.astype(variable.dtype.as_numpy_dtype), session)
+
+
+def _gradients(ys, variables):
+    gradients = tf.gradients(ys, variables)
+    return [tf.zeros_like(v) if g is None else tf.convert_to_tensor(g)
+            for v, g in zip(variables, gradients)]
+
+
+def _flatten(values):
+    return np.concatenate([np.ravel(value) for value in values]) if values else np.empty(0)
+
+
+def _run_worker(index, model_factory, X, Y, num_data, shapes, shared_theta,
+                shared_gradients, lock, num_threads, permit, done):
+    """
+    Builds the worker's model and computes one gradient per task, which
+    is written to the worker's row of the shared gradients.
+    """
+    try:
+        with tf.Graph().as_default(), _worker_session(num_threads).as_default() as session:
+            model = model_factory(X, Y, num_data)
+            model.initialize(session=session)
+            variables = _worker_variables(model, shapes)
+            gradient_tensors = _gradients(model.objective, variables)
+            feed_dict = optimizer.Optimizer._gen_feed_dict(model, None)
+
+            theta = np.frombuffer(shared_theta, dtype=np.float64)
+            gradients = np.frombuffer(shared_gradients, dtype=np.float64)
+            gradients = gradients.reshape(-1, theta.size)[index]
+            while permit.get() is not None:
+                with lock:
+                    values = theta.copy()
+                _load_variables(variables, values, shapes, session)
+                gradients[:] = _flatten(session.run(gradient_tensors, feed_dict=feed_dict))
+                done.put((index, None))
+    except Exception:  # pylint: disable=broad-except
+        done.put((index, traceback.format_exc()))
+
+
+def _run_statistics_worker(index, model_factory, X, Y, shapes, statistics_shapes, shared_theta,
+                           shared_adjoint, shared_statistics, shared_gradients, num_threads,
+                           permit, done):
+    """
+    Builds the worker's SGPR. A 'statistics' task writes the shard's
+    sufficient statistics at the shared parameters to the worker's row of
+    the shared statistics, a 'gradient' task writes the gradient of their
+    inner product with the shared adjoint to the worker's row of the shared
+    gradients.
+    """
+    try:
+        with tf.Graph().as_default(), _worker_session(num_threads).as_default() as session:
+            model = model_factory(X, Y)
+            model.initialize(session=session)
+            variables = _worker_variables(model, shapes)
+            statistics = list(model._build_statistics())
+            adjoint_tensors = [tf.placeholder(settings.float_type, shape)
+                               for shape in statistics_shapes]
+            gradient_tensors = _gradients(model._build_statistics_gradient(adjoint_tensors),
+                                          variables)
+
+            theta = np.frombuffer(shared_theta, dtype=np.float64)
+            adjoint = np.frombuffer(shared_adjoint, dtype=np.float64)
+            statistics_values = np.frombuffer(shared_statistics, dtype=np.float64)
+            statistics_values = statistics_values.reshape(-1, adjoint.size)[index]
+            gradients = np.frombuffer(shared_gradients, dtype=np.float64)
+            gradients = gradients.reshape(-1, theta.size)[index]
+            task = permit.get()
+            while task is not None:
+                if task == 'statistics':
+                    _load_variables(variables, theta, shapes, session)
+                    statistics_values[:] = _flatten(session.run(statistics))
+                else:
+                    feed = dict(zip(adjoint_tensors, _unpack(adjoint, statistics_shapes)))
+                    gradients[:] = _flatten(session.run(gradient_tensors, feed_dict=feed))
+                done.put((index, None))
+                task = permit.get()
+    except Exception:  # pylint: disable=broad-except
+        done.put((index, traceback.format_exc()))
@@ -15,7 +15,6 @@
 import itertools
 import tensorflow as tf
 import numpy as np
-import pandas as pd
 
 from .optimizer import Optimizer
 from ..decors import name_scope
@@ -121,6 +120,7 @@ class HMC(Optimizer):
         traces = dict(zip(names, map(list, raw_traces[:-1])))
         if logprobs:
             traces.update({'logprobs': raw_traces[-1]})
+        import pandas as pd
         return pd.DataFrame(traces)
 
     def make_optimize_tensor(self, model, session=None, var_list=None, **kwargs):
@@ -194,5 +194,42 @@ class TestFixAndPredict(GPflowTestCase):
             _, _ = m.predict_f(m.X.read_value())
 
 
+class TestAutoflowCallable(GPflowTestCase):
+    def test_callable(self):
+        with self.test_context():
+            m = NoArgsModel()
+            m.compile()
+            function1 = gpflow.autoflow_callable(m.function1)
+            assert_allclose(function1(), m.function1())
+            m.a = 5.
+            assert_allclose(function1(), 5.)
+
+    def test_arguments(self):
+        with self.test_context():
+            rng = np.random.RandomState(0)
+            X, Y = rng.randn(2, 10, 1)
+            m = gpflow.models.GPR(X, Y, gpflow.kernels.RBF(1))
+            predict_f = gpflow.autoflow_callable(m.predict_f)
+            Xnew = rng.randn(5, 1)
+            for expected, actual in zip(m.predict_f(Xnew), predict_f(Xnew)):
+                assert_allclose(actual, expected)
+
+    def test_data_holder(self):
+        with self.test_context():
+            m = IncrementModel()
+            m.compile()
+            x = np.random.randn(10, 20)
+            assert_allclose(gpflow.autoflow_callable(m.inc)(x), m.inc(x))
+
+    def test_not_autoflow(self):
+        with self.test_context():
+            m = NoArgsModel()
+            m.compile()
+            with self.assertRaises(gpflow.GPflowError):
+                gpflow.autoflow_callable(m.compile)
+            with self.assertRaises(gpflow.GPflowError):
+                gpflow.autoflow_callable(NoArgsModel.function1)
+
+
 if __name__ == '__main__':
     tf.test.main()
@@ -81,7 +81,8 @@ class DiagsTest(GPflowTestCase):
             var_diff = sess.run(Fstar_var_1 - Fstar_var_2, feed_dict=feed_dict)
 
             assert_allclose(mean_diff, 0)
-            assert_allclose(var_diff, 0)
+            # the diagonal and the full q_sqrt take different matrix products
+            assert_allclose(var_diff, 0, atol=1e-12)
 
 
 class WhitenTest(GPflowTestCase):
@@ -160,5 +161,53 @@ class WhitenTestGaussian(WhitenTest):
             assert_allclose(var_difference, 0, atol=4)
 
 
+
+class ManyOutputsTest(GPflowTestCase):
+    """
+    Compares the conditional of many outputs sharing the kernel matrices with
+    a numpy reference which treats the outputs one at a time.
+    """
+    rng = np.random.RandomState(0)
+    num_func = 7
+    Kmm = rng.randn(5, 5)
+    Kmm = Kmm.dot(Kmm.T) + np.eye(5)
+    Kmn = rng.randn(5, 4)
+    Knn = Kmn.T.dot(np.linalg.solve(Kmm, Kmn)) + np.eye(4)
+    f = rng.randn(5, num_func)
+    q_sqrt_diag = rng.rand(5, num_func)
+    q_sqrt_full = np.tril(rng.randn(num_func, 5, 5))
+
+    def reference(self, q_sqrt, white):
+        Lm = np.linalg.cholesky(self.Kmm)
+        A = np.linalg.solve(Lm, self.Kmn)
+        if not white:
+            A = np.linalg.solve(Lm.T, A)
+        fvar_prior = self.Knn - self.Kmn.T.dot(np.linalg.solve(self.Kmm, self.Kmn))
+        fvars = []
+        for k in range(self.num_func):
+            L = np.diag(q_sqrt[:, k]) if q_sqrt.ndim == 2 else q_sqrt[k]
+            LTA = L.T.dot(A)
+            fvars.append(fvar_prior + LTA.T.dot(LTA))
+        return A.T.dot(self.f), np.stack(fvars, 2)
+
+    def test_outputs(self):
+        for q_sqrt in [self.q_sqrt_diag, self.q_sqrt_full]:
+            for white in [True, False]:
+                for full_cov in [True, False]:
+                    with self.test_context() as sess:
+                        Knn = self.Knn if full_cov else np.diag(self.Knn)
+                        fmean, fvar = gpflow.conditionals.base_conditional(
+                            tf.constant(self.Kmn), tf.constant(self.Kmm), tf.constant(Knn),
+                            tf.constant(self.f), full_cov=full_cov, q_sqrt=tf.constant(q_sqrt),
+                            white=white)
+                        fmean, fvar = sess.run([fmean, fvar])
+                    fmean_ref, fvar_ref = self.reference(q_sqrt, white)
+                    if not full_cov:
+                        fvar_ref = np.stack([np.diag(fvar_ref[:, :, k])
+                                             for k in range(self.num_func)], 1)
+                    assert_allclose(fmean, fmean_ref)
+                    assert_allclose(fvar, fvar_ref)
+
+
 if __name__ == '__main__':
     tf.test.main()
@@ -0,0 +1,121 @@
+# Copyright 2018 the GPflow authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+import tensorflow as tf
+from numpy.testing import assert_allclose
+
+import gpflow
+from gpflow.test_util import GPflowTestCase
+
+
+def make_svgp(X, Y, num_data, minibatch_size=None):
+    Z = np.linspace(-2, 2, 5)[:, None]
+    return gpflow.models.SVGP(X, Y, gpflow.kernels.RBF(1), gpflow.likelihoods.Gaussian(),
+                              Z=Z, num_data=num_data, minibatch_size=minibatch_size)
+
+
+def make_minibatch_svgp(X, Y, num_data):
+    return make_svgp(X, Y, num_data, minibatch_size=10)
+
+
+def make_sgpr(X, Y):
+    Z = np.linspace(-2, 2, 5)[:, None]
+    return gpflow.models.SGPR(X, Y, gpflow.kernels.RBF(1), Z=Z, chunk_size=4)
+
+
+class TestDataParallelOptimizer(GPflowTestCase):
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        self.X = rng.randn(20, 1)
+        self.Y = np.sin(3 * self.X) + 0.1 * rng.randn(20, 1)
+
+    def test_synchronous(self):
+        # with equal full-batch shards the averaged gradient is the full gradient
+        with self.test_context():
+            m1 = make_svgp(self.X, self.Y, 20)
+            opt = gpflow.train.DataParallelOptimizer(make_svgp, self.X, self.Y,
+                                                     num_workers=2, learning_rate=0.01)
+            opt.minimize(m1, maxiter=5)
+        with self.test_context():
+            m2 = make_svgp(self.X, self.Y, 20)
+            gpflow.train.AdamOptimizer(0.01).minimize(m2, maxiter=5)
+            # Adam normalises the steps, which amplifies the rounding errors of the average
+            for p1, p2 in zip(m1.trainable_parameters, m2.trainable_parameters):
+                assert_allclose(p1.read_value(), p2.read_value(), rtol=1e-6, atol=1e-6)
+
+    def test_asynchronous(self):
+        with self.test_context():
+            m = make_svgp(self.X, self.Y, 20)
+            before = m.compute_log_likelihood()
+            opt = gpflow.train.DataParallelOptimizer(make_svgp, self.X, self.Y, num_workers=2,
+                                                     learning_rate=0.01, staleness=1)
+            opt.minimize(m, maxiter=20)
+            self.assertGreater(m.compute_log_likelihood(), before)
+
+    def test_asynchronous_minibatch(self):
+        # stochastic gradients of minibatches of the shards, applied as they arrive,
+        # reach the optimum of the full-batch bound up to the minibatch noise
+        rng = np.random.RandomState(0)
+        X = rng.randn(40, 1)
+        Y = np.sin(3 * X) + 0.1 * rng.randn(40, 1)
+        with self.test_context():
+            m_ref = make_svgp(X, Y, 40)
+            gpflow.train.ScipyOptimizer().minimize(m_ref, maxiter=1000)
+            optimum = m_ref.compute_log_likelihood()
+        with self.test_context():
+            m = make_svgp(X, Y, 40)
+            self.assertLess(m.compute_log_likelihood(), optimum - 40.)
+            opt = gpflow.train.DataParallelOptimizer(make_minibatch_svgp, X, Y, num_workers=2,
+                                                     learning_rate=0.01, staleness=1)
+            opt.minimize(m, maxiter=1000)
+            self.assertGreater(m.compute_log_likelihood(), optimum - 2.)
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            gpflow.train.DataParallelOptimizer(make_svgp, self.X, self.Y[:10])
+        with self.assertRaises(ValueError):
+            gpflow.train.DataParallelOptimizer(make_svgp, self.X, self.Y, num_workers=0)
+        with self.assertRaises(ValueError):
+            gpflow.train.DataParallelOptimizer(make_svgp, self.X, self.Y, staleness=-1)
+
+
+class TestDistributedSGPROptimizer(GPflowTestCase):
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        self.X = rng.randn(20, 1)
+        self.Y = np.hstack([np.sin(3 * self.X), np.cos(3 * self.X)]) + 0.1 * rng.randn(20, 2)
+
+    def test_equivalence(self):
+        # the reduced bound and its gradient are exact, so the iterates match SGPR
+        with self.test_context():
+            m1 = make_sgpr(self.X[:1], self.Y[:1])
+            opt = gpflow.train.DistributedSGPROptimizer(make_sgpr, self.X, self.Y, num_workers=3)
+            opt.minimize(m1, maxiter=3)
+        with self.test_context():
+            m2 = make_sgpr(self.X, self.Y)
+            gpflow.train.ScipyOptimizer().minimize(m2, maxiter=3)
+            for p1, p2 in zip(m1.trainable_parameters, m2.trainable_parameters):
+                assert_allclose(p1.read_value(), p2.read_value(), rtol=1e-5, atol=1e-8)
+
+    def test_invalid(self):
+        with self.test_context():
+            m = make_svgp(self.X, self.Y, 20)
+            opt = gpflow.train.DistributedSGPROptimizer(make_sgpr, self.X, self.Y)
+            with self.assertRaises(ValueError):
+                opt.minimize(m)
+
+
+if __name__ == "__main__":
+    tf.test.main()
@@ -12,6 +12,9 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import os
+
+import pytest
 import tensorflow as tf
 import numpy as np
 import pandas as pd
@@ -218,3 +221,119 @@ class TestMinibatch(GPflowTestCase):
             batch_size = 10
             m.set_batch_size(batch_size)
             check_batch_size(m, length, batch_size)
+
+    def test_epoch_permutation(self):
+        with self.test_context() as session:
+            length = 10
+            arr = np.random.randn(length, 2)
+            m = gpflow.Minibatch(arr, batch_size=length, seed=1)
+            epochs = [m.read_value(session=session) for _ in range(3)]
+            for epoch in epochs:
+                assert_allclose(np.sort(epoch[:, 0]), np.sort(arr[:, 0]))
+            self.assertFalse(np.allclose(epochs[0], epochs[1]) and np.allclose(epochs[1], epochs[2]))
+
+    def test_pipeline(self):
+        with self.test_context() as session:
+            length = 10
+            arr = np.random.randn(length, 2)
+            mean, std = arr.mean(0), arr.std(0)
+            m = gpflow.Minibatch(arr, batch_size=5, shuffle=False, prefetch=3,
+                                 num_parallel_calls=2, transform=lambda x: (x - mean) / std)
+            for i in range(4):
+                start = (i % 2) * 5
+                assert_allclose(m.read_value(session=session), (arr[start:start + 5] - mean) / std)
+
+
+class TestIndexedMinibatch(GPflowTestCase):
+    def memmap(self, arr):
+        filename = os.path.join(tf.test.get_temp_dir(), 'indexed_minibatch.dat')
+        X = np.memmap(filename, dtype=arr.dtype, mode='w+', shape=arr.shape)
+        X[:] = arr
+        X.flush()
+        return np.memmap(filename, dtype=arr.dtype, mode='r', shape=arr.shape)
+
+    def test_create(self):
+        with self.test_context():
+            for v in [1.0, "test", None]:
+                with self.assertRaises(ValueError):
+                    gpflow.IndexedMinibatch(v)
+
+    def test_sequential(self):
+        with self.test_context() as session:
+            length = 10
+            arr = np.random.randn(length, 2)
+            m = gpflow.IndexedMinibatch(self.memmap(arr), shuffle=False, batch_size=3)
+            self.assertEqual(m.shape, (length, 2))
+            values = np.concatenate([m.read_value(session=session) for _ in range(4)])
+            assert_allclose(values, np.concatenate([arr, arr[:2]]))
+            with self.assertRaises(gpflow.GPflowError):
+                m.assign(arr)
+
+    def test_aligned(self):
+        h5py = pytest.importorskip('h5py')
+        with self.test_context() as session:
+            length = 10
+            arr = np.random.randn(length, 2)
+            filename = os.path.join(tf.test.get_temp_dir(), 'indexed_minibatch.h5')
+            with h5py.File(filename, 'w') as f:
+                f['data'] = 2 * arr
+            with h5py.File(filename, 'r') as f:
+                m1 = gpflow.IndexedMinibatch(self.memmap(arr), seed=1, batch_size=4)
+                m2 = gpflow.IndexedMinibatch(f['data'], seed=1, batch_size=4)
+                values = []
+                for _ in range(5):
+                    m1_value = m1.read_value(session=session)
+                    m2_value = m2.read_value(session=session)
+                    self.assertEqual(m1_value.shape, (4, 2))
+                    assert_allclose(2 * m1_value, m2_value)
+                    values.append(m1_value)
+            # every row is visited once per epoch
+            first_epoch = np.concatenate(values)[:8]
+            self.assertEqual(len(np.unique(first_epoch[:, 0])), 8)
+
+    def test_change_batch_size(self):
+        with self.test_context() as session:
+            arr = np.random.randn(10, 2)
+            m = gpflow.IndexedMinibatch(self.memmap(arr), shuffle=False)
+            assert_allclose(m.read_value(session=session), arr[:1])
+            m.set_batch_size(5)
+            assert_allclose(m.read_value(session=session), arr[:5])
+
+    def test_svgp(self):
+        with self.test_context():
+            X = np.random.randn(20, 1)
+            m = gpflow.models.SVGP(self.memmap(X), self.memmap(X), gpflow.kernels.RBF(1),
+                                   gpflow.likelihoods.Gaussian(), Z=X[:5], minibatch_size=5)
+            self.assertIsInstance(m.X, gpflow.IndexedMinibatch)
+            self.assertIsInstance(m.Y, gpflow.IndexedMinibatch)
+            self.assertEqual(m.num_data, 20)
+            self.assertTrue(np.isfinite(m.compute_log_likelihood()))
+
+    def test_svgp_h5py(self):
+        h5py = pytest.importorskip('h5py')
+        with self.test_context():
+            X = np.random.randn(20, 1)
+            filename = os.path.join(tf.test.get_temp_dir(), 'svgp.h5')
+            with h5py.File(filename, 'w') as f:
+                f['X'] = X
+            with h5py.File(filename, 'r') as f:
+                m = gpflow.models.SVGP(f['X'], f['X'], gpflow.kernels.RBF(1),
+                                       gpflow.likelihoods.Gaussian(), Z=X[:5], minibatch_size=5)
+                self.assertIsInstance(m.X, gpflow.IndexedMinibatch)
+                self.assertTrue(np.isfinite(m.compute_log_likelihood()))
+
+    def test_svgp_array_like(self):
+        # array-likes other than np.memmap and h5py datasets go to Minibatch as before
+        with self.test_context():
+            X = np.random.randn(20, 1)
+            m = gpflow.models.SVGP(X.tolist(), X.tolist(), gpflow.kernels.RBF(1),
+                                   gpflow.likelihoods.Gaussian(), Z=X[:5], minibatch_size=5)
+            self.assertNotIsInstance(m.X, gpflow.IndexedMinibatch)
+            self.assertIsInstance(m.X, gpflow.Minibatch)
+            with self.assertRaises(ValueError):
+                gpflow.models.SVGP(pd.DataFrame(X), pd.DataFrame(X), gpflow.kernels.RBF(1),
+                                   gpflow.likelihoods.Gaussian(), Z=X[:5], minibatch_size=5)
+
+
+if __name__ == '__main__':
+    tf.test.main()
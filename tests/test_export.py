@@ -0,0 +1,86 @@
+# Copyright 2018 the GPflow authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import tempfile
+
+import numpy as np
+import tensorflow as tf
+from numpy.testing import assert_allclose
+
+import gpflow
+from gpflow.test_util import GPflowTestCase
+
+
+class TestExportPredictor(GPflowTestCase):
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        self.X = rng.randn(20, 1)
+        self.Y = np.sin(self.X) + 0.1 * rng.randn(20, 1)
+        self.Xnew = rng.randn(7, 1)
+        self.Ynew = np.sin(self.Xnew)
+
+    def export_path(self):
+        return os.path.join(tempfile.mkdtemp(dir=tf.test.get_temp_dir()), 'predictor')
+
+    def make_gpr(self):
+        return gpflow.models.GPR(self.X, self.Y, gpflow.kernels.Matern32(1, lengthscales=0.5))
+
+    def make_svgp(self):
+        return gpflow.models.SVGP(self.X, self.Y, gpflow.kernels.Matern32(1, lengthscales=0.5),
+                                  gpflow.likelihoods.Gaussian(), Z=self.X[::4].copy())
+
+    def test_methods(self):
+        methods = ['predict_f', 'predict_f_full_cov', 'predict_y', 'predict_density']
+        for make_model in [self.make_gpr, self.make_svgp]:
+            with self.test_context():
+                path = self.export_path()
+                m = make_model()
+                m.export_predictor(path, methods=methods)
+                expected = [m.predict_f(self.Xnew), m.predict_f_full_cov(self.Xnew),
+                            m.predict_y(self.Xnew), m.predict_density(self.Xnew, self.Ynew)]
+            predictor = gpflow.models.Predictor(path)
+            self.assertEqual(predictor.methods, sorted(methods))
+            actual = [predictor.predict_f(self.Xnew), predictor.predict_f_full_cov(self.Xnew),
+                      predictor.predict_y(self.Xnew),
+                      [predictor.predict_density(self.Xnew, self.Ynew)]]
+            expected[-1] = [expected[-1]]
+            for values, expected_values in zip(actual, expected):
+                for value, expected_value in zip(values, expected_values):
+                    assert_allclose(value, expected_value, rtol=1e-6, atol=1e-10)
+            predictor.close()
+
+    def test_frozen(self):
+        with self.test_context():
+            path = self.export_path()
+            m = gpflow.models.GPR(self.X, self.Y, gpflow.kernels.RBF(1))
+            m.export_predictor(path, methods=['predict_f'])
+        predictor = gpflow.models.Predictor(path)
+        op_types = {op.type for op in predictor.session.graph.get_operations()}
+        # neither variables nor the softplus transforms of the parameters are exported
+        self.assertFalse(op_types & {'Variable', 'VariableV2', 'VarHandleOp', 'Softplus'})
+        self.assertNotIn('Cholesky', op_types)
+        with self.assertRaises(gpflow.GPflowError):
+            predictor.predict_y(self.Xnew)
+        predictor.close()
+
+    def test_unknown_method(self):
+        with self.test_context():
+            m = gpflow.models.GPR(self.X, self.Y, gpflow.kernels.RBF(1))
+            with self.assertRaises(ValueError):
+                m.export_predictor(self.export_path(), methods=['predict_f_samples'])
+
+
+if __name__ == "__main__":
+    tf.test.main()
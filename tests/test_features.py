@@ -94,5 +94,39 @@ class TestFeaturesPsdSchur(GPflowTestCase):
             self.assertTrue(np.all(np.linalg.eig(Kff - Qff)[0] > 0.0))
 
 
+class TestSelectInducingPoints(GPflowTestCase):
+    rng = np.random.RandomState(0)
+    X = rng.randn(40, 2)
+
+    def test_full_rank(self):
+        with self.test_context():
+            kern = gpflow.kernels.Matern32(2, lengthscales=0.3)
+            Z, L = gpflow.features.select_inducing_points(kern, self.X, 40)
+            K = kern.compute_K_symm(self.X)
+            np.testing.assert_allclose(L.dot(L.T), K, atol=1e-8)
+            self.assertEqual(len(np.unique(Z, axis=0)), 40)
+
+    def test_low_rank(self):
+        with self.test_context():
+            kern = gpflow.kernels.RBF(2, lengthscales=1.5)
+            Z, L = gpflow.features.select_inducing_points(kern, self.X, 10)
+            self.assertEqual(Z.shape, (10, 2))
+            self.assertEqual(L.shape, (40, 10))
+            # the factor is the Nystrom approximation through the selected points
+            Kxz = kern.compute_K(self.X, Z)
+            Kzz = kern.compute_K_symm(Z)
+            np.testing.assert_allclose(L.dot(L.T), Kxz.dot(np.linalg.solve(Kzz, Kxz.T)), atol=1e-8)
+            # the conditional variances are non-negative and below the prior variance
+            residual = kern.compute_Kdiag(self.X) - np.sum(np.square(L), 1)
+            self.assertTrue(np.all(residual > -1e-10))
+            self.assertLess(residual.max(), kern.compute_Kdiag(self.X).max())
+
+    def test_invalid(self):
+        with self.test_context():
+            kern = gpflow.kernels.RBF(2)
+            with self.assertRaises(ValueError):
+                gpflow.features.select_inducing_points(kern, self.X, 41)
+
+
 if __name__ == "__main__":
     tf.test.main()
@@ -0,0 +1,60 @@
+# Copyright 2018 the GPflow authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import subprocess
+import sys
+
+import tensorflow as tf
+
+import gpflow
+from gpflow.test_util import GPflowTestCase
+
+
+SCRIPT = """
+import json, sys, time
+import tensorflow
+loaded = set(sys.modules)
+start = time.perf_counter()
+import gpflow
+print(json.dumps({'time': time.perf_counter() - start,
+                  'modules': sorted(set(sys.modules) - loaded)}))
+"""
+
+# Time of `import gpflow` on top of TensorFlow, generous for slow test machines.
+IMPORT_TIME_BUDGET = 5.0
+
+
+def import_gpflow():
+    output = subprocess.check_output([sys.executable, '-c', SCRIPT])
+    return json.loads(output.decode().strip().splitlines()[-1])
+
+
+class TestImport(GPflowTestCase):
+    def test_lazy_modules(self):
+        modules = import_gpflow()['modules']
+        for name in ['pandas', 'h5py', 'multipledispatch', 'pytest', 'scipy.optimize',
+                     'gpflow.expectations', 'gpflow.test_util']:
+            self.assertNotIn(name, modules)
+
+    def test_time_budget(self):
+        self.assertLess(min(import_gpflow()['time'] for _ in range(3)), IMPORT_TIME_BUDGET)
+
+    def test_lazy_module_access(self):
+        self.assertTrue(callable(gpflow.expectations.expectation))
+        self.assertTrue(callable(gpflow.expectations.quadrature_expectation))
+
+
+if __name__ == "__main__":
+    tf.test.main()
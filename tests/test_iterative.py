@@ -0,0 +1,130 @@
+# Copyright 2018 the GPflow authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import tensorflow as tf
+
+import numpy as np
+from numpy.testing import assert_allclose
+
+import gpflow
+from gpflow import settings
+from gpflow.test_util import GPflowTestCase
+
+
+class TestStochasticLogdet(GPflowTestCase):
+    rng = np.random.RandomState(0)
+    A = rng.randn(20, 20)
+    A = A.dot(A.T) + 20 * np.eye(20)
+
+    def operator(self, V):
+        return tf.matmul(tf.constant(self.A, dtype=settings.float_type), V)
+
+    def test_basis_probes(self):
+        # probes sqrt(N) e_i make the trace estimate exact
+        with self.test_context() as session:
+            probes = tf.constant(np.sqrt(20.) * np.eye(20), dtype=settings.float_type)
+            logdet = gpflow.krylov.stochastic_logdet(self.operator, probes, 19)
+            assert_allclose(session.run(logdet), np.linalg.slogdet(self.A)[1], rtol=1e-6)
+
+    def test_rademacher_probes(self):
+        with self.test_context() as session:
+            probes = self.rng.randint(0, 2, size=(20, 500)) * 2. - 1.
+            probes = tf.constant(probes, dtype=settings.float_type)
+            logdet = gpflow.krylov.stochastic_logdet(self.operator, probes, 10)
+            assert_allclose(session.run(logdet), np.linalg.slogdet(self.A)[1], rtol=0.05)
+
+
+class BasisProbesGPR(gpflow.models.IterativeGPR):
+    """
+    Uses the probes sqrt(N) e_i, which make the trace estimates exact.
+    """
+    @gpflow.params_as_tensors
+    def _build_probes(self):
+        num_data = tf.shape(self.X)[0]
+        return tf.sqrt(tf.cast(num_data, settings.float_type)) * tf.eye(num_data, dtype=settings.float_type)
+
+
+class TestIterativeGPR(GPflowTestCase):
+    rng = np.random.RandomState(0)
+    X = rng.rand(30, 2)
+    Y = np.hstack([np.sin(3 * X[:, :1]), np.cos(2 * X[:, 1:])]) + 0.1 * rng.randn(30, 2)
+    Xtest = rng.rand(10, 2)
+
+    def prepare(self, chunk_size=None, preconditioner_rank=0):
+        def kernel():
+            return gpflow.kernels.Matern52(2, lengthscales=[0.5, 0.7], ARD=True)
+        m = BasisProbesGPR(self.X, self.Y, kernel(), chunk_size=chunk_size,
+                           num_lanczos=29, cg_tolerance=1e-12,
+                           preconditioner_rank=preconditioner_rank,
+                           mean_function=gpflow.mean_functions.Constant(0.3))
+        m_ref = gpflow.models.GPR(self.X, self.Y, kernel(),
+                                  mean_function=gpflow.mean_functions.Constant(0.3))
+        m.likelihood.variance = m_ref.likelihood.variance = 0.1
+        return m, m_ref
+
+    def test_equivalence(self):
+        with self.test_context() as session:
+            for chunk_size, rank in [(None, 0), (7, 0), (None, 10)]:
+                m, m_ref = self.prepare(chunk_size, rank)
+                assert_allclose(m.compute_log_likelihood(), m_ref.compute_log_likelihood(),
+                                rtol=1e-5)
+                for predict in ['predict_f', 'predict_f_full_cov']:
+                    mu, var = getattr(m, predict)(self.Xtest)
+                    mu_ref, var_ref = getattr(m_ref, predict)(self.Xtest)
+                    assert_allclose(mu, mu_ref, atol=1e-6)
+                    assert_allclose(var, var_ref, atol=1e-6)
+
+                grads = session.run(tf.gradients(m.likelihood_tensor, m.trainable_tensors))
+                grads_ref = session.run(tf.gradients(m_ref.likelihood_tensor,
+                                                     m_ref.trainable_tensors))
+                for grad, grad_ref in zip(grads, grads_ref):
+                    assert_allclose(grad, grad_ref, rtol=1e-5, atol=1e-8)
+
+    def test_chunked_gradients(self):
+        # loops with back propagation store their intermediate values on stacks,
+        # only the iteration counters of the loops held constant may be stored
+        with self.test_context() as session:
+            m, m_ref = self.prepare(chunk_size=7)
+            grads = tf.gradients(m.likelihood_tensor, m.trainable_tensors)
+            pushed = [op.inputs[1].dtype for op in session.graph.get_operations()
+                      if op.type in ['StackPushV2', 'StackPush']]
+            self.assertTrue(all(dtype == tf.int32 for dtype in pushed))
+            grads_ref = tf.gradients(m_ref.likelihood_tensor, m_ref.trainable_tensors)
+            for grad, grad_ref in zip(session.run(grads), session.run(grads_ref)):
+                assert_allclose(grad, grad_ref, rtol=1e-5, atol=1e-8)
+
+    def test_optimize(self):
+        with self.test_context():
+            m = gpflow.models.IterativeGPR(self.X, self.Y, gpflow.kernels.RBF(2), chunk_size=8,
+                                           random_state=np.random.RandomState(1))
+            log_lik = m.compute_log_likelihood()
+            gpflow.train.ScipyOptimizer().minimize(m, maxiter=10)
+            self.assertGreater(m.compute_log_likelihood(), log_lik)
+
+    def test_assign_data(self):
+        # the probes and the number of Lanczos iterations follow the data size
+        with self.test_context():
+            m = gpflow.models.IterativeGPR(self.X, self.Y, gpflow.kernels.RBF(2), num_lanczos=25,
+                                           random_state=np.random.RandomState(1))
+            log_lik = m.compute_log_likelihood()
+            assert_allclose(m.compute_log_likelihood(), log_lik)
+            m.X, m.Y = self.X[:20], self.Y[:20]
+            m_ref = gpflow.models.IterativeGPR(self.X[:20], self.Y[:20], gpflow.kernels.RBF(2),
+                                               num_lanczos=19, random_state=np.random.RandomState(1))
+            assert_allclose(m.compute_log_likelihood(), m_ref.compute_log_likelihood())
+            self.assertTrue(np.all(np.isfinite(m.predict_f(self.X)[1])))
+
+
+if __name__ == "__main__":
+    tf.test.main()
@@ -506,5 +506,34 @@ class TestARDInit(GPflowTestCase):
             self.assertTrue(np.all(k1_variances == k2_variances))
 
 
+
+class TestRandomFeatures(GPflowTestCase):
+    def setUp(self):
+        self.test_graph = tf.Graph()
+
+    def test_approximation(self):
+        kernels = [gpflow.kernels.RBF, gpflow.kernels.Exponential, gpflow.kernels.Matern12,
+                   gpflow.kernels.Matern32, gpflow.kernels.Matern52,
+                   gpflow.kernels.RationalQuadratic]
+        rng = np.random.RandomState(1)
+        X_data = rng.randn(5, 3)
+        for kernel_class in kernels:
+            with self.test_context() as session:
+                kernel = kernel_class(2, variance=2.3, lengthscales=[1.4, 0.7], active_dims=[0, 2])
+                kernel.compile()
+                frequencies = kernel.spectral_frequencies(200000, rng)
+                phases = rng.uniform(0., 2 * np.pi, 200000)
+                X = tf.placeholder(gpflow.settings.float_type)
+                features = kernel.random_features(X, frequencies, phases)
+                approx = tf.matmul(features, features, transpose_b=True)
+                approx, exact = session.run([approx, kernel.K(X)], feed_dict={X: X_data})
+                assert_allclose(approx, exact, atol=0.05)
+
+    def test_not_implemented(self):
+        with self.test_context():
+            kernel = gpflow.kernels.Cosine(1)
+            with self.assertRaises(NotImplementedError):
+                kernel.spectral_frequencies(10)
+
 if __name__ == "__main__":
     tf.test.main()
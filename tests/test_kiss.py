@@ -0,0 +1,131 @@
+# Copyright 2018 the GPflow authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import tensorflow as tf
+
+import numpy as np
+from numpy.testing import assert_allclose
+
+import gpflow
+from gpflow import settings
+from gpflow.test_util import GPflowTestCase
+
+
+class TestKrylov(GPflowTestCase):
+    rng = np.random.RandomState(0)
+    A = rng.randn(20, 20)
+    A = A.dot(A.T) + 20 * np.eye(20)
+    B = rng.randn(20, 3)
+
+    def operator(self, V):
+        return tf.matmul(tf.constant(self.A, dtype=settings.float_type), V)
+
+    def test_conjugate_gradient(self):
+        with self.test_context() as session:
+            rhs = tf.constant(self.B, dtype=settings.float_type)
+            X = gpflow.krylov.conjugate_gradient(self.operator, rhs, 100, 1e-10)
+            assert_allclose(session.run(X), np.linalg.solve(self.A, self.B), atol=1e-8)
+
+    def test_preconditioned_conjugate_gradient(self):
+        with self.test_context() as session:
+            rhs = tf.constant(self.B, dtype=settings.float_type)
+            diagonal = tf.constant(np.diag(self.A).reshape(-1, 1), dtype=settings.float_type)
+            X = gpflow.krylov.conjugate_gradient(self.operator, rhs, 100, 1e-10,
+                                                 preconditioner=lambda V: V / diagonal)
+            assert_allclose(session.run(X), np.linalg.solve(self.A, self.B), atol=1e-8)
+
+    def test_lanczos(self):
+        with self.test_context() as session:
+            start = tf.constant(self.B[:, :1], dtype=settings.float_type)
+            Q, T = session.run(gpflow.krylov.lanczos(self.operator, start, 8))
+            assert_allclose(Q.T.dot(Q), np.eye(8), atol=1e-10)
+            assert_allclose(Q.T.dot(self.A).dot(Q), T, atol=1e-8)
+            assert_allclose(Q[:, 0], self.B[:, 0] / np.linalg.norm(self.B[:, 0]))
+
+
+class TestToeplitz(GPflowTestCase):
+    rng = np.random.RandomState(0)
+
+    def test_mvm(self):
+        with self.test_context() as session:
+            for size, tol in [(50, 1e-10), (gpflow.models.kiss.TOEPLITZ_FFT_SIZE, 1e-3)]:
+                column = np.exp(-0.5 * np.square(np.arange(size) / (0.1 * size)))
+                V = self.rng.randn(3, size)
+                T = column[np.abs(np.arange(size)[:, None] - np.arange(size)[None, :])]
+                product = gpflow.models.kiss._toeplitz_mvm(tf.constant(column), tf.constant(V))
+                assert_allclose(session.run(product), V.dot(T), rtol=tol, atol=tol)
+
+
+class TestKISSGPR(GPflowTestCase):
+    rng = np.random.RandomState(0)
+
+    def prepare(self, X, Y, kern, kern_ref, grid_size):
+        m = gpflow.models.KISSGPR(X, Y, kern, grid_size, cg_tolerance=1e-10,
+                                  mean_function=gpflow.mean_functions.Constant(0.3))
+        m_ref = gpflow.models.GPR(X, Y, kern_ref, mean_function=gpflow.mean_functions.Constant(0.3))
+        m.likelihood.variance = m_ref.likelihood.variance = 0.1
+        return m, m_ref
+
+    def assert_models_close(self, m, m_ref, Xtest):
+        assert_allclose(m.compute_log_likelihood(), m_ref.compute_log_likelihood(), rtol=0.2)
+        mu, var = m.predict_f(Xtest)
+        mu_ref, var_ref = m_ref.predict_f(Xtest)
+        assert_allclose(mu, mu_ref, atol=1e-3)
+        assert_allclose(var, var_ref, atol=1e-3)
+        mu, var = m.posterior().predict_f(Xtest)
+        assert_allclose(mu, mu_ref, atol=1e-3)
+
+    def test_one_dimensional(self):
+        with self.test_context():
+            X = 3 * self.rng.rand(40, 1)
+            Y = np.hstack([np.sin(3 * X), np.cos(2 * X)]) + 0.1 * self.rng.randn(40, 2)
+            m, m_ref = self.prepare(X, Y, gpflow.kernels.RBF(1, lengthscales=0.5),
+                                    gpflow.kernels.RBF(1, lengthscales=0.5), 200)
+            self.assert_models_close(m, m_ref, 3 * self.rng.rand(10, 1))
+
+    def test_two_dimensional(self):
+        with self.test_context():
+            X = 2 * self.rng.rand(30, 2)
+            Y = np.sin(2 * X[:, :1]) * np.cos(X[:, 1:]) + 0.1 * self.rng.randn(30, 1)
+
+            def kernel():
+                return (gpflow.kernels.RBF(1, lengthscales=0.6, active_dims=[0]) *
+                        gpflow.kernels.Matern52(1, lengthscales=0.8, active_dims=[1]))
+            m, m_ref = self.prepare(X, Y, kernel(), kernel(), [60, 50])
+            self.assert_models_close(m, m_ref, 2 * self.rng.rand(10, 2))
+
+    def test_gradients(self):
+        with self.test_context():
+            X = 3 * self.rng.rand(40, 1)
+            Y = np.sin(3 * X) + 0.1 * self.rng.randn(40, 1)
+            m = gpflow.models.KISSGPR(X, Y, gpflow.kernels.RBF(1, lengthscales=0.5), 100)
+            gpflow.train.ScipyOptimizer().minimize(m, maxiter=20)
+            self.assertTrue(np.isfinite(m.compute_log_likelihood()))
+
+    def test_invalid(self):
+        with self.test_context():
+            X = self.rng.rand(10, 2)
+            Y = self.rng.rand(10, 1)
+            with self.assertRaises(ValueError):
+                gpflow.models.KISSGPR(X, Y, gpflow.kernels.RBF(2), 20)
+            kern = gpflow.kernels.RBF(1, active_dims=[1]) * gpflow.kernels.RBF(1, active_dims=[0])
+            with self.assertRaises(ValueError):
+                gpflow.models.KISSGPR(X, Y, kern, 20)
+            kern = gpflow.kernels.RBF(1, active_dims=[0]) * gpflow.kernels.RBF(1, active_dims=[1])
+            with self.assertRaises(ValueError):
+                gpflow.models.KISSGPR(X, Y, kern, 5)
+
+
+if __name__ == "__main__":
+    tf.test.main()
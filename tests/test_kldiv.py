@@ -122,6 +122,23 @@ def test_sumkl_equals_batchkl(session_tf, shared_k, diag, mu,
     kl_sum =tf.reduce_sum(kl_sum)
     assert_almost_equal(kl_sum.eval(), kl_batch.eval())
 
+@pytest.mark.parametrize('white', [True, False])
+def test_lowrank(session_tf, white, mu, sqrt_diag, K):
+    """
+    Check the low-rank plus diagonal covariance against its Cholesky factor.
+    """
+    rng = np.random.RandomState(1)
+    factor_data = rng.randn(Datum.N, Datum.M, 2)
+    cov = np.array([np.diag(Datum.sqrt_diag_data[:, n] ** 2) + factor_data[n].dot(factor_data[n].T)
+                    for n in range(Datum.N)])
+    chol = tf.convert_to_tensor(np.linalg.cholesky(cov))
+    factor = tf.convert_to_tensor(factor_data)
+
+    kl_lowrank = gauss_kl(mu, sqrt_diag, None if white else K, q_factor=factor)
+    kl_dense = gauss_kl(mu, chol, None if white else K)
+
+    np.testing.assert_allclose(kl_lowrank.eval(), kl_dense.eval())
+
 def tf_kl_1d(q_mu, q_sigma, p_var=1.0):
     p_var = tf.ones_like(q_sigma) if p_var is None else p_var
     q_var = tf.square(q_sigma)
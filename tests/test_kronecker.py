@@ -0,0 +1,115 @@
+# Copyright 2018 the GPflow authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import tensorflow as tf
+
+import numpy as np
+from numpy.testing import assert_allclose
+
+import gpflow
+from gpflow.test_util import GPflowTestCase
+
+
+class TestGPRKronecker(GPflowTestCase):
+    rng = np.random.RandomState(0)
+    grid = [rng.randn(4), rng.randn(3, 2), rng.randn(2)]
+    Y = rng.randn(24, 2)
+    Xtest = rng.randn(6, 4)
+    missing = [2, 7, 8, 20]
+
+    def kernel(self):
+        return (gpflow.kernels.RBF(1, lengthscales=0.9, active_dims=[0]) *
+                gpflow.kernels.Matern32(2, lengthscales=[1.2, 0.7], active_dims=[1, 2]) *
+                gpflow.kernels.Matern52(1, variance=1.3, active_dims=[3]))
+
+    def prepare(self, missing):
+        Y = self.Y.copy()
+        Y[missing] = np.nan
+        m = gpflow.models.GPRKronecker(self.grid, Y, self.kernel(),
+                                       mean_function=gpflow.mean_functions.Constant(0.3))
+        m.likelihood.variance = 0.2
+        observed = np.setdiff1d(np.arange(24), missing)
+        X = m.X.read_value()
+        m_ref = gpflow.models.GPR(X[observed], self.Y[observed], self.kernel(),
+                                  mean_function=gpflow.mean_functions.Constant(0.3))
+        m_ref.likelihood.variance = 0.2
+        return m, m_ref
+
+    def assert_models_equal(self, m, m_ref):
+        assert_allclose(m.compute_log_likelihood(), m_ref.compute_log_likelihood())
+        for predict in ['predict_f', 'predict_f_full_cov', 'predict_y']:
+            mu, var = getattr(m, predict)(self.Xtest)
+            mu_ref, var_ref = getattr(m_ref, predict)(self.Xtest)
+            assert_allclose(mu, mu_ref)
+            assert_allclose(var, var_ref, atol=1e-10)
+        mu, var = m.posterior().predict_f(self.Xtest)
+        assert_allclose(mu, m_ref.predict_f(self.Xtest)[0])
+
+    def test_complete_grid(self):
+        with self.test_context():
+            m, m_ref = self.prepare([])
+            self.assert_models_equal(m, m_ref)
+
+    def test_missing(self):
+        with self.test_context():
+            m, m_ref = self.prepare(self.missing)
+            self.assertEqual(m.num_missing, len(self.missing))
+            self.assert_models_equal(m, m_ref)
+
+    def test_gradients(self):
+        for missing in [[], self.missing]:
+            with self.test_context() as session:
+                m, m_ref = self.prepare(missing)
+                grads = session.run(tf.gradients(m.likelihood_tensor, m.trainable_tensors))
+                grads_ref = session.run(tf.gradients(m_ref.likelihood_tensor, m_ref.trainable_tensors))
+                self.assertEqual(len(grads), len(grads_ref))
+                for grad, grad_ref in zip(grads, grads_ref):
+                    assert_allclose(grad, grad_ref, rtol=1e-6, atol=1e-8)
+
+    def test_regular_grid_gradients(self):
+        # nearly equal eigenvalues of a smooth kernel on a regular grid
+        with self.test_context() as session:
+            grid = [np.linspace(0., 1., 30), np.linspace(0., 1., 20)]
+            kern = (gpflow.kernels.RBF(1, lengthscales=2., active_dims=[0]) *
+                    gpflow.kernels.RBF(1, lengthscales=2., active_dims=[1]))
+            Y = self.rng.randn(600, 1)
+            Y[[3, 100, 401]] = np.nan
+            m = gpflow.models.GPRKronecker(grid, Y, kern)
+            m.likelihood.variance = 1e-3
+            grads = session.run(tf.gradients(m.likelihood_tensor, m.trainable_tensors))
+            self.assertTrue(all(np.all(np.isfinite(grad)) for grad in grads))
+
+    def test_grid_order(self):
+        with self.test_context():
+            m, _ = self.prepare([])
+            X = m.X.read_value()
+            assert_allclose(X[:6, 0], self.grid[0][0])
+            assert_allclose(X[1, 1:3], self.grid[1][0])
+            assert_allclose(X[1, 3], self.grid[2][1])
+
+    def test_invalid(self):
+        with self.test_context():
+            kern = gpflow.kernels.RBF(1, active_dims=[1]) * gpflow.kernels.RBF(2, active_dims=[0, 2])
+            with self.assertRaises(ValueError):
+                gpflow.models.GPRKronecker(self.grid[:2], self.Y[:12], kern)
+            with self.assertRaises(ValueError):
+                gpflow.models.GPRKronecker(self.grid, self.Y, self.kernel().kernels[0])
+            Y = self.Y.copy()
+            Y[3, 0] = np.nan
+            with self.assertRaises(ValueError):
+                gpflow.models.GPRKronecker(self.grid, Y, self.kernel())
+
+
+if __name__ == "__main__":
+    tf.test.main()
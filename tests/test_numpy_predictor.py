@@ -0,0 +1,124 @@
+# Copyright 2018 the GPflow authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+import tensorflow as tf
+from numpy.testing import assert_allclose
+
+import gpflow
+from gpflow.test_util import GPflowTestCase
+
+
+# Loads the predictor module as documented in `gpflow.models.numpy_predictor`.
+SCRIPT = """
+import importlib.util, json, os, sys
+import numpy as np
+gpflow_dir = importlib.util.find_spec('gpflow').submodule_search_locations[0]
+spec = importlib.util.spec_from_file_location(
+    'numpy_predictor', os.path.join(gpflow_dir, 'models', 'numpy_predictor.py'))
+numpy_predictor = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(numpy_predictor)
+predictor = numpy_predictor.NumpyPredictor.load(sys.argv[1])
+mean, var = predictor.predict_f(np.load(sys.argv[2]))
+print(json.dumps({'mean': mean.tolist(), 'var': var.tolist(),
+                  'tensorflow': 'tensorflow' in sys.modules, 'gpflow': 'gpflow' in sys.modules}))
+"""
+
+
+class TestNumpyPredictor(GPflowTestCase):
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        self.X = rng.randn(20, 3)
+        self.Y = np.hstack([np.sin(self.X[:, :1]), np.cos(self.X[:, 1:2])]) + 0.1 * rng.randn(20, 2)
+        self.Xnew = rng.randn(7, 3)
+        self.Z = self.X[::4].copy()
+        self.rng = rng
+
+    def make_kernel(self):
+        return gpflow.kernels.Sum([
+            gpflow.kernels.RBF(2, lengthscales=[0.5, 2.], ARD=True, active_dims=[0, 1]),
+            gpflow.kernels.Product([gpflow.kernels.Matern32(1, active_dims=[2]),
+                                    gpflow.kernels.Linear(2, variance=[0.5, 0.2], ARD=True,
+                                                          active_dims=[2, 0])]),
+            gpflow.kernels.Matern52(3, variance=0.3),
+            gpflow.kernels.Matern12(1, active_dims=[1])])
+
+    def make_models(self):
+        mean_function = gpflow.mean_functions.Linear(self.rng.randn(3, 2), self.rng.randn(2))
+        yield gpflow.models.GPR(self.X, self.Y, self.make_kernel(), mean_function=mean_function)
+        yield gpflow.models.SGPR(self.X, self.Y, self.make_kernel(), Z=self.Z,
+                                 mean_function=gpflow.mean_functions.Constant([0.5, -0.5]))
+        for q_diag, whiten in [(False, False), (True, True)]:
+            m = gpflow.models.SVGP(self.X, self.Y, self.make_kernel(), gpflow.likelihoods.Gaussian(),
+                                   Z=self.Z, q_diag=q_diag, whiten=whiten)
+            q_sqrt = self.rng.rand(5, 2) if q_diag else \
+                np.array([np.tril(self.rng.randn(5, 5)) for _ in range(2)])
+            m.q_sqrt = q_sqrt
+            m.q_mu = self.rng.randn(5, 2)
+            yield m
+
+    def test_predict(self):
+        with self.test_context():
+            for m in self.make_models():
+                predictor = m.numpy_predictor()
+                path = os.path.join(tempfile.mkdtemp(dir=tf.test.get_temp_dir()), 'gp.npz')
+                predictor.save(path)
+                loaded = gpflow.models.NumpyPredictor.load(path)
+                expected = [m.predict_f(self.Xnew), m.predict_f_full_cov(self.Xnew),
+                            m.predict_y(self.Xnew)]
+                for p in [predictor, loaded]:
+                    actual = [p.predict_f(self.Xnew), p.predict_f_full_cov(self.Xnew),
+                              p.predict_y(self.Xnew)]
+                    for values, expected_values in zip(actual, expected):
+                        for value, expected_value in zip(values, expected_values):
+                            assert_allclose(value, expected_value, rtol=1e-6, atol=1e-8)
+
+    def test_without_tensorflow(self):
+        with self.test_context():
+            m = gpflow.models.SGPR(self.X, self.Y, self.make_kernel(), Z=self.Z)
+            directory = tempfile.mkdtemp(dir=tf.test.get_temp_dir())
+            path, xnew_path = os.path.join(directory, 'gp.npz'), os.path.join(directory, 'Xnew.npy')
+            m.numpy_predictor().save(path)
+            np.save(xnew_path, self.Xnew)
+            package_dir = os.path.dirname(os.path.dirname(os.path.abspath(gpflow.__file__)))
+            env = dict(os.environ)
+            env['PYTHONPATH'] = os.pathsep.join(
+                [package_dir] + ([env['PYTHONPATH']] if 'PYTHONPATH' in env else []))
+            output = subprocess.check_output([sys.executable, '-c', SCRIPT, path, xnew_path], env=env)
+            result = json.loads(output.decode().strip().splitlines()[-1])
+            self.assertFalse(result['tensorflow'])
+            self.assertFalse(result['gpflow'])
+            mean, var = m.predict_f(self.Xnew)
+            assert_allclose(result['mean'], mean, rtol=1e-6, atol=1e-8)
+            assert_allclose(result['var'], var, rtol=1e-6, atol=1e-8)
+
+    def test_unsupported(self):
+        with self.test_context():
+            m = gpflow.models.GPR(self.X, self.Y, gpflow.kernels.Periodic(3))
+            with self.assertRaises(ValueError):
+                m.numpy_predictor()
+            m = gpflow.models.VGP(self.X, self.Y, gpflow.kernels.RBF(3),
+                                  gpflow.likelihoods.Gaussian())
+            with self.assertRaises(NotImplementedError):
+                m.numpy_predictor()
+
+
+if __name__ == "__main__":
+    tf.test.main()
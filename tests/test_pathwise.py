@@ -0,0 +1,110 @@
+# Copyright 2018 the GPflow authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import tensorflow as tf
+
+import numpy as np
+from numpy.testing import assert_allclose
+
+import gpflow
+from gpflow.test_util import GPflowTestCase
+
+
+class TestGPRPathwise(GPflowTestCase):
+    """
+    Checks that the moments of pathwise samples match the predictive
+    distribution, inheriting classes override `prepare` for other models.
+    """
+
+    rng = np.random.RandomState(0)
+    X = rng.randn(20, 2)
+    Y = np.sin(X[:, :1]) + 0.1 * rng.randn(20, 1)
+    Z = rng.randn(6, 2)
+    Xtest = rng.randn(9, 2)
+
+    def kernel(self):
+        return gpflow.kernels.RBF(2, lengthscales=[1.2, 0.8])
+
+    def prepare(self):
+        return gpflow.models.GPR(self.X, self.Y, kern=self.kernel(),
+                                 mean_function=gpflow.mean_functions.Constant(0.5))
+
+    def test_moments(self):
+        with self.test_context():
+            tf.set_random_seed(1)
+            m = self.prepare()
+            samples = m.sample_functions(3000, num_features=3000)
+            self.assertEqual(samples.num_samples, 3000)
+            F = samples(self.Xtest)
+            self.assertEqual(F.shape, (3000, 9, 1))
+            mu, var = m.predict_f(self.Xtest)
+            assert_allclose(F.mean(0), mu, atol=0.1)
+            assert_allclose(F.var(0), var, atol=0.1)
+
+    def test_deterministic(self):
+        with self.test_context():
+            m = self.prepare()
+            samples = m.sample_functions(4, num_features=50)
+            assert_allclose(samples(self.Xtest), samples(self.Xtest))
+            assert_allclose(samples(self.Xtest[:3]), samples(self.Xtest)[:, :3])
+
+
+class TestSGPRPathwise(TestGPRPathwise):
+    def prepare(self):
+        return gpflow.models.SGPR(self.X, self.Y, kern=self.kernel(), Z=self.Z,
+                                  mean_function=gpflow.mean_functions.Constant(0.5))
+
+
+class TestSVGPPathwise(TestGPRPathwise):
+    whiten = True
+    q_diag = False
+
+    def prepare(self):
+        m = gpflow.models.SVGP(self.X, self.Y, kern=self.kernel(),
+                               likelihood=gpflow.likelihoods.Gaussian(), Z=self.Z,
+                               whiten=self.whiten, q_diag=self.q_diag,
+                               mean_function=gpflow.mean_functions.Constant(0.5))
+        rng = np.random.RandomState(1)
+        m.q_mu = rng.randn(*m.q_mu.shape)
+        if self.q_diag:
+            m.q_sqrt = 0.5 * rng.rand(*m.q_sqrt.shape)
+        else:
+            m.q_sqrt = 0.3 * np.tril(rng.randn(*m.q_sqrt.shape))
+        return m
+
+
+class TestSVGPPathwiseDiag(TestSVGPPathwise):
+    q_diag = True
+
+
+class TestSVGPPathwiseNonWhite(TestSVGPPathwise):
+    whiten = False
+
+
+class TestNotSupported(GPflowTestCase):
+    def test_not_supported(self):
+        with self.test_context():
+            rng = np.random.RandomState(0)
+            X, Y = rng.randn(10, 2), rng.randn(10, 1)
+            m = gpflow.models.GPR(X, Y, kern=gpflow.kernels.Cosine(2))
+            with self.assertRaises(NotImplementedError):
+                m.sample_functions(2)
+            m = gpflow.models.VGP(X, Y, kern=gpflow.kernels.RBF(2),
+                                  likelihood=gpflow.likelihoods.Gaussian())
+            with self.assertRaises(NotImplementedError):
+                m.sample_functions(2)
+
+
+if __name__ == "__main__":
+    tf.test.main()
@@ -0,0 +1,275 @@
+# Copyright 2018 the GPflow authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import tensorflow as tf
+
+import numpy as np
+from numpy.testing import assert_allclose
+
+import gpflow
+from gpflow.test_util import GPflowTestCase
+
+
+class TestGPRPosterior(GPflowTestCase):
+    """
+    This base class checks posterior caching of GPR, inheriting classes
+    override `prepare` to check other models.
+    """
+
+    rng = np.random.RandomState(0)
+    X = rng.randn(20, 2)
+    Y = rng.randn(20, 2)
+    Z = rng.randn(5, 2)
+    Xtest = rng.randn(7, 2)
+    Ytest = rng.randn(7, 2)
+
+    @classmethod
+    def kernel(cls):
+        return gpflow.kernels.Matern32(2) + gpflow.kernels.White(2, variance=0.1)
+
+    def prepare(self):
+        return gpflow.models.GPR(self.X, self.Y, kern=self.kernel(),
+                                 mean_function=gpflow.mean_functions.Constant())
+
+    def assert_predictions_equal(self, m, posterior):
+        mu, var = m.predict_f(self.Xtest)
+        mu_c, var_c = posterior.predict_f(self.Xtest)
+        assert_allclose(mu, mu_c)
+        assert_allclose(var, var_c)
+        mu, var = m.predict_f_full_cov(self.Xtest)
+        mu_c, var_c = posterior.predict_f_full_cov(self.Xtest)
+        assert_allclose(mu, mu_c)
+        assert_allclose(var, var_c)
+        mu, var = m.predict_y(self.Xtest)
+        mu_c, var_c = posterior.predict_y(self.Xtest)
+        assert_allclose(mu, mu_c)
+        assert_allclose(var, var_c)
+        assert_allclose(m.predict_density(self.Xtest, self.Ytest),
+                        posterior.predict_density(self.Xtest, self.Ytest))
+
+    def test_predictions(self):
+        with self.test_context():
+            m = self.prepare()
+            posterior = m.posterior()
+            self.assertTrue(posterior is m.posterior())
+            self.assertTrue(posterior.is_stale())
+            self.assert_predictions_equal(m, posterior)
+            self.assertFalse(posterior.is_stale())
+
+    def test_cache_is_reused(self):
+        with self.test_context() as session:
+            m = self.prepare()
+            posterior = m.posterior()
+            posterior.predict_f(self.Xtest)
+            cache = posterior.read_cache()
+            # Change variable behind GPflow's back, the cache must not notice it.
+            variance = m.likelihood.variance
+            session.run(tf.assign(variance.parameter_tensor,
+                                  variance.transform.backward(np.array(2.0))))
+            for value, value_same in zip(cache, posterior.read_cache()):
+                assert_allclose(value, value_same)
+            posterior.update()
+            self.assertFalse(all(np.allclose(value, value_updated) for value, value_updated
+                                 in zip(cache, posterior.read_cache())))
+
+    def test_invalidation(self):
+        with self.test_context():
+            m = self.prepare()
+            posterior = m.posterior()
+            posterior.predict_f(self.Xtest)
+
+            m.likelihood.variance = 0.5
+            self.assertTrue(posterior.is_stale())
+            self.assert_predictions_equal(m, posterior)
+
+            m.kern.kernels[0].lengthscales = 2.3
+            self.assertTrue(posterior.is_stale())
+            self.assert_predictions_equal(m, posterior)
+
+    def test_data_invalidation(self):
+        with self.test_context():
+            m = self.prepare()
+            posterior = m.posterior()
+            posterior.predict_f(self.Xtest)
+            m.X = self.rng.randn(30, 2)
+            m.Y = self.rng.randn(30, 2)
+            self.assertTrue(posterior.is_stale())
+            self.assert_predictions_equal(m, posterior)
+
+    def test_optimization(self):
+        with self.test_context():
+            m = self.prepare()
+            posterior = m.posterior()
+            posterior.predict_f(self.Xtest)
+            gpflow.train.ScipyOptimizer().minimize(m, maxiter=5)
+            self.assertTrue(posterior.is_stale())
+            self.assert_predictions_equal(m, posterior)
+
+
+class TestGPRAppendData(GPflowTestCase):
+    rng = np.random.RandomState(0)
+    X = rng.randn(20, 2)
+    Y = rng.randn(20, 2)
+    Xtest = rng.randn(7, 2)
+
+    def prepare(self, num_data):
+        kern = gpflow.kernels.Matern32(2) + gpflow.kernels.White(2, variance=0.1)
+        return gpflow.models.GPR(self.X[:num_data], self.Y[:num_data], kern=kern,
+                                 mean_function=gpflow.mean_functions.Constant())
+
+    def test_append_data(self):
+        with self.test_context():
+            m = self.prepare(12)
+            posterior = m.posterior()
+            posterior.predict_f(self.Xtest)
+            m.append_data(self.X[12:17], self.Y[12:17])
+            m.append_data(self.X[17], self.Y[17])
+            m.append_data(self.X[18:], self.Y[18:])
+            self.assertFalse(posterior.is_stale())
+            assert_allclose(m.X.read_value(), self.X)
+            assert_allclose(m.Y.read_value(), self.Y)
+            L, V = posterior.read_cache()
+            posterior.update()
+            L_full, V_full = posterior.read_cache()
+            assert_allclose(L, L_full)
+            assert_allclose(V, V_full)
+            mu, var = m.predict_f(self.Xtest)
+            mu_c, var_c = posterior.predict_f(self.Xtest)
+            assert_allclose(mu, mu_c)
+            assert_allclose(var, var_c)
+
+    def test_append_data_not_built(self):
+        with self.test_context():
+            m = self.prepare(12)
+            m.clear()
+            m.append_data(self.X[12:], self.Y[12:])
+            assert_allclose(m.X.read_value(), self.X)
+            m.compile()
+            mu, _ = m.posterior().predict_f(self.Xtest)
+            assert_allclose(mu, m.predict_f(self.Xtest)[0])
+
+    def test_append_data_wrong_shape(self):
+        with self.test_context():
+            m = self.prepare(12)
+            with self.assertRaises(ValueError):
+                m.append_data(self.X[12:15], self.Y[12:14])
+
+
+class TestSGPRPosterior(TestGPRPosterior):
+    def prepare(self):
+        return gpflow.models.SGPR(self.X, self.Y, kern=self.kernel(), Z=self.Z,
+                                  mean_function=gpflow.mean_functions.Constant())
+
+
+class TestGPRFITCPosterior(TestGPRPosterior):
+    def prepare(self):
+        return gpflow.models.GPRFITC(self.X, self.Y, kern=self.kernel(), Z=self.Z,
+                                     mean_function=gpflow.mean_functions.Constant())
+
+
+class TestBayesianGPLVMPosterior(TestGPRPosterior):
+    def prepare(self):
+        X_var = np.full(self.X.shape, 0.1)
+        kern = gpflow.kernels.RBF(2, ARD=True)
+        return gpflow.models.BayesianGPLVM(self.X, X_var, self.Y, kern, M=5, Z=self.Z)
+
+    def test_invalidation(self):
+        with self.test_context():
+            m = self.prepare()
+            posterior = m.posterior()
+            posterior.predict_f(self.Xtest)
+            m.X_var = np.full(self.X.shape, 0.2)
+            self.assertTrue(posterior.is_stale())
+            self.assert_predictions_equal(m, posterior)
+
+    def test_data_invalidation(self):
+        with self.test_context():
+            m = self.prepare()
+            posterior = m.posterior()
+            posterior.predict_f(self.Xtest)
+            m.X_mean = self.rng.randn(*self.X.shape)
+            self.assertTrue(posterior.is_stale())
+            self.assert_predictions_equal(m, posterior)
+
+
+class TestSVGPPosterior(TestGPRPosterior):
+    whiten = True
+    q_diag = False
+    q_rank = None
+
+    def prepare(self):
+        m = gpflow.models.SVGP(self.X, self.Y, kern=self.kernel(),
+                               likelihood=gpflow.likelihoods.Gaussian(),
+                               Z=self.Z, whiten=self.whiten, q_diag=self.q_diag,
+                               q_rank=self.q_rank, mean_function=gpflow.mean_functions.Constant())
+        rng = np.random.RandomState(1)
+        m.q_mu = rng.randn(*m.q_mu.shape)
+        if self.q_rank is not None:
+            m.q_factor = rng.randn(*m.q_factor.shape)
+        if self.q_diag or self.q_rank is not None:
+            m.q_sqrt = rng.rand(*m.q_sqrt.shape)
+        else:
+            m.q_sqrt = np.tril(rng.randn(*m.q_sqrt.shape))
+        return m
+
+    def test_cache_is_reused(self):
+        with self.test_context() as session:
+            m = self.prepare()
+            posterior = m.posterior()
+            posterior.predict_f(self.Xtest)
+            mean_proj = posterior.read_cache()[1]
+            session.run(tf.assign(m.q_mu.parameter_tensor, np.zeros(m.q_mu.shape)))
+            mean_proj_same = posterior.read_cache()[1]
+            assert_allclose(mean_proj, mean_proj_same)
+            posterior.update()
+            mean_proj_updated = posterior.read_cache()[1]
+            assert_allclose(mean_proj_updated, 0.)
+
+
+class TestSVGPPosteriorDiag(TestSVGPPosterior):
+    q_diag = True
+
+
+class TestSVGPPosteriorNonWhite(TestSVGPPosterior):
+    whiten = False
+
+
+class TestSVGPPosteriorNonWhiteDiag(TestSVGPPosterior):
+    whiten = False
+    q_diag = True
+
+
+class TestSVGPPosteriorLowRank(TestSVGPPosterior):
+    q_rank = 2
+
+
+class TestSVGPPosteriorNonWhiteLowRank(TestSVGPPosterior):
+    whiten = False
+    q_rank = 2
+
+
+class TestNotSupported(GPflowTestCase):
+    rng = np.random.RandomState(0)
+
+    def test_not_supported(self):
+        with self.test_context():
+            X, Y = self.rng.randn(10, 2), self.rng.randn(10, 1)
+            m = gpflow.models.GPMC(X, Y, kern=gpflow.kernels.RBF(2),
+                                   likelihood=gpflow.likelihoods.Gaussian())
+            with self.assertRaises(NotImplementedError):
+                m.posterior().predict_f(X)
+
+
+if __name__ == "__main__":
+    tf.test.main()
@@ -180,5 +180,51 @@ class TestFullCovSGPMC(TestFullCov):
             Z=self.Z)
 
 
+class TestBatchedPrediction(GPflowTestCase):
+    rng = np.random.RandomState(0)
+    X = rng.randn(20, 2)
+    Y = rng.randn(20, 2)
+    Xtest = rng.randn(23, 2)
+    Ytest = rng.randn(23, 2)
+
+    def prepare(self):
+        return gpflow.models.GPR(self.X, self.Y, kern=gpflow.kernels.RBF(2))
+
+    def test_batched(self):
+        with self.test_context():
+            m = self.prepare()
+            for prefetch in [True, False]:
+                for batch_size in [1, 5, 23, 100]:
+                    mu, var = m.predict_f_batched(self.Xtest, batch_size, prefetch=prefetch)
+                    mu_ref, var_ref = m.predict_f(self.Xtest)
+                    np.testing.assert_allclose(mu, mu_ref)
+                    np.testing.assert_allclose(var, var_ref)
+                    mu, var = m.predict_y_batched(self.Xtest, batch_size, prefetch=prefetch)
+                    mu_ref, var_ref = m.predict_y(self.Xtest)
+                    np.testing.assert_allclose(mu, mu_ref)
+                    np.testing.assert_allclose(var, var_ref)
+                    density = m.predict_density_batched(self.Xtest, self.Ytest, batch_size,
+                                                        prefetch=prefetch)
+                    np.testing.assert_allclose(density, m.predict_density(self.Xtest, self.Ytest))
+
+    def test_out(self):
+        with self.test_context():
+            m = self.prepare()
+            out = np.zeros((23, 2)), np.zeros((23, 2))
+            result = m.predict_f_batched(self.Xtest, 4, out=out)
+            self.assertTrue(result[0] is out[0] and result[1] is out[1])
+            np.testing.assert_allclose(out[0], m.predict_f(self.Xtest)[0])
+
+    def test_batches(self):
+        with self.test_context():
+            m = self.prepare()
+            batches = list(m.predict_f_batches(self.Xtest, 10))
+            self.assertEqual([len(mu) for mu, _ in batches], [10, 10, 3])
+            mu = np.concatenate([mu for mu, _ in batches])
+            np.testing.assert_allclose(mu, m.predict_f(self.Xtest)[0])
+            with self.assertRaises(ValueError):
+                list(m.predict_f_batches(self.Xtest, 0))
+
+
 if __name__ == "__main__":
     tf.test.main()
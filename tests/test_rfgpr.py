@@ -0,0 +1,101 @@
+# Copyright 2018 the GPflow authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import tensorflow as tf
+
+import numpy as np
+from numpy.testing import assert_allclose
+from scipy.stats import multivariate_normal
+
+import gpflow
+from gpflow.test_util import GPflowTestCase
+
+
+class TestRandomFeatureGPR(GPflowTestCase):
+    rng = np.random.RandomState(0)
+    X = rng.randn(30, 2)
+    Y = rng.randn(30, 2)
+    Xtest = rng.randn(7, 2)
+    variance, lengthscales, noise = 1.7, np.array([0.8, 1.3]), 0.3
+
+    def prepare(self, chunk_size=None):
+        kern = gpflow.kernels.Matern52(2, variance=self.variance, lengthscales=self.lengthscales)
+        m = gpflow.models.RandomFeatureGPR(self.X, self.Y, kern, num_features=40,
+                                           chunk_size=chunk_size,
+                                           random_state=np.random.RandomState(1))
+        m.likelihood.variance = self.noise
+        return m
+
+    def features(self, m, X):
+        frequencies, phases = m.frequencies.read_value(), m.phases.read_value()
+        projection = (X / self.lengthscales).dot(frequencies) + phases
+        return np.sqrt(2 * self.variance / len(phases)) * np.cos(projection)
+
+    def test_reference(self):
+        with self.test_context():
+            m = self.prepare()
+            Phi = self.features(m, self.X)
+            K = Phi.dot(Phi.T) + self.noise * np.eye(len(self.X))
+            log_lik = sum(multivariate_normal.logpdf(y, cov=K) for y in self.Y.T)
+            assert_allclose(m.compute_log_likelihood(), log_lik)
+
+            Phi_test = self.features(m, self.Xtest)
+            Kx = Phi.dot(Phi_test.T)
+            mu = Kx.T.dot(np.linalg.solve(K, self.Y))
+            cov = Phi_test.dot(Phi_test.T) - Kx.T.dot(np.linalg.solve(K, Kx))
+            mu_m, var_m = m.predict_f_full_cov(self.Xtest)
+            assert_allclose(mu_m, mu)
+            assert_allclose(var_m[:, :, 0], cov, atol=1e-10)
+            mu_m, var_m = m.predict_f(self.Xtest)
+            assert_allclose(var_m[:, 1], np.diag(cov), atol=1e-10)
+
+    def test_chunked(self):
+        with self.test_context():
+            m = self.prepare()
+            mc = self.prepare(chunk_size=7)
+            assert_allclose(m.compute_log_likelihood(), mc.compute_log_likelihood())
+            assert_allclose(m.predict_f(self.Xtest), mc.predict_f(self.Xtest))
+
+    def test_chunked_gradients(self):
+        # loops with back propagation store their intermediate values on stacks
+        with self.test_context() as session:
+            m = self.prepare()
+            mc = self.prepare(chunk_size=7)
+            grads_c = tf.gradients(mc.likelihood_tensor, mc.trainable_tensors)
+            op_types = {op.type for op in session.graph.get_operations()}
+            self.assertFalse(op_types & {'StackV2', 'StackPushV2', 'Stack', 'StackPush'})
+            grads = tf.gradients(m.likelihood_tensor, m.trainable_tensors)
+            for grad, grad_c in zip(session.run(grads), session.run(grads_c)):
+                assert_allclose(grad, grad_c)
+
+    def test_optimize(self):
+        with self.test_context():
+            m = self.prepare(chunk_size=8)
+            log_lik = m.compute_log_likelihood()
+            gpflow.train.ScipyOptimizer().minimize(m, maxiter=10)
+            self.assertGreater(m.compute_log_likelihood(), log_lik)
+
+    def test_rational_quadratic_alpha(self):
+        with self.test_context():
+            kern = gpflow.kernels.RationalQuadratic(2, alpha=2.)
+            m = gpflow.models.RandomFeatureGPR(self.X, self.Y, kern, num_features=40,
+                                               random_state=np.random.RandomState(1))
+            self.assertFalse(kern.alpha.trainable)
+            self.assertTrue(kern.variance.trainable)
+            gpflow.train.ScipyOptimizer().minimize(m, maxiter=5)
+            assert_allclose(kern.alpha.read_value(), 2.)
+
+
+if __name__ == "__main__":
+    tf.test.main()
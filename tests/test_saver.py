@@ -16,6 +16,7 @@ import copy
 import os
 import tempfile
 
+import h5py
 import numpy as np
 import pytest
 import tensorflow as tf
@@ -185,6 +186,62 @@ def test_loading_into_specific_session(session_tf, filename, model):
     assert_allclose(predict_origin, predict_loaded)
 
 
+def test_saving_chunked_format(session_tf, filename, model):
+    x_new = Data.x_new()
+    predict_origin = model.predict_f(x_new)
+    context = gp.SaverContext(serializer=gp.saver.ChunkedHDF5Serializer)
+    gp.Saver().save(filename, model, context=context)
+    with h5py.File(filename, 'r') as h5file:
+        data = h5file['arrays'][model.X.pathname]
+        assert data.chunks is not None
+        assert data.compression == 'gzip'
+        assert h5file['arrays'][model.kern.variance.pathname].shape == ()
+    with session_context() as session:
+        context = gp.SaverContext(serializer=gp.saver.ChunkedHDF5Serializer)
+        loaded = gp.Saver().load(filename, context=context)
+        predict_loaded = loaded.predict_f(x_new)
+        assert_allclose(predict_origin, predict_loaded)
+
+
+def test_loading_chunked_values(session_tf, filename, model):
+    model.kern.variance = 2.3
+    model.likelihood.variance = 0.3
+    context = gp.SaverContext(serializer=gp.saver.ChunkedHDF5Serializer)
+    gp.Saver().save(filename, model, context=context)
+
+    values = gp.Saver().load_values(filename, data_holders=False, context=context)
+    parameters = [p for p in model.parameters if not isinstance(p, gp.DataHolder)]
+    assert set(values) == {p.pathname for p in parameters}
+    kern_values = gp.Saver().load_values(filename, prefix=model.kern.pathname, context=context)
+    assert set(kern_values) == {p.pathname for p in model.kern.parameters}
+    with gp.Saver().load_values(filename, lazy=True, context=context) as lazy_values:
+        assert isinstance(lazy_values[model.X.pathname], h5py.Dataset)
+        assert_allclose(lazy_values[model.X.pathname][:5], model.X.read_value()[:5])
+    assert not lazy_values.file
+
+    other = Data.model()
+    other.assign(values)
+    for p in parameters:
+        assert_allclose(other.read_values()[p.pathname], p.read_value())
+
+    with pytest.raises(NotImplementedError):
+        gp.Saver().load_values(filename)
+
+
+def test_loading_chunked_values_with_shared_pathnames(session_tf, filename, model):
+    other = Data.model()
+    assert model.X.pathname == other.X.pathname
+    context = gp.SaverContext(serializer=gp.saver.ChunkedHDF5Serializer)
+    gp.Saver().save(filename, [model, other], context=context)
+    values = gp.Saver().load_values(filename, context=context)
+    # the data holders X and Y are saved with the parameters
+    assert len(values) == sum(len(list(m.parameters)) + len(list(m.data_holders))
+                              for m in [model, other])
+    matches = [key for key, value in values.items()
+               if value.shape == other.X.shape and np.all(value == other.X.read_value())]
+    assert len(matches) == 1
+
+
 # ========
 # Helpers.
 # ========
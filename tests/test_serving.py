@@ -0,0 +1,105 @@
+# Copyright 2018 the GPflow authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+
+import numpy as np
+import tensorflow as tf
+from numpy.testing import assert_allclose
+
+import gpflow
+from gpflow.test_util import GPflowTestCase
+
+
+class TestPredictionServer(GPflowTestCase):
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        self.X = rng.randn(20, 1)
+        self.Y = np.sin(self.X)
+        self.requests = [rng.randn(i % 3 + 1, 1) for i in range(20)]
+
+    def serve(self, server):
+        results = [None] * len(self.requests)
+
+        def request(i):
+            results[i] = server.predict(self.requests[i], timeout=60)
+
+        threads = [threading.Thread(target=request, args=(i,)) for i in range(len(self.requests))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_predict_f(self):
+        with self.test_context() as session:
+            m = gpflow.models.GPR(self.X, self.Y, gpflow.kernels.RBF(1))
+            batch_sizes = []
+
+            def predict(Xnew, session=None):
+                batch_sizes.append(len(Xnew))
+                return m.predict_f(Xnew, session=session)
+
+            with gpflow.models.PredictionServer(predict, max_batch_size=8, max_latency=0.05) as server:
+                results = self.serve(server)
+            for Xnew, (mean, var) in zip(self.requests, results):
+                expected_mean, expected_var = m.predict_f(Xnew, session=session)
+                assert_allclose(mean, expected_mean)
+                assert_allclose(var, expected_var)
+            self.assertEqual(sum(batch_sizes), sum(len(Xnew) for Xnew in self.requests))
+            self.assertLess(len(batch_sizes), len(self.requests))
+            self.assertLessEqual(max(batch_sizes), 8)
+
+    def test_predict_density(self):
+        with self.test_context():
+            m = gpflow.models.GPR(self.X, self.Y, gpflow.kernels.RBF(1))
+            Xnew, Ynew = self.X[:5], self.Y[:5]
+            with gpflow.models.PredictionServer(m.posterior().predict_density) as server:
+                density = server.predict(Xnew, Ynew, timeout=60)
+            assert_allclose(density, m.predict_density(Xnew, Ynew))
+
+    def test_errors(self):
+        with self.test_context():
+            def predict(Xnew, session=None):
+                raise ValueError('failed')
+
+            server = gpflow.models.PredictionServer(predict)
+            with self.assertRaises(gpflow.GPflowError):
+                server.submit(self.X)
+            with server:
+                with self.assertRaises(ValueError):
+                    server.predict(self.X, timeout=60)
+                with self.assertRaises(ValueError):
+                    server.submit(self.X, self.Y[:5])
+            with self.assertRaises(ValueError):
+                gpflow.models.PredictionServer(predict, max_batch_size=0)
+
+    def test_malformed_requests(self):
+        with self.test_context() as session:
+            m = gpflow.models.GPR(self.X, self.Y, gpflow.kernels.RBF(1))
+            with gpflow.models.PredictionServer(m.predict_f, max_latency=0.05) as server:
+                valid = [server.submit(Xnew) for Xnew in self.requests[:5]]
+                with self.assertRaises(ValueError):
+                    server.submit(np.ones((2, 3)))
+                with self.assertRaises(ValueError):
+                    server.submit(self.requests[0], self.requests[0])
+                with self.assertRaises(ValueError):
+                    server.submit(np.ones(()))
+                for Xnew, future in zip(self.requests, valid):
+                    mean, _ = future.result(timeout=60)
+                    assert_allclose(mean, m.predict_f(Xnew, session=session)[0])
+
+
+if __name__ == "__main__":
+    tf.test.main()
@@ -0,0 +1,125 @@
+# Copyright 2018 the GPflow authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import tensorflow as tf
+
+import numpy as np
+from numpy.testing import assert_allclose
+
+import gpflow
+from gpflow.test_util import GPflowTestCase
+
+
+class TestStreamingSGPR(GPflowTestCase):
+    rng = np.random.RandomState(0)
+    X = rng.randn(30, 2)
+    Y = rng.randn(30, 2)
+    Z = rng.randn(6, 2)
+    Xtest = rng.randn(7, 2)
+
+    def kernel(self):
+        return gpflow.kernels.Matern32(2, lengthscales=1.5)
+
+    def prepare(self):
+        m = gpflow.models.SGPR(self.X, self.Y, kern=self.kernel(), Z=self.Z,
+                               mean_function=gpflow.mean_functions.Constant(0.3))
+        s = gpflow.models.StreamingSGPR(self.kernel(), Z=self.Z, num_latent=2,
+                                        mean_function=gpflow.mean_functions.Constant(0.3))
+        for i in range(0, 30, 7):
+            s.add_data(self.X[i:i + 7], self.Y[i:i + 7])
+        return m, s
+
+    def assert_models_equal(self, m, s):
+        assert_allclose(m.compute_log_likelihood(), s.compute_log_likelihood())
+        mu, var = m.predict_f(self.Xtest)
+        mu_s, var_s = s.predict_f(self.Xtest)
+        assert_allclose(mu, mu_s)
+        assert_allclose(var, var_s)
+        mu, var = m.predict_f_full_cov(self.Xtest)
+        mu_s, var_s = s.predict_f_full_cov(self.Xtest)
+        assert_allclose(mu, mu_s)
+        assert_allclose(var, var_s)
+        mu_s, var_s = s.posterior().predict_f(self.Xtest)
+        assert_allclose(mu, mu_s)
+
+    def test_equivalence(self):
+        with self.test_context():
+            m, s = self.prepare()
+            assert_allclose(s.num_data.read_value(), 30)
+            self.assert_models_equal(m, s)
+
+    def test_optimize_variance(self):
+        with self.test_context():
+            m, s = self.prepare()
+            m.kern.trainable = False
+            m.feature.trainable = False
+            m.mean_function.trainable = False
+            self.assertEqual(len(list(s.trainable_parameters)), 1)
+            gpflow.train.ScipyOptimizer().minimize(m, maxiter=10)
+            gpflow.train.ScipyOptimizer().minimize(s, maxiter=10)
+            assert_allclose(m.likelihood.variance.read_value(),
+                            s.likelihood.variance.read_value(), rtol=1e-4)
+
+    def test_reset_data(self):
+        with self.test_context():
+            m, s = self.prepare()
+            s.kern.lengthscales = 0.7
+            with self.assertRaises(gpflow.GPflowError):
+                s.add_data(self.X, self.Y)
+            m.kern.lengthscales = 0.7
+            s.reset_data()
+            assert_allclose(s.num_data.read_value(), 0)
+            s.add_data(self.X, self.Y)
+            self.assert_models_equal(m, s)
+
+
+class TestChunkedSGPR(GPflowTestCase):
+    rng = np.random.RandomState(1)
+    X = rng.randn(23, 2)
+    Y = rng.randn(23, 2)
+    Z = rng.randn(6, 2)
+    Xtest = rng.randn(7, 2)
+
+    def prepare(self, chunk_size):
+        kern = gpflow.kernels.RBF(2, ARD=True)
+        return gpflow.models.SGPR(self.X, self.Y, kern=kern, Z=self.Z, chunk_size=chunk_size,
+                                  mean_function=gpflow.mean_functions.Linear(np.ones((2, 2))))
+
+    def test_equivalence(self):
+        with self.test_context() as session:
+            m = self.prepare(None)
+            for chunk_size in [5, 23, 50]:
+                mc = self.prepare(chunk_size)
+                assert_allclose(m.compute_log_likelihood(), mc.compute_log_likelihood())
+                mu, var = m.predict_f(self.Xtest)
+                mu_c, var_c = mc.predict_f(self.Xtest)
+                assert_allclose(mu, mu_c)
+                assert_allclose(var, var_c)
+
+                grads = session.run(tf.gradients(m.likelihood_tensor, m.trainable_tensors))
+                grads_c = session.run(tf.gradients(mc.likelihood_tensor, mc.trainable_tensors))
+                for grad, grad_c in zip(grads, grads_c):
+                    assert_allclose(grad, grad_c)
+
+    def test_chunked_gradients(self):
+        # loops with back propagation store their intermediate values on stacks
+        with self.test_context() as session:
+            m = self.prepare(5)
+            tf.gradients(m.likelihood_tensor, m.trainable_tensors)
+            op_types = {op.type for op in session.graph.get_operations()}
+            self.assertFalse(op_types & {'StackV2', 'StackPushV2', 'Stack', 'StackPush'})
+
+
+if __name__ == "__main__":
+    tf.test.main()
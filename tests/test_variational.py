@@ -217,5 +217,82 @@ class VariationalMultivariateTest(GPflowTestCase):
                 test_prior_KL = gpflow.autoflow()(m.build_prior_KL.__func__)(m)
                 assert_allclose(referenceKL - test_prior_KL, 0, atol=4)
 
+
+class LowRankCovarianceTest(GPflowTestCase):
+    """
+    Compares models with low-rank plus diagonal covariances of q to the same
+    models with the equivalent full Cholesky factors.
+    """
+    rng = np.random.RandomState(0)
+    X = rng.randn(8, 1)
+    Y = rng.randn(8, 2)
+    Z = rng.randn(5, 1)
+    Xtest = rng.randn(4, 1)
+
+    def assign(self, m, m_full, num, rank):
+        q_mu = self.rng.randn(num, 2)
+        q_diag = self.rng.rand(num, 2) + 0.5
+        q_factor = self.rng.randn(2, num, rank)
+        cov = np.array([np.diag(q_diag[:, k] ** 2) + q_factor[k].dot(q_factor[k].T) for k in range(2)])
+        m.q_mu = m_full.q_mu = q_mu
+        m.q_sqrt = q_diag
+        m.q_factor = q_factor
+        m_full.q_sqrt = np.linalg.cholesky(cov)
+
+    def assert_models_equal(self, m, m_full):
+        assert_allclose(m.compute_log_likelihood(), m_full.compute_log_likelihood())
+        for predict in ['predict_f', 'predict_f_full_cov']:
+            mu, var = getattr(m, predict)(self.Xtest)
+            mu_full, var_full = getattr(m_full, predict)(self.Xtest)
+            assert_allclose(mu, mu_full)
+            assert_allclose(var, var_full)
+
+    def test_svgp(self):
+        for whiten in [True, False]:
+            with self.test_context():
+                models = [gpflow.models.SVGP(self.X, self.Y, kernel(), gpflow.likelihoods.Gaussian(),
+                                             Z=self.Z, q_rank=q_rank, whiten=whiten)
+                          for q_rank in [2, None]]
+                self.assign(*models, num=5, rank=2)
+                self.assert_models_equal(*models)
+                mu, _ = models[0].posterior().predict_f(self.Xtest)
+                assert_allclose(mu, models[1].predict_f(self.Xtest)[0])
+
+    def test_vgp(self):
+        with self.test_context():
+            models = [gpflow.models.VGP(self.X, self.Y, kernel(), gpflow.likelihoods.Gaussian(),
+                                        q_rank=q_rank)
+                      for q_rank in [3, None]]
+            self.assign(*models, num=8, rank=3)
+            self.assert_models_equal(*models)
+
+    def test_invalid(self):
+        with self.test_context():
+            with self.assertRaises(ValueError):
+                gpflow.models.SVGP(self.X, self.Y, kernel(), gpflow.likelihoods.Gaussian(),
+                                   Z=self.Z, q_diag=True, q_rank=2)
+            Kmn = tf.constant(self.rng.randn(5, 4))
+            Kmm = tf.constant(np.eye(5))
+            Knn = tf.constant(np.ones(4))
+            f = tf.constant(self.rng.randn(5, 2))
+            q_sqrt = tf.constant(np.array([np.eye(5)] * 2))
+            q_factor = tf.constant(self.rng.randn(2, 5, 2))
+            with self.assertRaisesRegex(ValueError, 'q_factor'):
+                gpflow.conditionals.base_conditional(Kmn, Kmm, Knn, f, q_sqrt=q_sqrt,
+                                                     q_factor=q_factor)
+
+    def test_deterministic_init(self):
+        with self.test_context():
+            state = np.random.get_state()
+            models = [gpflow.models.SVGP(self.X, self.Y, kernel(), gpflow.likelihoods.Gaussian(),
+                                         Z=self.Z, q_rank=2),
+                      gpflow.models.VGP(self.X, self.Y, kernel(), gpflow.likelihoods.Gaussian(),
+                                        q_rank=2)]
+            self.assertTrue(np.all(state[1] == np.random.get_state()[1]))
+            for m, num in zip(models, [5, 8]):
+                expected = 1e-3 * np.tile(np.eye(num, 2)[None], [2, 1, 1])
+                assert_allclose(m.q_factor.read_value(), expected)
+
+
 if __name__ == "__main__":
     tf.test.main()